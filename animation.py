@@ -0,0 +1,212 @@
+import json
+
+from textures import load_textures, registry
+
+# Описание клипов анимации: имя клипа -> кадры, шагов на кадр, зацикленность и нужен ли зеркальный вариант
+ANIMATIONS_INDEX = "images/animations.json"
+# Клипы первого экрана: рыцарь падает на пол (в начале он в воздухе) и стоит, слизни идут.
+# Кадры остальных клипов при ленивой загрузке догружаются в фоне
+STARTUP_CLIPS = ("knight/idle", "knight/roll", "slime/walk")
+
+
+"""
+Класс, представляющий клип анимации: последовательность кадров с постоянной длительностью кадра.
+Текстуры берутся из реестра при первом обращении к ним и дальше хранятся в клипе, спрайты получают только ссылки.
+
+Параметры:
+name (str): Имя клипа, например "knight/run".
+frames (list): Пути к файлам кадров.
+mirrored (bool): Нужен ли зеркальный вариант кадров.
+frame_ticks (int): Сколько шагов мира показывается каждый кадр.
+loop (bool): Начинать сначала после последнего кадра; иначе остаётся последний кадр.
+"""
+class Clip:
+    __slots__ = ("name", "frames", "mirrored", "frame_ticks", "loop", "_textures", "_mirrored_textures")
+
+    def __init__(self, name, frames, mirrored, frame_ticks, loop):
+        self.name = name
+        self.frames = frames
+        self.mirrored = mirrored
+        self.frame_ticks = frame_ticks
+        self.loop = loop
+        self._textures = None
+        self._mirrored_textures = None
+
+    @property
+    def textures(self):
+        if self._textures is None:
+            self._textures = registry.get_list(self.frames)
+        return self._textures
+
+    # Зеркальные текстуры кадров или None, если клип не зеркалится
+    @property
+    def mirrored_textures(self):
+        if self._mirrored_textures is None and self.mirrored:
+            self._mirrored_textures = registry.get_list(self.frames, True)
+        return self._mirrored_textures
+
+    # Длительность клипа в шагах
+    @property
+    def duration(self):
+        return self.frame_ticks * len(self.frames)
+
+    """
+    Функция номера кадра по времени, прошедшему с начала клипа (в шагах).
+    """
+    def frame(self, elapsed):
+        index = elapsed // self.frame_ticks
+        if self.loop:
+            return index % len(self.frames)
+        return min(index, len(self.frames) - 1)
+
+    def texture(self, index, mirrored=False):
+        return (self.mirrored_textures if mirrored else self.textures)[index]
+
+
+"""
+Класс, представляющий набор клипов, описанных в данных (ANIMATIONS_INDEX).
+"""
+class AnimationLibrary:
+    def __init__(self):
+        self.clips = {}
+        # Выполнена ли уже загрузка клипов игры (load_animations)
+        self.loaded = False
+
+    """
+    Функция загрузки клипов.
+    Читает только описание; кадры загружает load_animations.
+
+    Параметры:
+    index_path (str): Путь к описанию клипов.
+    """
+    def load(self, index_path=ANIMATIONS_INDEX):
+        with open(index_path, encoding="utf-8") as file:
+            index = json.load(file)
+        for name, entry in index.items():
+            self.clips[name] = Clip(name, entry["frames"], entry.get("mirrored", False), entry["ticks"], entry.get("loop", True))
+
+    def get(self, name):
+        return self.clips[name]
+
+
+# Общий набор клипов игры
+library = AnimationLibrary()
+
+
+"""
+Функция загрузки клипов игры вместе с текстурами (load_textures). Повторный вызов ничего не делает.
+Кадры клипов загружаются в реестр, зеркальные - только для клипов с "mirrored".
+
+Параметры:
+lazy (bool): Загрузить сразу только кадры STARTUP_CLIPS (и текстуры первого экрана), остальные - в фоновом потоке.
+"""
+def load_animations(lazy=False):
+    if library.loaded:
+        return library
+    load_textures(lazy)
+    library.load()
+    deferred = {False: [], True: []}
+    for clip in library.clips.values():
+        if lazy and clip.name not in STARTUP_CLIPS:
+            deferred[clip.mirrored] += clip.frames
+        else:
+            registry.preload(clip.frames, clip.mirrored)
+    for mirrored, frames in deferred.items():
+        if frames:
+            registry.preload_background(frames, mirrored, hit_boxes=False)
+    library.loaded = True
+    return library
+
+
+"""
+Класс, представляющий общие часы анимации.
+Спрайт не считает свои кадры сам: аниматор помнит, какой клип и с какого шага он играет,
+и заранее знает шаг, на котором у спрайта сменится кадр. За шаг (update) обходятся только
+спрайты, у которых кадр меняется именно сейчас, поэтому стоимость анимации не зависит
+от числа спрайтов, стоящих на одном кадре.
+Время анимации - шаги мира, поэтому после отката к снимку кадры восстанавливаются по шагу начала клипа.
+
+Параметры:
+tick (int): Текущий шаг.
+"""
+class Animator:
+    def __init__(self, tick=0):
+        self.tick = tick
+        # Спрайт -> проигрываемый клип [clip, mirrored, start]
+        self.tracks = {}
+        # Шаг -> спрайты, у которых на этом шаге меняется кадр, вместе с их записью в tracks.
+        # Запись заменяется при новом play, поэтому устаревшие заявки узнаются по несовпадению.
+        self.due = {}
+
+    def reset(self, tick):
+        self.tick = tick
+        self.tracks.clear()
+        self.due.clear()
+
+    """
+    Функция запуска клипа на спрайте.
+    Если спрайт уже играет этот клип, клип не начинается заново; смена стороны только меняет
+    текстуру текущего кадра.
+
+    Параметры:
+    sprite (arcade.Sprite): Спрайт.
+    clip (Clip): Клип.
+    mirrored (bool): Показывать зеркальные кадры.
+    start (int): Шаг начала клипа; по умолчанию текущий шаг, при восстановлении из снимка - записанный.
+    """
+    def play(self, sprite, clip, mirrored=False, start=None):
+        track = self.tracks.get(sprite)
+        if start is None:
+            if track is not None and track[0] is clip:
+                if track[1] != mirrored:
+                    track[1] = mirrored
+                    sprite.texture = clip.texture(clip.frame(self.tick - track[2]), mirrored)
+                return
+            start = self.tick
+        track = self.tracks[sprite] = [clip, mirrored, start]
+        elapsed = self.tick - start
+        sprite.texture = clip.texture(clip.frame(elapsed), mirrored)
+        self._schedule(sprite, track, elapsed)
+
+    def stop(self, sprite):
+        self.tracks.pop(sprite, None)
+
+    """
+    Функция шага начала клипа, который играет спрайт (None, если не играет).
+    """
+    def start_of(self, sprite):
+        track = self.tracks.get(sprite)
+        return None if track is None else track[2]
+
+    def clip_of(self, sprite):
+        track = self.tracks.get(sprite)
+        return None if track is None else track[0]
+
+    def _schedule(self, sprite, track, elapsed):
+        clip = track[0]
+        if not clip.loop and elapsed >= clip.duration - clip.frame_ticks:
+            # Незацикленный клип дошёл до последнего кадра
+            return
+        tick = self.tick + clip.frame_ticks - elapsed % clip.frame_ticks
+        self.due.setdefault(tick, []).append((sprite, track))
+
+    """
+    Функция продвижения часов анимации до шага tick.
+    Меняет кадры спрайтов, у которых они сменились, и планирует их следующую смену.
+    """
+    def update(self, tick):
+        self.tick = tick
+        due = self.due.pop(tick, None)
+        if due is None:
+            return
+        tracks = self.tracks
+        for sprite, track in due:
+            if tracks.get(sprite) is not track:
+                continue
+            clip, mirrored, start = track
+            elapsed = tick - start
+            sprite.texture = clip.texture(clip.frame(elapsed), mirrored)
+            self._schedule(sprite, track, elapsed)
+
+    def stats(self):
+        return {"playing": len(self.tracks), "pending": sum(len(due) for due in self.due.values())}
@@ -0,0 +1,758 @@
+import argparse
+import multiprocessing
+import random
+import time
+from collections import deque
+
+import numpy as np
+
+from chunks import CHUNK_WIDTH, CHUNKS_AHEAD, CHUNKS_BEHIND, chunk_seed, max_loaded_chunks
+from physics import GROUND_EPSILON
+from rng import GameRandom
+from spawner import SPAWN_BURST, SPAWN_MAX_LIVE, SPAWN_QUEUE_SIZE, SPAWN_RATE
+from textures import ENEMY_TEXTURES, KNIGHT_TEXTURES, PROJECTILE_TEXTURES, hit_box_bounds, registry
+from world import (
+    ACTION_DOWN, ACTION_FIRE, ACTION_JUMP, ACTION_LEFT, ACTION_RIGHT, CHUNK_ENEMIES, DORMANT_MARGIN, DORMANT_UPDATE_TICKS,
+    ENEMY_POOL_SIZE, ENEMY_SCALING, ENEMY_SPAWN_INTERVAL, ENEMY_SPEED, FALL_THRU_SPEED, GRAVITY, MAX_CHUNK_SLABS,
+    PLAYER_JUMP_SPEED, PLAYER_MAX_HEALTH, PLAYER_MOVEMENT_SPEED, PLAYER_SCALING, PLAYER_START_X, PLAYER_START_Y,
+    PROJECTILE_POOL_SIZE, PROJECTILE_SCALING, PROJECTILE_SPEED, SCREEN_HEIGHT, SCREEN_WIDTH, START_ENEMIES, TICK_DURATION,
+    TRIPLE_SHOOT_DURATION, TRIPLE_SHOOT_KILLS, VIEWPORT_MARGIN, World, spawn_requests,
+)
+
+# Действие агента - набор битов удерживаемых клавиш
+BUTTON_LEFT = 1
+BUTTON_RIGHT = 2
+BUTTON_JUMP = 4
+BUTTON_FIRE = 8
+BUTTON_DOWN = 16
+NUM_ACTIONS = 32
+# Клавиши, которые удерживаются: нажатие при появлении бита, отпускание при исчезновении
+HELD_BUTTONS = ((BUTTON_LEFT, ACTION_LEFT), (BUTTON_RIGHT, ACTION_RIGHT), (BUTTON_DOWN, ACTION_DOWN))
+HELD_MASK = BUTTON_LEFT | BUTTON_RIGHT | BUTTON_DOWN
+# Клавиши, которые срабатывают на каждом шаге, пока бит установлен
+PULSE_BUTTONS = ((BUTTON_JUMP, ACTION_JUMP), (BUTTON_FIRE, ACTION_FIRE))
+
+# Сколько ближайших врагов попадает в наблюдение
+OBS_ENEMIES = 4
+# Игрок: x на экране, y, скорости, стоит ли на платформе, здоровье, тройной выстрел;
+# затем для каждого врага: есть ли он, смещение по x и по y относительно игрока
+OBS_SIZE = 7 + 3 * OBS_ENEMIES
+KILL_REWARD = 1.0
+HEALTH_PENALTY = 1.0
+# Ограничение длины эпизода в шагах агента
+MAX_EPISODE_STEPS = 10000
+
+# Загруженные чанки мира занимают ячейки по номеру чанка по модулю CHUNK_SLOTS;
+# подряд их загружено не больше CHUNK_SLOTS, поэтому ячейки не пересекаются
+CHUNK_SLOTS = max_loaded_chunks(SCREEN_WIDTH)
+
+
+"""
+Класс, представляющий однотипные объекты всех K миров в общих массивах (K, ёмкость).
+То же, что soa.EntityArrays, но по строке на мир: новый объект занимает наименьшую свободную ячейку
+своего мира, а при заполнении (recycle) - ячейку самого старого объекта.
+Поэтому живые объекты собраны в первых столбцах, и шаг работает только со столбцами до width.
+
+Параметры:
+num_envs (int): Количество миров K.
+capacity (int): Количество ячеек в каждом мире.
+bounds (tuple): Границы хитбокса относительно центра (min_x, max_x, min_y, max_y).
+recycle (bool): При заполнении занимать ячейку самого старого объекта вместо отказа.
+"""
+class BatchEntityArrays:
+    def __init__(self, num_envs, capacity, bounds, recycle):
+        shape = (num_envs, capacity)
+        self.min_x, self.max_x, self.min_y, self.max_y = bounds
+        self.recycle = recycle
+        self.x = np.zeros(shape)
+        self.y = np.zeros(shape)
+        self.change_x = np.zeros(shape)
+        self.change_y = np.zeros(shape)
+        # Сколько шагов объект спит за экраном (0 - на экране)
+        self.dormant = np.zeros(shape, dtype=np.int64)
+        # Порядковый номер появления в своём мире, чтобы находить самый старый объект
+        self.born = np.zeros(shape, dtype=np.int64)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.spawned = np.zeros(num_envs, dtype=np.int64)
+        # Столбцы правее width пусты во всех мирах
+        self.width = 0
+
+    def clear(self, env):
+        self.alive[env] = False
+        self.spawned[env] = 0
+
+    """
+    Функция появления объектов: по одному в каждом из миров envs.
+    Возвращает маску миров, в которых объект появился.
+
+    Параметры:
+    envs (numpy.ndarray): Номера миров.
+    x, y, change_x, change_y: Значения для всех миров сразу или по одному на мир.
+    """
+    def spawn(self, envs, x, y, change_x, change_y):
+        if not len(envs):
+            return np.zeros(0, dtype=bool)
+        alive = self.alive[envs]
+        has_free = ~alive.all(axis=1)
+        slots = np.argmin(alive, axis=1)
+        if self.recycle:
+            slots = np.where(has_free, slots, np.argmin(self.born[envs], axis=1))
+            placed = np.ones(len(envs), dtype=bool)
+        else:
+            placed = has_free
+        envs = envs[placed]
+        slots = slots[placed]
+        for name, values in (("x", x), ("y", y), ("change_x", change_x), ("change_y", change_y)):
+            getattr(self, name)[envs, slots] = values[placed] if np.ndim(values) else values
+        self.dormant[envs, slots] = 0
+        self.born[envs, slots] = self.spawned[envs]
+        self.alive[envs, slots] = True
+        self.spawned[envs] += 1
+        if len(slots):
+            self.width = max(self.width, int(slots.max()) + 1)
+        return placed
+
+    # Сужение width до последнего столбца, в котором хоть в одном мире есть живой объект
+    def trim(self):
+        used = np.flatnonzero(self.alive[:, :self.width].any(axis=0))
+        self.width = int(used[-1]) + 1 if len(used) else 0
+
+    """
+    Функция границ хитбоксов в столбцах до width: массивы left, right, bottom, top формы (K, width).
+    """
+    def boxes(self):
+        x = self.x[:, :self.width]
+        y = self.y[:, :self.width]
+        return x + self.min_x, x + self.max_x, y + self.min_y, y + self.max_y
+
+
+"""
+Класс, представляющий K независимых миров в общих массивах NumPy.
+Правила те же, что у World с врагами и снарядами в массивах (BACKEND_NUMPY), но состояние всех миров
+лежит рядом: игрок - массивы (K,), враги и снаряды - BatchEntityArrays, платформы загруженных чанков -
+массивы (K, CHUNK_SLOTS * MAX_CHUNK_SLABS). Шаг мира - один набор векторных операций сразу над всеми K.
+На Python по одному миру выполняются только редкие события: подгрузка чанка при переходе через его границу,
+заявки на появление врагов и начало нового мира. Анимации, отрисовки и профилировщика нет.
+При одинаковых зерне и вводе мир проходит ту же игру, что и World(seed, BACKEND_NUMPY).
+
+Параметры:
+num_envs (int): Количество миров K.
+enemy_capacity (int): Максимум врагов одновременно в каждом мире.
+projectile_capacity (int): Максимум снарядов одновременно в каждом мире.
+spawn_max_live (int): Максимум врагов одновременно (см. SpawnDirector).
+spawn_rate (float): Средний бюджет появлений врагов в секунду.
+"""
+class WorldArrays:
+    def __init__(self, num_envs, enemy_capacity=ENEMY_POOL_SIZE, projectile_capacity=PROJECTILE_POOL_SIZE,
+                 spawn_max_live=SPAWN_MAX_LIVE, spawn_rate=SPAWN_RATE):
+        self.num_envs = num_envs
+        self.spawn_max_live = spawn_max_live
+        self.spawn_rate = spawn_rate
+        # Рельеф чанка строится той же функцией, что и у мира; сам мир для этого не настраивается (как в levels.py)
+        self.terrain = World(0)
+        self.player_min_x, self.player_max_x, self.player_min_y, self.player_max_y = hit_box_bounds(
+            registry.get(KNIGHT_TEXTURES[0]), PLAYER_SCALING)
+        self.enemies = BatchEntityArrays(
+            num_envs, enemy_capacity, hit_box_bounds(registry.get(ENEMY_TEXTURES[0]), ENEMY_SCALING), recycle=False)
+        self.projectiles = BatchEntityArrays(
+            num_envs, projectile_capacity, hit_box_bounds(registry.get(PROJECTILE_TEXTURES[0]), PROJECTILE_SCALING), recycle=True)
+
+        self.seeds = [None] * num_envs
+        self.tick = np.zeros(num_envs, dtype=np.int64)
+        self.kills = np.zeros(num_envs, dtype=np.int64)
+        self.health = np.zeros(num_envs, dtype=np.int64)
+        self.game_over = np.zeros(num_envs, dtype=bool)
+        self.fall_through = np.zeros(num_envs, dtype=bool)
+        self.view_left = np.zeros(num_envs)
+        # Игрок
+        self.x = np.zeros(num_envs)
+        self.y = np.zeros(num_envs)
+        self.change_x = np.zeros(num_envs)
+        self.change_y = np.zeros(num_envs)
+        self.on_platform = np.zeros(num_envs, dtype=bool)
+        self.facing_right = np.zeros(num_envs, dtype=bool)
+        self.triple_shoot = np.zeros(num_envs, dtype=bool)
+        # Игровые часы и два отложенных события на них: конец тройного выстрела и следующее появление врага
+        self.clock_time = np.zeros(num_envs)
+        self.triple_shoot_end = np.full(num_envs, np.inf)
+        self.next_spawn_time = np.full(num_envs, np.inf)
+
+        # Платформы: прямоугольники столкновений запечённых участков загруженных чанков
+        shape = (num_envs, CHUNK_SLOTS * MAX_CHUNK_SLABS)
+        self.platform_left = np.zeros(shape)
+        self.platform_right = np.zeros(shape)
+        self.platform_top = np.zeros(shape)
+        self.platform_floor = np.zeros(shape, dtype=bool)
+        self.platform_used = np.zeros(shape, dtype=bool)
+        # Левая граница чанка в каждой ячейке (-1 - пусто), загруженный диапазон чанков и граница созданного мира
+        self.chunk_x = np.full((num_envs, CHUNK_SLOTS), -1, dtype=np.int64)
+        self.chunk_first = np.zeros(num_envs, dtype=np.int64)
+        self.chunk_last = np.full(num_envs, -1, dtype=np.int64)
+        self.generated_x = np.zeros(num_envs, dtype=np.int64)
+
+        # Распорядители появления врагов (SpawnDirector): бюджет в массиве, очереди заявок и случайные потоки по мирам
+        self.spawn_tokens = np.zeros(num_envs)
+        self.spawn_queued = np.zeros(num_envs, dtype=np.int64)
+        self.spawn_queues = [deque() for _ in range(num_envs)]
+        self.spawn_randoms = [None] * num_envs
+        self.terrain_seeds = [None] * num_envs
+
+    """
+    Функция начала нового мира env с зерном seed; повторяет World.setup.
+    """
+    def reset(self, env, seed):
+        game_random = GameRandom(seed)
+        self.seeds[env] = game_random.seed
+        self.terrain_seeds[env] = game_random.terrain_seed
+        self.spawn_randoms[env] = game_random.spawn
+        self.tick[env] = 0
+        self.kills[env] = 0
+        self.health[env] = PLAYER_MAX_HEALTH
+        self.game_over[env] = False
+        self.fall_through[env] = False
+        self.view_left[env] = 0
+        self.x[env] = PLAYER_START_X
+        self.y[env] = PLAYER_START_Y
+        self.change_x[env] = 0
+        self.change_y[env] = 0
+        self.on_platform[env] = False
+        self.facing_right[env] = True
+        self.triple_shoot[env] = False
+        self.clock_time[env] = 0.0
+        self.triple_shoot_end[env] = np.inf
+        self.enemies.clear(env)
+        self.projectiles.clear(env)
+        self.platform_used[env] = False
+        self.chunk_x[env] = -1
+        self.chunk_first[env] = 0
+        self.chunk_last[env] = -1
+        self.generated_x[env] = 0
+        self.spawn_tokens[env] = float(SPAWN_BURST)
+        self.spawn_queues[env].clear()
+        self.spawn_queued[env] = 0
+        first, last = self.chunk_range(self.view_left[env:env + 1])
+        self.stream(env, int(first[0]), int(last[0]))
+        self.spawn_entities(env, START_ENEMIES)
+        self.schedule_enemy_spawn(env)
+
+    """
+    Функция диапазона чанков, которые держатся загруженными (ChunkManager.chunk_range):
+    номера первого и последнего чанка для каждого мира.
+    """
+    def chunk_range(self, view_left):
+        first = np.maximum(0, view_left // CHUNK_WIDTH - CHUNKS_BEHIND).astype(np.int64)
+        last = ((view_left + SCREEN_WIDTH) // CHUNK_WIDTH).astype(np.int64) + CHUNKS_AHEAD
+        return first, last
+
+    """
+    Функция подгрузки чанков мира env с first по last и выгрузки остальных.
+    Чанки генерируются из зерна чанка, как у ChunkManager, и сразу целиком попадают в массивы платформ.
+    Возвращает количество чанков, созданных впервые.
+    """
+    def stream(self, env, first, last):
+        new_chunks = 0
+        for chunk in range(first, last + 1):
+            slot = chunk % CHUNK_SLOTS
+            chunk_x = chunk * CHUNK_WIDTH
+            if self.chunk_x[env, slot] == chunk_x:
+                continue
+            slabs = self.terrain.generate_chunk(chunk_x, random.Random(chunk_seed(self.terrain_seeds[env], chunk_x)))
+            if len(slabs) > MAX_CHUNK_SLABS:
+                raise RuntimeError(f"В чанке {len(slabs)} участков, места хватает на {MAX_CHUNK_SLABS}")
+            cells = slice(slot * MAX_CHUNK_SLABS, slot * MAX_CHUNK_SLABS + len(slabs))
+            self.platform_used[env, slot * MAX_CHUNK_SLABS:(slot + 1) * MAX_CHUNK_SLABS] = False
+            self.platform_left[env, cells] = [slab.left for slab in slabs]
+            self.platform_right[env, cells] = [slab.right for slab in slabs]
+            self.platform_top[env, cells] = [slab.top for slab in slabs]
+            self.platform_floor[env, cells] = [slab.is_floor for slab in slabs]
+            self.platform_used[env, cells] = True
+            self.chunk_x[env, slot] = chunk_x
+            if chunk_x >= self.generated_x[env]:
+                self.generated_x[env] = chunk_x + CHUNK_WIDTH
+                new_chunks += 1
+        for slot in range(CHUNK_SLOTS):
+            chunk = self.chunk_x[env, slot] // CHUNK_WIDTH
+            if self.chunk_x[env, slot] >= 0 and not first <= chunk <= last:
+                self.platform_used[env, slot * MAX_CHUNK_SLABS:(slot + 1) * MAX_CHUNK_SLABS] = False
+                self.chunk_x[env, slot] = -1
+        self.chunk_first[env] = first
+        self.chunk_last[env] = last
+        return new_chunks
+
+    # Появление врагов мира env: как World.spawn_entities, заявки уходят распорядителю
+    def spawn_entities(self, env, num_enemies):
+        for request in spawn_requests(self.spawn_randoms[env], num_enemies):
+            self.request_spawn(env, request)
+
+    def schedule_enemy_spawn(self, env):
+        self.next_spawn_time[env] = self.clock_time[env] + self.spawn_randoms[env].expovariate(1 / ENEMY_SPAWN_INTERVAL)
+
+    def can_spawn(self, env):
+        return self.spawn_tokens[env] >= 1 and np.count_nonzero(self.enemies.alive[env]) < self.spawn_max_live
+
+    def grant_spawn(self, env, request):
+        self.spawn_tokens[env] -= 1
+        side, y = request
+        if side == "left":
+            x, direction = self.view_left[env], 1
+        else:
+            x, direction = self.view_left[env] + SCREEN_WIDTH, -1
+        self.enemies.spawn(np.array([env]), x, y, ENEMY_SPEED * direction, 0)
+
+    # Заявка на появление врага: как SpawnDirector.request
+    def request_spawn(self, env, request):
+        queue = self.spawn_queues[env]
+        if not queue and self.can_spawn(env):
+            self.grant_spawn(env, request)
+            return
+        queue.append(request)
+        if len(queue) > SPAWN_QUEUE_SIZE:
+            queue.popleft()
+        self.spawn_queued[env] = len(queue)
+
+    """
+    Функция обработки нажатия в мирах, отмеченных маской; повторяет World.press.
+
+    Параметры:
+    action (int): Действие игрока (ACTION_*).
+    mask (numpy.ndarray): Миры, в которых нажата клавиша.
+    """
+    def press(self, action, mask):
+        mask = mask & ~self.game_over
+        if action == ACTION_JUMP:
+            jump = mask & self.on_platform
+            self.change_y[jump] = PLAYER_JUMP_SPEED
+            self.on_platform[jump] = False
+        elif action == ACTION_LEFT:
+            self.change_x[mask] = -PLAYER_MOVEMENT_SPEED
+            self.facing_right[mask] = False
+        elif action == ACTION_RIGHT:
+            self.change_x[mask] = PLAYER_MOVEMENT_SPEED
+            self.facing_right[mask] = True
+        elif action == ACTION_DOWN:
+            # С пола спрыгнуть нельзя, только с платформы
+            mask = mask & ~self.fall_through & self.on_platform
+            bottom = self.y + self.player_min_y
+            top, floor = self.landing(self.x + self.player_min_x, self.x + self.player_max_x, bottom, bottom,
+                                      np.zeros(self.num_envs, dtype=bool))
+            drop = mask & np.isfinite(top) & ~floor
+            self.fall_through[drop] = True
+            self.change_y[drop] = FALL_THRU_SPEED
+        elif action == ACTION_FIRE:
+            envs = np.flatnonzero(mask)
+            x = self.x[envs]
+            y = self.y[envs]
+            direction = np.where(self.facing_right[envs], 1, -1)
+            self.projectiles.spawn(envs, x, y, PROJECTILE_SPEED * direction, 0)
+            # Тройной выстрел: влево, вверх и вправо
+            triple = self.triple_shoot[envs]
+            envs, x, y = envs[triple], x[triple], y[triple]
+            self.projectiles.spawn(envs, x, y, PROJECTILE_SPEED * -1, 0)
+            self.projectiles.spawn(envs, x, y, 0, PROJECTILE_SPEED)
+            self.projectiles.spawn(envs, x, y, PROJECTILE_SPEED, 0)
+
+    # Отпускание клавиши в мирах, отмеченных маской; повторяет World.release
+    def release(self, action, mask):
+        mask = mask & ~self.game_over
+        if action == ACTION_LEFT or action == ACTION_RIGHT:
+            self.change_x[mask] = 0
+        elif action == ACTION_DOWN:
+            self.fall_through[mask] = False
+
+    """
+    Функция поиска платформы приземления для всех миров (PlatformPhysics._landing).
+    Возвращает верх самой высокой подходящей платформы (-inf, если её нет) и является ли она полом.
+    """
+    def landing(self, left, right, bottom, previous_bottom, fall_through):
+        top = self.platform_top
+        candidates = (self.platform_used & (self.platform_left < right[:, None]) & (left[:, None] < self.platform_right)
+                      & (bottom[:, None] - GROUND_EPSILON <= top) & (top <= previous_bottom[:, None] + GROUND_EPSILON)
+                      & (self.platform_floor | ~fall_through[:, None]))
+        tops = np.where(candidates, top, -np.inf)
+        best = tops.argmax(axis=1)
+        rows = np.arange(self.num_envs)
+        return tops[rows, best], self.platform_floor[rows, best]
+
+    """
+    Функция одного шага всех миров; повторяет World.step после применения ввода.
+    Закончившиеся миры не меняются.
+    """
+    def step(self):
+        self.tick += 1
+        active = ~self.game_over
+        self.clock_time[active] += TICK_DURATION
+        # Срабатывание отложенных событий: конец тройного выстрела, появление врагов
+        ended = active & self.triple_shoot & (self.clock_time >= self.triple_shoot_end)
+        self.triple_shoot[ended] = False
+        self.triple_shoot_end[ended] = np.inf
+        for env in np.flatnonzero(active & (self.clock_time >= self.next_spawn_time)).tolist():
+            while self.next_spawn_time[env] <= self.clock_time[env]:
+                self.spawn_entities(env, 1)
+                self.schedule_enemy_spawn(env)
+
+        view_left = self.view_left.copy()
+        self.move_players(active)
+        self.update_projectiles(active, view_left)
+        self.update_enemies(active, view_left)
+
+        kills = self.hit_enemies(active)
+        previous_kills = self.kills
+        self.kills = previous_kills + kills
+        # Стрельба в три стороны при убийстве каждого TRIPLE_SHOOT_KILLS-го врага
+        triple = self.kills // TRIPLE_SHOOT_KILLS != previous_kills // TRIPLE_SHOOT_KILLS
+        self.triple_shoot[triple] = True
+        self.triple_shoot_end[triple] = self.clock_time[triple] + TRIPLE_SHOOT_DURATION
+
+        hits = self.hit_player(active)
+        self.health -= hits
+        self.game_over |= (hits > 0) & (self.health <= 0)
+        self.projectiles.trim()
+        self.enemies.trim()
+
+        self.scroll_viewport(active)
+        self.update_spawners(active)
+
+    # Движение игроков вместе с приземлением на платформы (PlatformPhysics.move)
+    def move_players(self, active):
+        previous_bottom = self.y + self.player_min_y
+        x = np.where(active, self.x + self.change_x, self.x)
+        y = np.where(active, self.y + self.change_y, self.y)
+        top, floor = self.landing(x + self.player_min_x, x + self.player_max_x, y + self.player_min_y, previous_bottom,
+                                  self.fall_through)
+        landed = active & (self.change_y <= 0) & np.isfinite(top)
+        falling = active & ~landed
+        # Установка нижнего края делается так же, как у спрайта arcade: через разницу с текущим краем
+        y = np.where(landed, y - ((y + self.player_min_y) - top), y)
+        self.change_y = np.where(landed, 0, np.where(falling, self.change_y - GRAVITY, self.change_y))
+        self.on_platform = np.where(active, landed, self.on_platform)
+        x = np.where(x + self.player_min_x < 0, x + (0 - (x + self.player_min_x)), x)
+        below = y + self.player_min_y < 0
+        self.y = np.where(below, y - (y + self.player_min_y), y)
+        self.change_y[below] = 0
+        self.x = x
+
+    def update_projectiles(self, active, view_left):
+        projectiles = self.projectiles
+        width = projectiles.width
+        x = projectiles.x[:, :width]
+        y = projectiles.y[:, :width]
+        alive = projectiles.alive[:, :width]
+        moving = alive & active[:, None]
+        np.add(x, projectiles.change_x[:, :width], out=x, where=moving)
+        np.add(y, projectiles.change_y[:, :width], out=y, where=moving)
+        view_left = view_left[:, None]
+        outside = ((x + projectiles.max_x < view_left) | (x + projectiles.min_x > view_left + SCREEN_WIDTH)
+                   | (y + projectiles.max_y < 0) | (y + projectiles.min_y > SCREEN_HEIGHT))
+        alive &= ~(moving & outside)
+
+    # Враги на экране двигаются каждый шаг, за экраном спят (ArrayEntities.update_enemies)
+    def update_enemies(self, active, view_left):
+        enemies = self.enemies
+        width = enemies.width
+        x = enemies.x[:, :width]
+        change_x = enemies.change_x[:, :width]
+        sleeping = enemies.dormant[:, :width]
+        alive = enemies.alive[:, :width]
+        view_left = view_left[:, None]
+        view_right = view_left + SCREEN_WIDTH
+        outside = (x + enemies.max_x < view_left) | (x + enemies.min_x > view_right)
+        moving = alive & active[:, None]
+        dormant = moving & outside
+        awake = moving & ~outside
+        sleeping[awake] = 0
+        sleeping[dormant] += 1
+        wake_up = dormant & (sleeping % DORMANT_UPDATE_TICKS == 0)
+        np.add(x, change_x * DORMANT_UPDATE_TICKS, out=x, where=wake_up)
+        gone = wake_up & ((x + enemies.max_x < view_left - DORMANT_MARGIN) | (x + enemies.min_x > view_right + DORMANT_MARGIN))
+        alive &= ~gone
+        np.add(x, change_x, out=x, where=awake)
+
+    """
+    Функция столкновений снарядов с врагами во всех мирах (ArrayEntities.hit_enemies).
+    Сравниваются только столбцы до width, в которых и лежат все живые объекты.
+    Возвращает количество сбитых врагов по мирам.
+    """
+    def hit_enemies(self, active):
+        projectiles = self.projectiles
+        enemies = self.enemies
+        kills = np.zeros(self.num_envs, dtype=np.int64)
+        if not projectiles.width or not enemies.width:
+            return kills
+        projectile_alive = projectiles.alive[:, :projectiles.width] & active[:, None]
+        enemy_awake = enemies.alive[:, :enemies.width] & (enemies.dormant[:, :enemies.width] == 0) & active[:, None]
+        # Хитбоксы снарядов растянуты на путь за шаг, как в physics.swept_box
+        p_left, p_right, p_bottom, p_top = projectiles.boxes()
+        change_x = projectiles.change_x[:, :projectiles.width]
+        change_y = projectiles.change_y[:, :projectiles.width]
+        p_left = p_left - np.maximum(change_x, 0)
+        p_right = p_right - np.minimum(change_x, 0)
+        p_bottom = p_bottom - np.maximum(change_y, 0)
+        p_top = p_top - np.minimum(change_y, 0)
+        e_left, e_right, e_bottom, e_top = enemies.boxes()
+        hits = ((p_left[:, :, None] < e_right[:, None, :]) & (e_left[:, None, :] < p_right[:, :, None])
+                & (p_bottom[:, :, None] < e_top[:, None, :]) & (e_bottom[:, None, :] < p_top[:, :, None])
+                & projectile_alive[:, :, None] & enemy_awake[:, None, :])
+        enemy_hit = hits.any(axis=1)
+        envs, enemy_slots = np.nonzero(enemy_hit)
+        if not len(envs):
+            return kills
+        # Враг достаётся первому задевшему его снаряду, снаряд исчезает, если сбил хотя бы одного
+        projectiles.alive[envs, hits.argmax(axis=1)[envs, enemy_slots]] = False
+        enemies.alive[envs, enemy_slots] = False
+        return enemy_hit.sum(axis=1)
+
+    # Столкновения игроков с бодрствующими врагами; задевшие игрока враги исчезают
+    def hit_player(self, active):
+        enemies = self.enemies
+        width = enemies.width
+        e_left, e_right, e_bottom, e_top = enemies.boxes()
+        left = self.x + self.player_min_x
+        right = self.x + self.player_max_x
+        bottom = self.y + self.player_min_y
+        top = self.y + self.player_max_y
+        alive = enemies.alive[:, :width]
+        hit = (alive & (enemies.dormant[:, :width] == 0) & active[:, None]
+               & (left[:, None] < e_right) & (e_left < right[:, None]) & (bottom[:, None] < e_top) & (e_bottom < top[:, None]))
+        alive &= ~hit
+        return hit.sum(axis=1)
+
+    """
+    Функция прокрутки (World.scroll_viewport).
+    Миры, экран которых перешёл границу чанка, подгружают чанки по одному; на новой территории появляются враги.
+    """
+    def scroll_viewport(self, active):
+        view_left = self.view_left
+        left_boundary = view_left + VIEWPORT_MARGIN
+        player_left = self.x + self.player_min_x
+        move_left = active & (player_left < left_boundary)
+        view_left = np.where(move_left, view_left - (left_boundary - player_left), view_left)
+        right_boundary = view_left + SCREEN_WIDTH - VIEWPORT_MARGIN
+        player_right = self.x + self.player_max_x
+        move_right = active & (player_right > right_boundary)
+        view_left = np.where(move_right, view_left + (player_right - right_boundary), view_left)
+        changed = move_left | move_right
+        self.view_left = np.where(changed, np.trunc(view_left), self.view_left)
+
+        first, last = self.chunk_range(self.view_left)
+        for env in np.flatnonzero(changed & ((first != self.chunk_first) | (last != self.chunk_last))).tolist():
+            new_chunks = self.stream(env, int(first[env]), int(last[env]))
+            for _ in range(new_chunks):
+                self.spawn_entities(env, CHUNK_ENEMIES)
+
+    # Бюджет появлений копится по игровому времени, отложенные заявки выполняются, пока он есть (SpawnDirector.update)
+    def update_spawners(self, active):
+        tokens = np.minimum(SPAWN_BURST, self.spawn_tokens + self.spawn_rate * TICK_DURATION)
+        self.spawn_tokens = np.where(active, tokens, self.spawn_tokens)
+        for env in np.flatnonzero(active & (self.spawn_queued > 0) & (self.spawn_tokens >= 1)).tolist():
+            queue = self.spawn_queues[env]
+            while queue and self.can_spawn(env):
+                self.grant_spawn(env, queue.popleft())
+            self.spawn_queued[env] = len(queue)
+
+    """
+    Функция заполнения наблюдений всех миров.
+
+    Параметры:
+    out (numpy.ndarray): Массив наблюдений (K, OBS_SIZE).
+    """
+    def observe(self, out):
+        out[:, 0] = (self.x - self.view_left) / SCREEN_WIDTH
+        out[:, 1] = self.y / SCREEN_HEIGHT
+        out[:, 2] = self.change_x / PLAYER_MOVEMENT_SPEED
+        out[:, 3] = self.change_y / PLAYER_JUMP_SPEED
+        out[:, 4] = self.on_platform
+        out[:, 5] = self.health / PLAYER_MAX_HEALTH
+        out[:, 6] = self.triple_shoot
+        out[:, 7:] = 0
+        enemies = self.enemies
+        alive = enemies.alive[:, :enemies.width]
+        offset_x = enemies.x[:, :enemies.width] - self.x[:, None]
+        offset_y = enemies.y[:, :enemies.width] - self.y[:, None]
+        distance = np.where(alive, offset_x ** 2 + offset_y ** 2, np.inf)
+        nearest = np.argsort(distance, axis=1, kind="stable")[:, :OBS_ENEMIES]
+        rows = np.arange(self.num_envs)[:, None]
+        present = alive[rows, nearest]
+        end = 7 + 3 * nearest.shape[1]
+        out[:, 7:end:3] = present
+        out[:, 8:end:3] = np.where(present, offset_x[rows, nearest] / SCREEN_WIDTH, 0)
+        out[:, 9:end:3] = np.where(present, offset_y[rows, nearest] / SCREEN_HEIGHT, 0)
+
+
+"""
+Класс, представляющий пакет независимых копий игры для обучения с подкреплением.
+Все K миров шагают одновременно: step принимает по действию на мир и возвращает
+наблюдения (K, OBS_SIZE), награды (K,) и флаги конца эпизода (K,).
+Награда за шаг - KILL_REWARD за каждого убитого врага минус HEALTH_PENALTY за каждое потерянное здоровье.
+Закончившийся мир сразу перезапускается со следующим зерном, и в наблюдении уже его начало.
+Состояние всех миров лежит в общих массивах (WorldArrays), и каждый шаг - векторные операции сразу над всеми K.
+
+Параметры:
+num_envs (int): Количество миров K.
+seed (int): Зерно первого мира; мир i в эпизоде e получает seed + i + e * seed_stride.
+frame_skip (int): Сколько тиков мира длится один шаг агента (действие повторяется).
+max_steps (int): Ограничение длины эпизода в шагах агента.
+index_offset (int): Номер первого мира пакета среди всех (для разбиения по процессам).
+seed_stride (int): Шаг зерна между эпизодами; по умолчанию num_envs.
+"""
+class BatchEnv:
+    def __init__(self, num_envs, seed=0, frame_skip=1, max_steps=MAX_EPISODE_STEPS, index_offset=0, seed_stride=None):
+        self.num_envs = num_envs
+        self.seed = seed
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.index_offset = index_offset
+        self.seed_stride = num_envs if seed_stride is None else seed_stride
+        self.worlds = WorldArrays(num_envs)
+        self.episodes = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.held = np.zeros(num_envs, dtype=np.int64)
+        self.kills = np.zeros(num_envs, dtype=np.int64)
+        self.health = np.zeros(num_envs, dtype=np.int64)
+        self.observations = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+
+    def _reset_env(self, i):
+        self.worlds.reset(i, self.seed + self.index_offset + i + int(self.episodes[i]) * self.seed_stride)
+        self.steps[i] = 0
+        self.held[i] = 0
+        self.kills[i] = 0
+        self.health[i] = self.worlds.health[i]
+
+    def reset(self):
+        self.episodes[:] = 0
+        for i in range(self.num_envs):
+            self._reset_env(i)
+        self.worlds.observe(self.observations)
+        return self.observations.copy()
+
+    """
+    Функция шага всех миров.
+    Удерживаемые клавиши нажимаются при появлении бита и отпускаются при исчезновении,
+    прыжок и выстрел нажимаются на каждом тике, пока бит установлен.
+
+    Параметры:
+    actions (sequence): Действие для каждого мира - число от 0 до NUM_ACTIONS - 1 (биты BUTTON_*).
+    """
+    def step(self, actions):
+        worlds = self.worlds
+        actions = np.asarray(actions, dtype=np.int64)
+        held = self.held
+        for button, game_action in HELD_BUTTONS:
+            worlds.release(game_action, (held & button != 0) & (actions & button == 0))
+        for button, game_action in HELD_BUTTONS:
+            worlds.press(game_action, (actions & button != 0) & (held & button == 0))
+        self.held = actions & HELD_MASK
+        pulses = [(game_action, actions & button != 0) for button, game_action in PULSE_BUTTONS]
+        for tick in range(self.frame_skip):
+            for game_action, mask in pulses:
+                worlds.press(game_action, mask)
+            worlds.step()
+
+        health = worlds.health
+        rewards = ((worlds.kills - self.kills) * KILL_REWARD - np.maximum(0, self.health - health) * HEALTH_PENALTY).astype(np.float32)
+        self.kills = worlds.kills.copy()
+        self.health = health.copy()
+        self.steps += 1
+        dones = worlds.game_over | (self.steps >= self.max_steps)
+        for i in np.flatnonzero(dones).tolist():
+            self.episodes[i] += 1
+            self._reset_env(i)
+        worlds.observe(self.observations)
+        return self.observations.copy(), rewards, dones
+
+    def close(self):
+        self.worlds = None
+
+
+def _worker(connection, options):
+    env = BatchEnv(**options)
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send(env.reset())
+        elif command == "step":
+            connection.send(env.step(data))
+        else:
+            env.close()
+            connection.close()
+            return
+
+
+"""
+Класс, представляющий пакет миров, разбитый по процессам.
+Каждый процесс ведёт свой BatchEnv с частью миров; шаг рассылает действия всем процессам
+и собирает результаты в те же массивы, что и у BatchEnv. Зёрна миров те же, что у BatchEnv
+с теми же параметрами, поэтому результаты совпадают.
+
+Параметры:
+num_envs (int): Общее количество миров K.
+processes (int): Количество процессов; по умолчанию по числу ядер.
+options (dict): Остальные параметры BatchEnv.
+"""
+class ProcessBatchEnv:
+    def __init__(self, num_envs, processes=None, seed=0, **options):
+        processes = min(num_envs, processes or multiprocessing.cpu_count())
+        self.num_envs = num_envs
+        self.bounds = [num_envs * i // processes for i in range(processes + 1)]
+        self.connections = []
+        self.processes = []
+        for start, end in zip(self.bounds, self.bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            worker_options = dict(options, num_envs=end - start, seed=seed, index_offset=start, seed_stride=num_envs)
+            process = multiprocessing.Process(target=_worker, args=(child, worker_options), daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def reset(self):
+        for connection in self.connections:
+            connection.send(("reset", None))
+        return np.concatenate([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for connection, start, end in zip(self.connections, self.bounds, self.bounds[1:]):
+            connection.send(("step", actions[start:end]))
+        results = [connection.recv() for connection in self.connections]
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакет миров для обучения с подкреплением: замер скорости на случайных действиях")
+    parser.add_argument("--envs", type=int, default=256)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frame-skip", type=int, default=1)
+    parser.add_argument("--processes", type=int, default=0, help="0 - всё в одном процессе")
+    args = parser.parse_args()
+
+    options = {"seed": args.seed, "frame_skip": args.frame_skip}
+    if args.processes:
+        env = ProcessBatchEnv(args.envs, args.processes, **options)
+    else:
+        env = BatchEnv(args.envs, **options)
+    rng = np.random.default_rng(args.seed)
+    env.reset()
+    total_reward = 0.0
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        observations, rewards, dones = env.step(rng.integers(0, NUM_ACTIONS, args.envs))
+        total_reward += float(rewards.sum())
+        episodes += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    env.close()
+    ticks = args.envs * args.steps * args.frame_skip
+    print(f"{args.envs} миров x {args.steps} шагов за {elapsed:.2f} с: {ticks / elapsed:.0f} тиков/с, "
+          f"{args.steps / elapsed:.1f} пакетных шагов/с")
+    print(f"суммарная награда: {total_reward:.0f}, закончено эпизодов: {episodes}")
+
+
+if __name__ == "__main__":
+    main()
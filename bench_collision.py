@@ -0,0 +1,138 @@
+import argparse
+import random
+import time
+
+from spatial_hash import SpatialHash, overlaps
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+
+"""
+Класс, представляющий прямоугольник столкновений.
+Заменяет спрайт в бенчмарке, чтобы измерялась только стоимость проверок, а не загрузка текстур.
+"""
+class Box:
+    __slots__ = ("left", "bottom", "width", "height", "change_x", "change_y")
+
+    def __init__(self, center_x, center_y, width, height, change_x=0, change_y=0):
+        self.left = center_x - width / 2
+        self.bottom = center_y - height / 2
+        self.width = width
+        self.height = height
+        self.change_x = change_x
+        self.change_y = change_y
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @property
+    def top(self):
+        return self.bottom + self.height
+
+    def update(self):
+        self.left += self.change_x
+        self.bottom += self.change_y
+
+
+"""
+Функция построения мира из заданного числа экранов.
+Повторяет раскладку игры: пол через каждые 64 пикселя и 2-5 платформ на двух уровнях.
+"""
+def build_platforms(screens, rng):
+    platforms = []
+    for screen in range(screens):
+        generated_x = screen * SCREEN_WIDTH
+        for x in range(generated_x, generated_x + SCREEN_WIDTH, 64):
+            platforms.append(Box(x, 32, 128, 32))
+        for level in range(2):
+            for _ in range(rng.randint(2, 5)):
+                x = rng.randint(generated_x, generated_x + SCREEN_WIDTH)
+                y = rng.randint(150, SCREEN_HEIGHT - 64)
+                platforms.append(Box(x, y, 128, 32))
+    return platforms
+
+
+def spawn_movers(count, view_left, rng, speed):
+    movers = []
+    for _ in range(count):
+        x = rng.randint(view_left, view_left + SCREEN_WIDTH)
+        y = rng.randint(50, SCREEN_HEIGHT - 50)
+        movers.append(Box(x, y, 40, 40, rng.choice([-speed, speed])))
+    return movers
+
+
+"""
+Функция одного кадра без индекса: перебор всех платформ и всех пар снаряд-враг.
+"""
+def naive_frame(player, platforms, projectiles, enemies):
+    for mover in projectiles:
+        mover.update()
+    for mover in enemies:
+        mover.update()
+    hits = [platform for platform in platforms if overlaps(player, platform)]
+    for projectile in projectiles:
+        hits.extend(enemy for enemy in enemies if overlaps(projectile, enemy))
+    hits.extend(enemy for enemy in enemies if overlaps(player, enemy))
+    return hits
+
+
+"""
+Функция одного кадра с индексом: платформы уже лежат в статическом индексе,
+враги переписываются в подвижный индекс, все запросы идут через индексы.
+"""
+def hashed_frame(player, platform_index, enemy_index, projectiles, enemies):
+    for mover in projectiles:
+        mover.update()
+    for mover in enemies:
+        mover.update()
+    enemy_index.sync(enemies)
+    hits = platform_index.collide(player)
+    for projectile in projectiles:
+        hits.extend(enemy_index.collide(projectile))
+    hits.extend(enemy_index.collide(player))
+    return hits
+
+
+def measure(frame, args, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame(*args)
+    return (time.perf_counter() - start) / frames * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время проверки столкновений за кадр в зависимости от размера мира")
+    parser.add_argument("--screens", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--enemies", type=int, default=50)
+    parser.add_argument("--projectiles", type=int, default=40)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'экраны':>8} {'платформы':>10} {'перебор, мкс':>14} {'индекс, мкс':>13}")
+    for screens in args.screens:
+        rng = random.Random(args.seed)
+        platforms = build_platforms(screens, rng)
+        # Игрок находится у правого края сгенерированного мира, как при беге вправо
+        view_left = (screens - 1) * SCREEN_WIDTH
+        player = Box(view_left + SCREEN_WIDTH / 2, 80, 28, 38)
+
+        enemies = spawn_movers(args.enemies, view_left, rng, 2)
+        projectiles = spawn_movers(args.projectiles, view_left, rng, 10)
+        naive_us = measure(naive_frame, (player, platforms, projectiles, enemies), args.frames)
+
+        platform_index = SpatialHash()
+        for platform in platforms:
+            platform_index.insert(platform)
+        enemy_index = SpatialHash()
+        enemies = spawn_movers(args.enemies, view_left, rng, 2)
+        projectiles = spawn_movers(args.projectiles, view_left, rng, 10)
+        hashed_us = measure(hashed_frame, (player, platform_index, enemy_index, projectiles, enemies), args.frames)
+
+        print(f"{screens:>8} {len(platforms):>10} {naive_us:>14.1f} {hashed_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
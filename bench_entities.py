@@ -0,0 +1,63 @@
+import argparse
+import random
+import time
+
+from world import BACKEND_NUMPY, BACKEND_SPRITES, SCREEN_HEIGHT, SCREEN_WIDTH, World
+
+# Целевое время кадра при 60 FPS
+FRAME_BUDGET_MS = 1000 / 60
+
+
+"""
+Функция дозаполнения мира врагами и снарядами до заданного количества.
+Враги появляются по всему экрану и идут в случайную сторону, снаряды летят из центра.
+"""
+def refill(world, rng, enemies, projectiles):
+    entities = world.entities
+    view_left, view_right, view_bottom, view_top = world.viewport
+    for _ in range(enemies - entities.enemy_count):
+        entities.spawn_enemy(rng.uniform(view_left, view_right), rng.uniform(50, SCREEN_HEIGHT - 50), rng.choice([-1, 1]))
+    for _ in range(projectiles - entities.projectile_count):
+        entities.spawn_projectile(view_left + SCREEN_WIDTH / 2, rng.uniform(50, SCREEN_HEIGHT - 50), rng.choice([-1, 1]))
+
+
+"""
+Функция замера одного шага врагов и снарядов: движение, отсечение по экрану и все столкновения.
+Возвращает среднее время шага в миллисекундах.
+"""
+def measure(backend, enemies, projectiles, ticks, seed):
+    rng = random.Random(seed)
+    world = World(seed, backend, enemy_capacity=enemies, projectile_capacity=projectiles)
+    world.setup()
+    # Игрок вне экрана, чтобы враги не тратились на столкновения с ним
+    world.player.center_y = -1000
+    elapsed = 0.0
+    for _ in range(ticks):
+        refill(world, rng, enemies, projectiles)
+        start = time.perf_counter()
+        world.entities.update(world.viewport)
+        world.entities.hit_enemies()
+        world.entities.hit_player(world.player)
+        elapsed += time.perf_counter() - start
+    return elapsed / ticks * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время шага врагов и снарядов: спрайты против массивов NumPy")
+    parser.add_argument("--enemies", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--projectiles", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--backends", nargs="+", default=[BACKEND_SPRITES, BACKEND_NUMPY])
+    args = parser.parse_args()
+
+    print(f"{'врагов':>8} " + " ".join(f"{backend + ', мс':>14}" for backend in args.backends))
+    for enemies in args.enemies:
+        results = [measure(backend, enemies, args.projectiles, args.ticks, args.seed) for backend in args.backends]
+        marks = " ".join(f"{ms:>13.2f}{'*' if ms > FRAME_BUDGET_MS else ' '}" for ms in results)
+        print(f"{enemies:>8} {marks}")
+    print(f"* - не укладывается в кадр 60 FPS ({FRAME_BUDGET_MS:.1f} мс)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from chunks import CHUNK_WIDTH
+from profiler import FrameProfiler
+from terrain import Tile, bake_tiles
+from world import (
+    ACTION_CHEAT, ACTION_DOWN, ACTION_FIRE, ACTION_JUMP, ACTION_RIGHT, CHEAT_TRIPLE_SHOOT_DURATION, ENEMY_POOL_SIZE,
+    PRESS, RELEASE, TICK_RATE, World,
+)
+
+# Файл с базовыми результатами, с которыми сравнивается каждый прогон
+DEFAULT_BASELINE_PATH = "bench_baseline.json"
+# Допустимое ухудшение относительно базы: скорость (доля тиков/с) и память (доля пика)
+SPEED_THRESHOLD = 0.10
+MEMORY_THRESHOLD = 0.20
+# Здоровье игрока в сценариях, которые должны дойти до конца, не закончившись смертью
+BENCH_HEALTH = 10 ** 9
+# Высоты платформ стопки в сценарии спрыгивания, снизу вверх
+STACK_LEVELS = (160, 260, 360, 460)
+
+
+"""
+Класс, представляющий сценарий замера.
+Сценарий задаёт параметры мира, подготовку мира и ввод на каждый тик. В отличие от
+ScriptedInput из headless.py, ввод получает сам мир и может менять его напрямую
+(например, поднять игрока обратно на верх стопки платформ).
+
+Параметры:
+name (str): Имя сценария в отчёте и в файле базы.
+ticks (int): Длина сценария в тиках при масштабе 1.
+inputs (callable): inputs(tick, world) возвращает события ввода тика.
+prepare (callable): prepare(world) вызывается после setup мира.
+world_options (dict): Параметры конструктора World.
+"""
+class Scenario:
+    def __init__(self, name, ticks, inputs, prepare=None, **world_options):
+        self.name = name
+        self.ticks = ticks
+        self.inputs = inputs
+        self.prepare = prepare
+        self.world_options = world_options
+
+    def create_world(self, seed, profiler=None):
+        world = World(seed, profiler=profiler, **self.world_options)
+        world.setup()
+        if self.prepare is not None:
+            self.prepare(world)
+        return world
+
+
+def make_immortal(world):
+    world.player.health = BENCH_HEALTH
+
+
+def idle_inputs(tick, world):
+    return ()
+
+
+# Бег вправо с прыжком раз в две секунды, чтобы игрок задевал платформы
+def run_right_inputs(tick, world):
+    if tick == 0:
+        return [(PRESS, ACTION_RIGHT)]
+    if tick % (2 * TICK_RATE) == 0:
+        return [(PRESS, ACTION_JUMP)]
+    return ()
+
+
+"""
+Функция ввода сценария плотных волн.
+Тройной выстрел продлевается читом до окончания, выстрел каждые 4 тика,
+и каждые полсекунды у краёв экрана заказывается волна врагов.
+"""
+def triple_fire_inputs(tick, world):
+    events = []
+    if tick % (CHEAT_TRIPLE_SHOOT_DURATION * TICK_RATE) == 0:
+        events.append((PRESS, ACTION_CHEAT))
+    if tick % 4 == 0:
+        events.append((PRESS, ACTION_FIRE))
+    if tick % (TICK_RATE // 2) == 0:
+        world.spawn_entities(num_enemies=16)
+    return events
+
+
+"""
+Функция сценария спрыгивания со стопки платформ над игроком.
+Стопка запекается (terrain.bake_tiles) и строится через World.build_platform, как платформы настоящих чанков,
+и добавляется к объектам чанка, в котором стоит игрок: физика сталкивает игрока с её прямоугольниками (SolidRect).
+Каждые 40 тиков игрок зажимает "вниз" на 8 тиков и проваливается на платформу ниже;
+дойдя до пола, он переносится обратно на верх стопки.
+"""
+def fall_through_scenario(ticks):
+    # Верх верхней платформы: сюда игрок ставится и в начале, и при каждом возврате наверх
+    stack_top = None
+
+    def prepare(world):
+        nonlocal stack_top
+        make_immortal(world)
+        player = world.player
+        chunk_x = int(player.center_x) // CHUNK_WIDTH * CHUNK_WIDTH
+        slabs = bake_tiles([Tile("images/platform_1.png", player.center_x, y, False) for y in STACK_LEVELS])
+        world.chunks.chunks[chunk_x] += [world.build_platform(chunk_x, slab) for slab in slabs]
+        stack_top = max(slab.top for slab in slabs)
+        player.bottom = stack_top
+
+    def inputs(tick, world):
+        player = world.player
+        if player.on_platform and player.bottom < STACK_LEVELS[0] // 2:
+            player.bottom = stack_top
+            player.change_y = 0
+        phase = tick % 40
+        if phase == 0:
+            return [(PRESS, ACTION_DOWN)]
+        if phase == 8:
+            return [(RELEASE, ACTION_DOWN)]
+        return ()
+
+    return Scenario("fall_through", ticks, inputs, prepare)
+
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in (
+        Scenario("idle", 60 * TICK_RATE, idle_inputs),
+        Scenario("run_right", 10 * 60 * TICK_RATE, run_right_inputs, make_immortal),
+        Scenario("triple_fire", 2 * 60 * TICK_RATE, triple_fire_inputs, make_immortal,
+                 spawn_max_live=ENEMY_POOL_SIZE, spawn_rate=TICK_RATE),
+        fall_through_scenario(2 * 60 * TICK_RATE),
+    )
+}
+
+
+def play(scenario, world, ticks):
+    inputs = scenario.inputs
+    for tick in range(ticks):
+        world.step(inputs(tick, world))
+
+
+"""
+Функция замера скорости сценария.
+Возвращает тики в секунду и среднее время фаз шага в миллисекундах.
+"""
+def measure_speed(scenario, ticks, seed):
+    profiler = FrameProfiler(enabled=True, window=ticks)
+    world = scenario.create_world(seed, profiler)
+    start = time.perf_counter()
+    play(scenario, world, ticks)
+    elapsed = time.perf_counter() - start
+    phases = {name: stats["mean"] for name, stats in profiler.summary().items()}
+    return ticks / elapsed, phases, world
+
+
+"""
+Функция замера памяти сценария.
+Отдельный прогон под tracemalloc, потому что трассировка сильно замедляет шаг.
+Возвращает пик памяти за прогон (байты), прирост живых блоков памяти
+и количество сборок мусора по поколениям.
+"""
+def measure_memory(scenario, ticks, seed):
+    gc.collect()
+    collections = [stats["collections"] for stats in gc.get_stats()]
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    world = scenario.create_world(seed)
+    play(scenario, world, ticks)
+    blocks = sys.getallocatedblocks() - blocks
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = [stats["collections"] - before for stats, before in zip(gc.get_stats(), collections)]
+    return peak, blocks, collections
+
+
+def run_scenario(scenario, scale, repeat, seed):
+    ticks = max(1, int(scenario.ticks * scale))
+    runs = [measure_speed(scenario, ticks, seed) for _ in range(repeat)]
+    speeds = [speed for speed, phases, world in runs]
+    phases = {name: statistics.median(run[1].get(name, 0.0) for run in runs) for name in runs[0][1]}
+    world = runs[0][2]
+    peak, blocks, collections = measure_memory(scenario, ticks, seed)
+    return {
+        "ticks": ticks,
+        "ticks_per_second": statistics.median(speeds),
+        "phases_ms": phases,
+        "peak_memory": peak,
+        "allocated_blocks": blocks,
+        "gc_collections": collections,
+        "kills": world.kills,
+        "chunks": len(world.platform_lists),
+        "platforms": sum(len(platform_list) for platform_list in world.platform_lists.values()),
+        "entities": world.entities.stats(),
+    }
+
+
+"""
+Функция сравнения результатов с базой.
+Возвращает строки отчёта и список ухудшений, превысивших порог.
+Сценарии, которых нет в базе или которые шли другое число тиков, не сравниваются.
+"""
+def compare(results, baseline, speed_threshold, memory_threshold):
+    lines = [f"{'сценарий':<14}{'тиков/с':>10}{'база':>10}{'пик, КБ':>10}{'база':>10}"]
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or base["ticks"] != result["ticks"]:
+            lines.append(f"{name:<14}{result['ticks_per_second']:>10.0f}{'-':>10}{result['peak_memory'] / 1024:>10.0f}{'-':>10}")
+            continue
+        lines.append(f"{name:<14}{result['ticks_per_second']:>10.0f}{base['ticks_per_second']:>10.0f}"
+                     f"{result['peak_memory'] / 1024:>10.0f}{base['peak_memory'] / 1024:>10.0f}")
+        if result["ticks_per_second"] < base["ticks_per_second"] * (1 - speed_threshold):
+            regressions.append(f"{name}: скорость {result['ticks_per_second']:.0f} тиков/с против {base['ticks_per_second']:.0f}")
+        if result["peak_memory"] > base["peak_memory"] * (1 + memory_threshold):
+            regressions.append(f"{name}: пик памяти {result['peak_memory']} байт против {base['peak_memory']}")
+        for phase, value in result["phases_ms"].items():
+            before = base["phases_ms"].get(phase)
+            if before:
+                lines.append(f"  {phase:<22}{value:>8.4f} мс{value / before - 1:>+9.0%}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сценарии замера скорости и памяти симуляции со сравнением с базой")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"сценарии: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0, help="множитель длины сценариев")
+    parser.add_argument("--repeat", type=int, default=3, help="прогонов скорости; берётся медиана")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="JSON с базовыми результатами")
+    parser.add_argument("--update-baseline", action="store_true", help="записать результаты как новую базу")
+    parser.add_argument("--speed-threshold", type=float, default=SPEED_THRESHOLD)
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument("--out", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = result = run_scenario(SCENARIOS[name], args.scale, args.repeat, args.seed)
+        print(f"{name}: {result['ticks']} тиков, {result['ticks_per_second']:.0f} тиков/с, "
+              f"пик {result['peak_memory'] / 1024:.0f} КБ, блоков {result['allocated_blocks']:+d}, "
+              f"сборок мусора {result['gc_collections']}, чанков {result['chunks']}, платформ {result['platforms']}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    lines, regressions = compare(results, baseline, args.speed_threshold, args.memory_threshold)
+    print("\n".join(lines))
+
+    if args.update_baseline or not baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, ensure_ascii=False, indent=2)
+        print(f"база записана в {args.baseline}")
+    elif regressions:
+        print("Ухудшения сверх порога:")
+        print("\n".join(f"  {regression}" for regression in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
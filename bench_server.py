@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+
+from headless import RandomInput
+from server import (
+    DEFAULT_HOST, JOIN_STRUCT, MSG_ERROR, MSG_INPUT, MSG_JOIN, MSG_LEAVE, MSG_SNAPSHOT, MSG_STATS,
+    MSG_WELCOME, SNAPSHOT_INTERVAL, WELCOME_STRUCT, GameServer, SnapshotDecoder, encode_message, read_message,
+)
+from world import BACKEND_NUMPY, BACKEND_SPRITES, TICK_RATE
+
+# Сколько секунд сессиям дают освоиться перед замером (создание миров, первые чанки)
+WARMUP_SECONDS = 2.0
+
+
+"""
+Функция процесса сервера.
+Сервер работает в отдельном процессе, чтобы его процессорное время не смешивалось со временем ботов.
+Выбранный системой порт передаётся через очередь.
+"""
+def server_process(port_queue, options):
+    async def run():
+        server = GameServer(DEFAULT_HOST, 0, **options)
+        await server.start()
+        port_queue.put(server.port)
+        await server.server.serve_forever()
+
+    asyncio.run(run())
+
+
+"""
+Класс, представляющий бота: тонкого клиента со своей сессией на сервере.
+Применяет снимки к своему состоянию (SnapshotDecoder) и на каждый снимок отправляет ввод RandomInput
+за шаги, прошедшие с предыдущего снимка.
+
+Параметры:
+seed (int): Зерно мира сессии и случайного ввода.
+"""
+class Bot:
+    def __init__(self, seed):
+        self.seed = seed
+        self.input = RandomInput(seed)
+        self.decoder = SnapshotDecoder()
+        self.reader = None
+        self.writer = None
+        self.session_id = None
+        self.world_seed = None
+        # Сколько раз сессия начиналась заново (повторный MSG_WELCOME)
+        self.restarts = 0
+        self.snapshot_interval = SNAPSHOT_INTERVAL
+        self.received_bytes = 0
+        self.snapshots = 0
+        self.input_tick = 0
+        self.task = None
+
+    async def connect(self, host, port):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(encode_message(MSG_JOIN, JOIN_STRUCT.pack(self.seed, 0)))
+        kind, payload = await read_message(self.reader)
+        if kind != MSG_WELCOME:
+            raise RuntimeError(payload.decode("utf-8", "replace"))
+        self.session_id, self.world_seed, tick_rate, self.snapshot_interval = WELCOME_STRUCT.unpack(payload)
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            kind, payload = await read_message(self.reader)
+            self.received_bytes += len(payload) + 5
+            if kind == MSG_SNAPSHOT:
+                self.decoder.apply(payload)
+                self.snapshots += 1
+                events = bytearray()
+                for _ in range(self.snapshot_interval):
+                    events += bytes(event_kind << 4 | action for event_kind, action in self.input(self.input_tick))
+                    self.input_tick += 1
+                if events:
+                    self.writer.write(encode_message(MSG_INPUT, bytes(events)))
+            elif kind == MSG_WELCOME:
+                self.session_id, self.world_seed, tick_rate, self.snapshot_interval = WELCOME_STRUCT.unpack(payload)
+                self.restarts += 1
+            elif kind == MSG_ERROR:
+                raise RuntimeError(payload.decode("utf-8", "replace"))
+
+    async def close(self):
+        self.task.cancel()
+        self.writer.write(encode_message(MSG_LEAVE))
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def request_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode_message(MSG_STATS))
+    kind, payload = await read_message(reader)
+    writer.close()
+    return json.loads(payload)
+
+
+"""
+Функция замера одной ступени нагрузки: sessions ботов в течение seconds секунд.
+По статистике сервера до и после замера считает, сколько сессий выдержало бы одно ядро
+(процессорное время сервера на шаг сессии при TICK_RATE шагах в секунду), отставание шагов
+и трафик снимков на сессию.
+"""
+async def measure(host, port, sessions, seconds, seed):
+    bots = [Bot(seed + i) for i in range(sessions)]
+    for bot in bots:
+        await bot.connect(host, port)
+    await asyncio.sleep(WARMUP_SECONDS)
+    before = await request_stats(host, port)
+    received = sum(bot.received_bytes for bot in bots)
+    client_cpu = time.process_time()
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    after = await request_stats(host, port)
+    elapsed = time.perf_counter() - start
+    client_cpu = time.process_time() - client_cpu
+    received = sum(bot.received_bytes for bot in bots) - received
+    for bot in bots:
+        if bot.task.done():
+            bot.task.result()
+        await bot.close()
+
+    delta = {name: after[name] - before[name] for name in
+             ("ticks", "late_ticks", "session_ticks", "cpu_seconds", "step_seconds", "broadcast_seconds",
+              "snapshots", "full_snapshots", "snapshot_bytes", "raw_bytes")}
+    session_tick_cpu = delta["cpu_seconds"] / delta["session_ticks"] if delta["session_ticks"] else 0.0
+    return {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "ticks_per_second": delta["ticks"] / elapsed,
+        "late_ticks": delta["late_ticks"],
+        "server_cpu": delta["cpu_seconds"] / elapsed,
+        "client_cpu": client_cpu / elapsed,
+        "session_tick_ms": session_tick_cpu * 1000,
+        "step_share": delta["step_seconds"] / delta["cpu_seconds"] if delta["cpu_seconds"] else 0.0,
+        "broadcast_share": delta["broadcast_seconds"] / delta["cpu_seconds"] if delta["cpu_seconds"] else 0.0,
+        "sessions_per_core": 1 / (session_tick_cpu * TICK_RATE) if session_tick_cpu else float("inf"),
+        "snapshot_bytes": delta["snapshot_bytes"] / delta["snapshots"] if delta["snapshots"] else 0.0,
+        "full_snapshots": delta["full_snapshots"],
+        "compression": delta["raw_bytes"] / delta["snapshot_bytes"] if delta["snapshot_bytes"] else 0.0,
+        "bandwidth_per_session": delta["snapshot_bytes"] / elapsed / sessions,
+        "received_per_session": received / elapsed / sessions,
+        "throttled": after["throttled"],
+    }
+
+
+async def run_load_test(host, port, steps, seconds, seed):
+    results = []
+    for sessions in steps:
+        result = await measure(host, port, sessions, seconds, seed)
+        results.append(result)
+        print(f"{sessions:>5} сессий: {result['ticks_per_second']:.1f} шагов/с, опоздало {result['late_ticks']}, "
+              f"сервер {result['server_cpu']:.0%} ядра, {result['session_tick_ms']:.3f} мс на шаг сессии "
+              f"(симуляция {result['step_share']:.0%}, снимки {result['broadcast_share']:.0%}), "
+              f"~{result['sessions_per_core']:.0f} сессий на ядро")
+        print(f"{'':>12}снимок {result['snapshot_bytes']:.0f} Б (сжатие x{result['compression']:.1f}), "
+              f"{result['bandwidth_per_session'] / 1024:.2f} КБ/с на сессию, получено ботом "
+              f"{result['received_per_session'] / 1024:.2f} КБ/с, придержано: {result['throttled']}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест игрового сервера: сессии на ядро и трафик снимков")
+    parser.add_argument("--sessions", default="1,8,32", help="ступени нагрузки: количества сессий через запятую")
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность замера каждой ступени")
+    parser.add_argument("--seed", type=int, default=1, help="зерно первой сессии; сессия i получает seed + i")
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL, help="шагов мира между снимками")
+    parser.add_argument("--backend", choices=[BACKEND_SPRITES, BACKEND_NUMPY], default=BACKEND_SPRITES,
+                        help="хранение врагов и снарядов на сервере")
+    parser.add_argument("--port", type=int, default=None, help="подключиться к уже запущенному серверу (server.py)")
+    parser.add_argument("--out", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+    steps = [int(value) for value in args.sessions.split(",")]
+
+    process = None
+    port = args.port
+    if port is None:
+        port_queue = multiprocessing.Queue()
+        options = {"snapshot_interval": args.snapshot_interval, "backend": args.backend}
+        process = multiprocessing.Process(target=server_process, args=(port_queue, options), daemon=True)
+        process.start()
+        port = port_queue.get(timeout=30)
+    try:
+        results = asyncio.run(run_load_test(DEFAULT_HOST, port, steps, args.seconds, args.seed))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import time
+
+# Момент запуска дочернего процесса; стоит до всех остальных импортов
+STARTUP_BEGIN = time.perf_counter()
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+# Файл, в который дописывается результат каждого запуска бенчмарка
+DEFAULT_HISTORY_PATH = "startup_history.csv"
+
+
+"""
+Функция одного холодного запуска в текущем процессе.
+Проходит те же фазы, что и игра, и печатает их длительности и счётчики реестра текстур в JSON последней строкой:
+к первому кадру (textures) и после того, как фоновая загрузка закончилась (background_textures).
+Без окна фазы window и first_frame пропускаются.
+"""
+def run_child(seed, window):
+    from profiler import StartupProfiler
+    from animation import load_animations
+    from textures import registry
+    from world import World
+
+    startup = StartupProfiler(STARTUP_BEGIN)
+    startup.lap("imports")
+    if window:
+        from main import Platformer
+
+        game = Platformer(seed, startup=startup)
+        startup.lap("window")
+        game.setup()
+        game.on_draw()
+        summary = startup.summary()
+        game.close()
+    else:
+        load_animations(lazy=True)
+        startup.lap("assets")
+        World(seed).setup()
+        startup.lap("world")
+        summary = startup.summary()
+    first_frame = registry.stats()
+    registry.wait()
+    print(json.dumps({"phases": summary, "textures": first_frame, "background_textures": registry.stats()}))
+
+
+"""
+Функция запуска дочернего процесса и чтения его замеров.
+Каждый запуск - новый интерпретатор, поэтому все импорты и загрузки холодные.
+"""
+def measure(seed, window):
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--seed", str(seed)]
+    if window:
+        command.append("--window")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def read_last(history_path):
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    return rows[-1] if rows else None
+
+
+"""
+Функция дописывания результата в историю.
+Каждая строка - дата, ревизия и медианы фаз; так видно, как меняется время запуска.
+"""
+def append_history(history_path, medians):
+    row = {"date": datetime.now().isoformat(timespec="seconds"), "revision": git_revision()}
+    row.update({name: f"{value:.2f}" for name, value in medians.items()})
+    exists = os.path.exists(history_path)
+    if exists:
+        with open(history_path, newline="", encoding="utf-8") as file:
+            fields = next(csv.reader(file), [])
+        if fields != list(row):
+            # Набор фаз изменился (например, добавили --window): начинаем историю заново
+            os.replace(history_path, history_path + ".old")
+            exists = False
+    with open(history_path, "a", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=list(row))
+        if not exists:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодный запуск игры: время каждой фазы до первого кадра")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--window", action="store_true", help="создавать окно и рисовать первый кадр")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="CSV с историей замеров")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.seed, args.window)
+        return
+
+    runs = [measure(args.seed, args.window) for _ in range(args.runs)]
+    medians = {name: statistics.median(run["phases"][name] for run in runs) for name in runs[0]["phases"]}
+    previous = read_last(args.history)
+    print(f"{'фаза':<14}{'медиана, мс':>12}{'прошлый раз':>14}")
+    for name, value in medians.items():
+        before = f"{float(previous[name]):>14.2f}" if previous and name in previous else f"{'-':>14}"
+        print(f"{name:<14}{value:>12.2f}{before}")
+    print(f"текстуры к первому кадру: {runs[-1]['textures']}, после фоновой загрузки: {runs[-1]['background_textures']}")
+    append_history(args.history, medians)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Ширина чанка мира в пикселях (один экран)
+CHUNK_WIDTH = 800
+# Сколько чанков держать загруженными слева и справа от экрана
+CHUNKS_BEHIND = 1
+CHUNKS_AHEAD = 1
+# Сколько чанков за пределами загруженных заранее генерировать в фоновом потоке
+CHUNKS_PREFETCH = 2
+# Время на создание и удаление объектов невидимых чанков за один шаг (секунды)
+CHUNK_BUILD_BUDGET = 0.0005
+
+# Общий фоновый поток генерации; создаётся при первой необходимости
+_executor = None
+
+
+def generation_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-generation")
+    return _executor
+
+
+"""
+Функция наибольшего количества чанков, которые ChunkManager держит загруженными
+при экране шириной view_width (см. ChunkManager.chunk_range).
+"""
+def max_loaded_chunks(view_width, chunk_width=CHUNK_WIDTH, chunks_behind=CHUNKS_BEHIND, chunks_ahead=CHUNKS_AHEAD):
+    return chunks_behind + -(-view_width // chunk_width) + 1 + chunks_ahead
+
+
+"""
+Функция вычисления зерна чанка.
+Зерно зависит только от зерна мира и координаты чанка, поэтому чанк
+после выгрузки генерируется заново точно таким же.
+"""
+def chunk_seed(world_seed, chunk_x):
+    return (world_seed * 0x9E3779B1 + chunk_x) & 0xFFFFFFFFFFFFFFFF
+
+
+"""
+Класс, представляющий менеджер чанков мира.
+Мир делится на чанки шириной CHUNK_WIDTH, ключ чанка - его левая граница (generated_x в момент создания).
+Менеджер держит загруженными только чанки рядом с экраном, остальные выгружает,
+а при возвращении игрока генерирует их заново из зерна чанка.
+
+Генерация и создание объектов разделены. generate_chunk - чистая функция, которая по зерну
+возвращает описания объектов чанка; она выполняется заранее в фоновом потоке для чанков
+чуть дальше загруженных. Объекты по описаниям создаются в основном потоке: для чанков на экране
+сразу целиком, для остальных - понемногу, в пределах бюджета времени на шаг (build).
+Объекты выгруженных чанков тоже убираются понемногу в том же бюджете.
+С объектами сталкивается только игрок, а он всегда на экране, поэтому то, как быстро
+достраиваются невидимые чанки, не влияет на ход игры.
+
+Параметры:
+generate_chunk (callable): generate_chunk(chunk_x, rng) возвращает список описаний объектов чанка.
+build_object (callable): build_object(chunk_x, description) создаёт объект чанка, добавляет его в мир и возвращает.
+unload_chunk (callable): unload_chunk(chunk_x, objects) убирает объекты чанка из мира.
+seed (int): Зерно мира.
+prefetch (int): Сколько чанков с каждой стороны генерировать заранее; 0 - без фонового потока.
+"""
+class ChunkManager:
+    def __init__(self, generate_chunk, build_object, unload_chunk, seed, chunk_width=CHUNK_WIDTH,
+                 chunks_behind=CHUNKS_BEHIND, chunks_ahead=CHUNKS_AHEAD, prefetch=CHUNKS_PREFETCH):
+        self.generate_chunk = generate_chunk
+        self.build_object = build_object
+        self.unload_chunk = unload_chunk
+        self.seed = seed
+        self.chunk_width = chunk_width
+        self.chunks_behind = chunks_behind
+        self.chunks_ahead = chunks_ahead
+        self.prefetch = prefetch
+        # Созданные объекты загруженных чанков
+        self.chunks = {}
+        # Описания объектов, которые ещё предстоит создать, по чанкам
+        self.building = {}
+        # Объекты выгруженных чанков, которые ещё предстоит убрать из мира
+        self.unloading = {}
+        # Будущие результаты фоновой генерации по чанкам
+        self.futures = {}
+        # Правая граница самого дальнего созданного чанка
+        self.generated_x = 0
+        self.evictions = 0
+        self.regenerations = 0
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk_range(self, view_left, view_right, behind=None, ahead=None):
+        width = self.chunk_width
+        behind = self.chunks_behind if behind is None else behind
+        ahead = self.chunks_ahead if ahead is None else ahead
+        first = max(0, int((view_left // width) - behind))
+        last = int(view_right // width) + ahead
+        return range(first * width, (last + 1) * width, width)
+
+    def _generate(self, chunk_x):
+        return self.generate_chunk(chunk_x, random.Random(chunk_seed(self.seed, chunk_x)))
+
+    """
+    Функция получения описаний чанка.
+    Берёт готовый результат фоновой генерации (при необходимости дожидается его),
+    а если чанк не генерировался заранее, генерирует его сразу.
+    """
+    def _take(self, chunk_x):
+        future = self.futures.pop(chunk_x, None)
+        if future is None:
+            self.prefetch_misses += 1
+            return self._generate(chunk_x)
+        self.prefetch_hits += 1
+        return future.result()
+
+    """
+    Функция подгрузки и выгрузки чанков по положению экрана.
+    Чанки на экране достраиваются сразу, остальные ставятся в очередь build.
+    Возвращает количество чанков, созданных впервые (новая территория справа).
+    """
+    def stream(self, view_left, view_right):
+        needed = self.chunk_range(view_left, view_right)
+        for chunk_x in [chunk_x for chunk_x in self.chunks if chunk_x not in needed]:
+            self.building.pop(chunk_x, None)
+            self.unloading[chunk_x] = self.chunks.pop(chunk_x)
+            self.evictions += 1
+
+        new_chunks = 0
+        for chunk_x in needed:
+            if chunk_x in self.chunks:
+                continue
+            objects = self.unloading.pop(chunk_x, None)
+            if objects:
+                # Чанк понадобился снова раньше, чем старые объекты успели убраться
+                self.unload_chunk(chunk_x, objects)
+            self.chunks[chunk_x] = []
+            self.building[chunk_x] = iter(self._take(chunk_x))
+            if chunk_x >= self.generated_x:
+                self.generated_x = chunk_x + self.chunk_width
+                new_chunks += 1
+            else:
+                self.regenerations += 1
+
+        # С объектами чанков на экране может столкнуться игрок, поэтому они нужны немедленно
+        for chunk_x in self.chunk_range(view_left, view_right, 0, 0):
+            if chunk_x in self.building:
+                self._build_chunk(chunk_x, None)
+
+        self._prefetch(view_left, view_right)
+        return new_chunks
+
+    def _prefetch(self, view_left, view_right):
+        if not self.prefetch:
+            return
+        wanted = self.chunk_range(view_left, view_right, self.chunks_behind + self.prefetch, self.chunks_ahead + self.prefetch)
+        for chunk_x in [chunk_x for chunk_x in self.futures if chunk_x not in wanted]:
+            self.futures.pop(chunk_x).cancel()
+        executor = generation_executor()
+        for chunk_x in wanted:
+            if chunk_x not in self.chunks and chunk_x not in self.futures:
+                self.futures[chunk_x] = executor.submit(self._generate, chunk_x)
+
+    def _build_chunk(self, chunk_x, deadline):
+        objects = self.chunks[chunk_x]
+        for description in self.building[chunk_x]:
+            objects.append(self.build_object(chunk_x, description))
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+        del self.building[chunk_x]
+        return True
+
+    def _unload_chunk(self, chunk_x, deadline):
+        objects = self.unloading[chunk_x]
+        while objects:
+            self.unload_chunk(chunk_x, [objects.pop()])
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+        del self.unloading[chunk_x]
+        return True
+
+    """
+    Функция создания объектов загруженных, но ещё не достроенных чанков,
+    и удаления объектов выгруженных. Вызывается каждый шаг и останавливается, когда истёк бюджет.
+
+    Параметры:
+    budget (float): Время в секундах; None - закончить всё.
+    """
+    def build(self, budget=None):
+        deadline = None if budget is None else time.perf_counter() + budget
+        for chunk_x in list(self.unloading):
+            if not self._unload_chunk(chunk_x, deadline):
+                return
+        for chunk_x in list(self.building):
+            if not self._build_chunk(chunk_x, deadline):
+                return
+
+    def stats(self):
+        return {
+            "loaded": len(self.chunks), "building": len(self.building), "unloading": len(self.unloading),
+            "prefetched": len(self.futures),
+            "prefetch_hits": self.prefetch_hits, "prefetch_misses": self.prefetch_misses,
+            "evictions": self.evictions, "regenerations": self.regenerations,
+        }
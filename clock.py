@@ -0,0 +1,90 @@
+import heapq
+import itertools
+
+
+"""
+Класс, представляющий отложенное событие игрового времени.
+Хранит время срабатывания и функцию; отменённое событие остаётся в очереди,
+но не вызывается.
+"""
+class Timer:
+    __slots__ = ("time", "callback", "args", "cancelled")
+
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+"""
+Класс, представляющий игровые часы.
+Игровое время не зависит от настенных часов: оно продвигается только вызовом advance
+(в игре - на каждом шаге мира), поэтому работает с паузой, ускорением, прогоном без окна и повтором.
+Все отложенные эффекты планируются в очереди с приоритетом по времени срабатывания,
+поэтому за кадр проверяется только ближайшее событие, а не каждый эффект отдельно.
+"""
+class GameClock:
+    def __init__(self):
+        self.time = 0.0
+        self.time_scale = 1.0
+        self.paused = False
+        self._queue = []
+        # Порядковый номер разрешает события с одинаковым временем в порядке планирования
+        self._counter = itertools.count()
+
+    """
+    Функция пересчёта реального времени в игровое с учётом паузы и масштаба.
+
+    Параметры:
+    delta_time (float): Время, прошедшее по настенным часам.
+    """
+    def scaled(self, delta_time):
+        if self.paused:
+            return 0.0
+        return delta_time * self.time_scale
+
+    """
+    Функция продвижения часов.
+    Увеличивает игровое время и вызывает все события, время которых наступило.
+
+    Параметры:
+    delta_time (float): Игровое время шага.
+    """
+    def advance(self, delta_time):
+        self.time += delta_time
+        queue = self._queue
+        while queue and queue[0][0] <= self.time:
+            timer = heapq.heappop(queue)[2]
+            if not timer.cancelled:
+                timer.callback(*timer.args)
+
+    """
+    Функция планирования события на заданное игровое время.
+    Возвращает Timer, который можно отменить.
+    """
+    def schedule_at(self, time, callback, *args):
+        timer = Timer(time, callback, args)
+        heapq.heappush(self._queue, (time, next(self._counter), timer))
+        return timer
+
+    """
+    Функция планирования события через delay секунд игрового времени.
+    """
+    def schedule(self, delay, callback, *args):
+        return self.schedule_at(self.time + delay, callback, *args)
+
+    def pending(self):
+        return sum(1 for _, _, timer in self._queue if not timer.cancelled)
+
+    """
+    Функция получения ожидающих событий в порядке срабатывания (для снимка состояния).
+    """
+    def timers(self):
+        return [timer for _, _, timer in sorted(self._queue, key=lambda entry: entry[:2]) if not timer.cancelled]
+
+    def clear(self):
+        self._queue.clear()
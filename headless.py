@@ -0,0 +1,197 @@
+import argparse
+import random
+import time
+
+from levels import LevelFile
+from profiler import FrameProfiler
+import state
+from replay import Recorder
+from textures import registry
+from world import (
+    ACTION_CHEAT, ACTION_DOWN, ACTION_FIRE, ACTION_JUMP, ACTION_LEFT, ACTION_RIGHT, ACTION_THROTTLE, BACKEND_NUMPY,
+    BACKEND_SPRITES, ENEMY_POOL_SIZE, PRESS, RELEASE, World,
+)
+
+# Имена действий в файлах сценариев
+ACTION_NAMES = {
+    "left": ACTION_LEFT,
+    "right": ACTION_RIGHT,
+    "jump": ACTION_JUMP,
+    "down": ACTION_DOWN,
+    "fire": ACTION_FIRE,
+    "cheat": ACTION_CHEAT,
+    "throttle": ACTION_THROTTLE,
+}
+KIND_NAMES = {"press": PRESS, "release": RELEASE}
+# Шагов между снимками состояния при --checkpoint (минута игрового времени)
+CHECKPOINT_INTERVAL = 3600
+
+
+"""
+Класс, представляющий заранее записанный сценарий ввода.
+Для каждого тика возвращает список событий, которые нужно передать в World.step.
+"""
+class ScriptedInput:
+    def __init__(self, events):
+        self.events = {}
+        for tick, kind, action in events:
+            self.events.setdefault(tick, []).append((kind, action))
+
+    def __call__(self, tick):
+        return self.events.get(tick, ())
+
+    """
+    Функция загрузки сценария из текстового файла.
+    Каждая строка имеет вид "<тик> press|release left|right|jump|down|fire|cheat|throttle",
+    пустые строки и строки, начинающиеся с #, пропускаются.
+    """
+    @classmethod
+    def load(cls, path):
+        events = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                tick, kind, action = line.split()
+                events.append((int(tick), KIND_NAMES[kind], ACTION_NAMES[action]))
+        return cls(events)
+
+
+"""
+Класс, представляющий случайный ввод.
+Изображает игрока, который бегает в обе стороны, прыгает, спрыгивает с платформ и стреляет.
+"""
+class RandomInput:
+    def __init__(self, seed=None, change_chance=0.05, fire_chance=0.1):
+        self.rng = random.Random(seed)
+        self.change_chance = change_chance
+        self.fire_chance = fire_chance
+        self.direction = None
+        self.down_held = False
+
+    def __call__(self, tick):
+        rng = self.rng
+        events = []
+        if rng.random() < self.change_chance:
+            if self.direction is not None:
+                events.append((RELEASE, self.direction))
+            self.direction = rng.choice([ACTION_LEFT, ACTION_RIGHT, ACTION_RIGHT, None])
+            if self.direction is not None:
+                events.append((PRESS, self.direction))
+        if rng.random() < self.change_chance:
+            events.append((PRESS, ACTION_JUMP))
+        if rng.random() < self.change_chance:
+            events.append((RELEASE if self.down_held else PRESS, ACTION_DOWN))
+            self.down_held = not self.down_held
+        if rng.random() < self.fire_chance:
+            events.append((PRESS, ACTION_FIRE))
+        return events
+
+
+"""
+Функция прогона симуляции без окна.
+Выполняет заданное число шагов так быстро, как возможно, и возвращает статистику прогона.
+
+Параметры:
+ticks (int): Количество шагов.
+input_source (callable): Источник ввода, по номеру тика возвращает список событий.
+restart (bool): Создавать новый мир после смерти игрока.
+seed (int): Зерно мира; после каждого перезапуска увеличивается на 1.
+record_path (str): Записать ввод первого мира в файл (перезапуски при этом отключаются).
+checkpoint_path (str): Сохранять снимок состояния мира в этот файл каждые checkpoint_interval шагов.
+resume_path (str): Начать не с нового мира, а со снимка из файла.
+world_options (dict): Остальные параметры конструктора World.
+"""
+def run(ticks, input_source, restart=True, seed=None, record_path=None, checkpoint_path=None,
+        checkpoint_interval=CHECKPOINT_INTERVAL, resume_path=None, **world_options):
+    if resume_path:
+        world = state.load(resume_path, **world_options)
+    else:
+        world = World(seed, **world_options)
+        world.setup()
+    recorder = None
+    if record_path:
+        recorder = Recorder(world)
+        restart = False
+    restarts = 0
+    kills = 0
+    # Промахи реестра до прогона: всё, что загрузится после этого, загружено уже во время игры
+    startup_misses = registry.misses
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if recorder is not None:
+            recorder.step(world, input_source(tick))
+        else:
+            world.step(input_source(tick))
+        if world.game_over and restart:
+            kills += world.kills
+            restarts += 1
+            world = World(None if seed is None else seed + restarts, **world_options)
+            world.setup()
+        if checkpoint_path and (tick + 1) % checkpoint_interval == 0:
+            state.save(world, checkpoint_path)
+    elapsed = time.perf_counter() - start
+    if recorder is not None:
+        recorder.save(record_path)
+    kills += world.kills
+    return {
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed else float("inf"),
+        "seed": world.seed,
+        "kills": kills,
+        "restarts": restarts,
+        "health": world.player.health,
+        "entities": world.entities.stats(),
+        "spawns": world.spawner.stats(),
+        "textures": registry.stats(),
+        "texture_misses": registry.misses - startup_misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Прогон симуляции без окна с фиксированным шагом")
+    parser.add_argument("--ticks", type=int, default=10_000, help="количество шагов симуляции")
+    parser.add_argument("--seed", type=int, default=None, help="зерно мира; без него выбирается случайно")
+    parser.add_argument("--script", help="файл сценария ввода; без него используется случайный ввод")
+    parser.add_argument("--input-seed", type=int, default=None, help="зерно случайного ввода")
+    parser.add_argument("--no-restart", action="store_true", help="не перезапускать мир после смерти игрока")
+    parser.add_argument("--backend", choices=[BACKEND_SPRITES, BACKEND_NUMPY], default=BACKEND_SPRITES,
+                        help="хранение врагов и снарядов: спрайты или массивы NumPy")
+    parser.add_argument("--enemy-capacity", type=int, default=ENEMY_POOL_SIZE, help="максимум врагов одновременно")
+    parser.add_argument("--record", help="записать ввод в файл для воспроизведения (replay.py)")
+    parser.add_argument("--profile", action="store_true", help="вывести время фаз шага")
+    parser.add_argument("--profile-out", help="сохранить замеры фаз шага (.csv или .json)")
+    parser.add_argument("--checkpoint", help="периодически сохранять снимок состояния мира в файл (state.py)")
+    parser.add_argument("--checkpoint-interval", type=int, default=CHECKPOINT_INTERVAL, help="шагов между снимками")
+    parser.add_argument("--resume", help="продолжить со снимка состояния из файла")
+    parser.add_argument("--level", help="файл уровня (levels.py) вместо процедурного рельефа")
+    args = parser.parse_args()
+    if args.record and (args.resume or args.level or args.enemy_capacity != ENEMY_POOL_SIZE):
+        parser.error("--record нельзя сочетать с --resume, --level и --enemy-capacity: запись их не хранит")
+
+    if args.script:
+        input_source = ScriptedInput.load(args.script)
+    else:
+        input_source = RandomInput(args.input_seed)
+
+    profiler = FrameProfiler(enabled=args.profile or bool(args.profile_out))
+    level = LevelFile(args.level) if args.level else None
+    stats = run(args.ticks, input_source, restart=not args.no_restart, seed=args.seed, record_path=args.record,
+                checkpoint_path=args.checkpoint, checkpoint_interval=args.checkpoint_interval, resume_path=args.resume,
+                backend=args.backend, enemy_capacity=args.enemy_capacity, profiler=profiler, level=level)
+    print(f"{stats['ticks']} тиков за {stats['seconds']:.3f} с: {stats['ticks_per_second']:.0f} тиков/с")
+    print(f"зерно: {stats['seed']}, убито врагов: {stats['kills']}, перезапусков: {stats['restarts']}, здоровье: {stats['health']}")
+    print(f"снаряды: {stats['entities']['projectiles']}")
+    print(f"враги: {stats['entities']['enemies']}")
+    print(f"появления: {stats['spawns']}")
+    print(f"текстуры: {stats['textures']}, загружено во время прогона: {stats['texture_misses']}")
+    if args.profile:
+        print("\n".join(profiler.lines()))
+    if args.profile_out:
+        profiler.dump(args.profile_out)
+
+
+if __name__ == "__main__":
+    main()
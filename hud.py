@@ -0,0 +1,95 @@
+import arcade
+import PIL.Image
+import PIL.ImageDraw
+
+from world import PLAYER_MAX_HEALTH, SCREEN_HEIGHT, SCREEN_WIDTH
+
+HEART_SIZE = 14
+HEART_COLOR = (220, 20, 60, 255)
+
+
+"""
+Функция рисования текстуры сердца для полоски здоровья.
+Вместо эмодзи, которое раньше печаталось отдельным draw_text для каждого сердца.
+"""
+def create_heart_texture(size=HEART_SIZE):
+    image = PIL.Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = PIL.ImageDraw.Draw(image)
+    radius = size // 4
+    draw.ellipse((0, 0, radius * 2, radius * 2), fill=HEART_COLOR)
+    draw.ellipse((size - radius * 2 - 1, 0, size - 1, radius * 2), fill=HEART_COLOR)
+    draw.polygon([(0, radius), (size - 1, radius), (size // 2, size - 1)], fill=HEART_COLOR)
+    return arcade.Texture("hud_heart", image)
+
+
+"""
+Класс, представляющий интерфейс поверх игры (HUD).
+Держит заранее созданные текстовые объекты и пересобирает их только когда меняются
+здоровье, счёт убийств или оставшиеся секунды тройного выстрела.
+Рисуется в координатах экрана, поэтому не зависит от положения камеры.
+Сердца здоровья - спрайты из одного списка, рисуются одним вызовом.
+"""
+class Hud:
+    def __init__(self):
+        self.health_text = arcade.Text("", 10, SCREEN_HEIGHT - 20, arcade.color.WHITE, 14)
+        self.kills_text = arcade.Text("", SCREEN_WIDTH - 100, SCREEN_HEIGHT - 20, arcade.color.WHITE, 14)
+        self.power_up_text = arcade.Text("", 10, SCREEN_HEIGHT - 40, arcade.color.WHITE, 14)
+
+        self.hearts = arcade.SpriteList()
+        heart_texture = create_heart_texture()
+        for i in range(PLAYER_MAX_HEALTH):
+            heart = arcade.Sprite(texture=heart_texture)
+            heart.left = 60 + i * 20
+            heart.bottom = SCREEN_HEIGHT - 20
+            self.hearts.append(heart)
+
+        self.game_over_shapes = arcade.ShapeElementList()
+        self.game_over_shapes.append(arcade.create_rectangle_filled(
+            SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT, arcade.color.BLACK))
+        self.game_over_title = arcade.Text("ТЫ УМЕР", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 20, arcade.color.RED, 50, anchor_x="center")
+        self.game_over_kills = arcade.Text("", SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20, arcade.color.RED, 20, anchor_x="center")
+
+        # Последние показанные значения; текст меняется только при их изменении
+        self.health = None
+        self.kills = None
+        self.power_up_seconds = None
+        self.rebuilds = 0
+
+    """
+    Функция обновления HUD по состоянию мира.
+    Перестраивает только те элементы, значения которых изменились.
+    """
+    def update(self, world):
+        health = world.player.health
+        if health != self.health:
+            self.health = health
+            self.health_text.text = f"HP: {health}"
+            for i, heart in enumerate(self.hearts):
+                heart.visible = i < health
+            self.rebuilds += 1
+
+        kills = world.kills
+        if kills != self.kills:
+            self.kills = kills
+            self.kills_text.text = f"Kills: {kills}"
+            self.game_over_kills.text = f"Ты убил {kills} монстров"
+            self.rebuilds += 1
+
+        power_up_seconds = 0
+        if world.player.triple_shoot:
+            power_up_seconds = max(0, int(world.player.triple_shoot_end_time - world.clock.time))
+        if power_up_seconds != self.power_up_seconds:
+            self.power_up_seconds = power_up_seconds
+            self.power_up_text.text = f"Тройной выстрел: {power_up_seconds}"
+            self.rebuilds += 1
+
+    def draw(self, game_over=False):
+        self.health_text.draw()
+        self.hearts.draw()
+        self.kills_text.draw()
+        if self.power_up_seconds > 0:
+            self.power_up_text.draw()
+        if game_over:
+            self.game_over_shapes.draw()
+            self.game_over_title.draw()
+            self.game_over_kills.draw()
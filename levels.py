@@ -0,0 +1,198 @@
+import argparse
+import mmap
+import random
+import struct
+import time
+import tracemalloc
+
+from chunks import CHUNK_WIDTH, chunk_seed
+from rng import GameRandom
+from terrain import Tile
+from textures import PLATFORM_TEXTURES
+
+# Формат файла уровня:
+#   заголовок LEVEL_HEADER (метка, версия, ширина чанка, количество чанков, зерно)
+#   оглавление: для каждого чанка INDEX_ENTRY (смещение данных, количество рядов плиток и точек появления)
+#   данные чанков подряд: ряды плиток RUN_STRUCT, затем точки появления SPAWN_STRUCT
+# Ряд плиток - count одинаковых плиток с шагом step начиная с x (пол чанка - один ряд);
+# картинка задаётся номером в PLATFORM_TEXTURES.
+# Точка появления - заявка распорядителю появления врагов: с какой стороны экрана и на какой высоте.
+LEVEL_MAGIC = b"PLVL"
+LEVEL_VERSION = 1
+LEVEL_HEADER = struct.Struct("<4sHIIQ")
+INDEX_ENTRY = struct.Struct("<QHH")
+RUN_STRUCT = struct.Struct("<B?iiHH")
+SPAWN_STRUCT = struct.Struct("<?H")
+# Сколько врагов появляется на каждом новом чанке (как World.scroll_viewport)
+LEVEL_SPAWNS_PER_CHUNK = 2
+# Зерно хранится в заголовке как беззнаковое 64-битное число
+MAX_LEVEL_SEED = 2 ** 64 - 1
+
+
+"""
+Класс, представляющий уровень из файла.
+Файл отображается в память (mmap): при открытии читается только заголовок, а оглавление
+и данные чанка - когда чанк понадобится, поэтому время открытия и занятая память
+не зависят от длины трассы. Чтение не меняет состояния, поэтому чанки можно читать
+и из фонового потока генерации.
+За концом трассы чанки пустые.
+
+Параметры:
+path (str): Путь к файлу уровня.
+"""
+class LevelFile:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.chunk_width, self.chunk_count, self.seed = LEVEL_HEADER.unpack_from(self._data)
+        if magic != LEVEL_MAGIC:
+            raise ValueError(f"{path} не является файлом уровня")
+        if version != LEVEL_VERSION:
+            raise ValueError(f"Неподдерживаемая версия уровня: {version}")
+        # Чанки игры режутся по CHUNK_WIDTH; уровень с другой шириной отдавал бы не те чанки
+        if self.chunk_width != CHUNK_WIDTH:
+            raise ValueError(f"Ширина чанка уровня {self.chunk_width} не совпадает с шириной чанка игры {CHUNK_WIDTH}")
+
+    @property
+    def length(self):
+        return self.chunk_count * self.chunk_width
+
+    def _entry(self, chunk_x):
+        index = chunk_x // self.chunk_width
+        if not 0 <= index < self.chunk_count:
+            return None
+        return INDEX_ENTRY.unpack_from(self._data, LEVEL_HEADER.size + index * INDEX_ENTRY.size)
+
+    """
+    Функция чтения плиток чанка.
+    Возвращает описания (Tile) в том же виде, что и World.generate_chunk до запекания.
+    """
+    def chunk_tiles(self, chunk_x):
+        entry = self._entry(chunk_x)
+        if entry is None:
+            return []
+        offset, run_count, spawn_count = entry
+        tiles = []
+        for image, is_floor, x, y, count, step in RUN_STRUCT.iter_unpack(self._data[offset:offset + run_count * RUN_STRUCT.size]):
+            image = PLATFORM_TEXTURES[image]
+            tiles += [Tile(image, x + i * step, y, is_floor) for i in range(count)]
+        return tiles
+
+    """
+    Функция чтения точек появления врагов чанка.
+    Возвращает заявки (сторона, высота) для SpawnDirector.
+    """
+    def chunk_spawns(self, chunk_x):
+        entry = self._entry(chunk_x)
+        if entry is None:
+            return []
+        offset, run_count, spawn_count = entry
+        offset += run_count * RUN_STRUCT.size
+        return [("left" if left else "right", y)
+                for left, y in SPAWN_STRUCT.iter_unpack(self._data[offset:offset + spawn_count * SPAWN_STRUCT.size])]
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+
+"""
+Функция перевода плиток чанка в ряды: подряд идущие одинаковые плитки с равным шагом
+записываются одним рядом.
+"""
+def tile_runs(tiles):
+    runs = []
+    for tile in tiles:
+        image = PLATFORM_TEXTURES.index(tile.image)
+        if runs:
+            run_image, is_floor, x, y, count, step = runs[-1]
+            last_x = x + (count - 1) * step
+            if ((run_image, is_floor, y) == (image, tile.is_floor, tile.y) and tile.x > last_x
+                    and (count == 1 or tile.x - last_x == step)):
+                runs[-1] = (run_image, is_floor, x, y, count + 1, tile.x - last_x)
+                continue
+        runs.append((image, tile.is_floor, tile.x, tile.y, 1, 0))
+    return runs
+
+
+"""
+Функция создания файла уровня.
+Рельеф повторяет процедурный мир с тем же зерном (те же зёрна чанков и та же раскладка),
+точки появления выбираются отдельным потоком случайных чисел.
+Данные чанков пишутся потоком, в памяти держится только оглавление (INDEX_ENTRY на чанк).
+
+Параметры:
+path (str): Куда записать уровень.
+screens (int): Длина трассы в чанках (экранах).
+seed (int): Зерно уровня.
+"""
+def generate_level(path, screens, seed):
+    if not 0 <= seed <= MAX_LEVEL_SEED:
+        raise ValueError(f"Зерно уровня должно быть от 0 до {MAX_LEVEL_SEED}: {seed}")
+    # Генерация плиток - та же, что у мира; сам мир для этого не настраивается
+    from world import SCREEN_HEIGHT, World
+
+    world = World(seed)
+    terrain_seed = world.random.terrain_seed
+    spawn_random = random.Random(f"{seed}:level-spawns")
+    with open(path, "wb") as file:
+        file.write(LEVEL_HEADER.pack(LEVEL_MAGIC, LEVEL_VERSION, CHUNK_WIDTH, screens, seed))
+        index_offset = file.tell()
+        file.write(bytes(INDEX_ENTRY.size * screens))
+        index = bytearray()
+        for chunk in range(screens):
+            chunk_x = chunk * CHUNK_WIDTH
+            rng = random.Random(chunk_seed(terrain_seed, chunk_x))
+            runs = tile_runs(world.floor_tiles(chunk_x) + world.random_platform_tiles(chunk_x, rng))
+            spawns = [(spawn_random.random() < 0.5, spawn_random.randint(50, SCREEN_HEIGHT - 50)) for _ in range(LEVEL_SPAWNS_PER_CHUNK)]
+            index += INDEX_ENTRY.pack(file.tell(), len(runs), len(spawns))
+            file.write(b"".join(RUN_STRUCT.pack(*run) for run in runs))
+            file.write(b"".join(SPAWN_STRUCT.pack(*spawn) for spawn in spawns))
+        file.seek(index_offset)
+        file.write(index)
+
+
+"""
+Функция замера открытия уровня: время и память на открытие и чтение одного чанка в середине.
+"""
+def measure_open(path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    level = LevelFile(path)
+    tiles = level.chunk_tiles(level.length // 2)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{level.chunk_count} чанков: открытие и чтение чанка {elapsed * 1000:.3f} мс, "
+          f"пик памяти {peak / 1024:.1f} КБ, плиток в чанке {len(tiles)}")
+    level.close()
+
+
+# Проверка зерна при разборе аргументов, чтобы не упасть на записи заголовка
+def level_seed(value):
+    seed = int(value)
+    if not 0 <= seed <= MAX_LEVEL_SEED:
+        raise argparse.ArgumentTypeError(f"зерно должно быть от 0 до {MAX_LEVEL_SEED}")
+    return seed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Создание файла уровня с фиксированной трассой")
+    parser.add_argument("path", help="файл уровня")
+    parser.add_argument("--screens", type=int, default=1000, help="длина трассы в экранах")
+    parser.add_argument("--seed", type=level_seed, default=None, help="зерно; без него выбирается случайно")
+    parser.add_argument("--measure", action="store_true", help="не создавать, а замерить открытие готового файла")
+    args = parser.parse_args()
+
+    if args.measure:
+        measure_open(args.path)
+        return
+    seed = GameRandom(args.seed).seed
+    start = time.perf_counter()
+    generate_level(args.path, args.screens, seed)
+    print(f"Уровень {args.path}: {args.screens} экранов, зерно {seed}, {time.perf_counter() - start:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,393 +1,276 @@
-import arcade
-import random
 import time
 
-# Константы
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-SCREEN_TITLE = "Simple Platformer"
-PLAYER_MOVEMENT_SPEED = 5
-GRAVITY = 1
-PLAYER_JUMP_SPEED = 20
-PLAYER_SCALING = 1
-PROJECTILE_SPEED = 10
-ENEMY_SPEED = 2
-PLAYER_MAX_HEALTH = 5
-VIEWPORT_MARGIN = 200
-RIGHT_MARGIN = 400
-FALL_THRU_SPEED = -5
-TRIPLE_SHOOT_DURATION = 5  # Продолжительность стрельбы в три стороны (секунды)
-
-# Добавьте изображения для анимации монстров
-ENEMY_TEXTURES = ["images/s1_0.png", "images/s2_0.png", "images/s3_0.png", "images/s4_0.png"]
-
-""" 
-Класс, представляющий игрока.
-Отвечает за управление и обновление состояния игрока, включая передвижение, прыжки, стрельбу и здоровье.
-"""
-class Player(arcade.Sprite):
-    def __init__(self):
-        super().__init__("images/knight_0.png", PLAYER_SCALING)
-        self.center_x = 50
-        self.center_y = 100
-        self.change_x = 0
-        self.change_y = 0
-        self.jumping = False
-        self.facing_right = True
-        self.health = PLAYER_MAX_HEALTH
-        self.on_platform = False
-        self.triple_shoot = False
-        self.triple_shoot_end_time = 0
-
-    """
-    Функция обновления состояния игрока.
-    Обновляет позицию игрока, применяет гравитацию и проверяет столкновения.
-    """
-    def update(self):
-        self.center_x += self.change_x
-        self.center_y += self.change_y
-        self.change_y -= GRAVITY
-
-        if self.left < 0:
-            self.left = 0
+# Момент запуска, от которого отсчитываются фазы старта; стоит до тяжёлых импортов
+STARTUP_BEGIN = time.perf_counter()
 
-        if self.bottom < 0:
-            self.bottom = 0
+import argparse
+import os
 
-        if self.change_y != 0:
-            self.texture = arcade.load_texture("images/knight_1.png", mirrored=not self.facing_right)
-        else:
-            self.texture = arcade.load_texture("images/knight_0.png", mirrored=not self.facing_right)
-
-        # Отключение стрельбы в три стороны по истечении времени
-        if self.triple_shoot and time.time() > self.triple_shoot_end_time:
-            self.triple_shoot = False
-
-
-""" 
-Класс, представляющий платформу.
-Отвечает за создание платформ и их свойства, такие как позиция и является ли платформа полом.
-"""
-class Platform(arcade.Sprite):
-    def __init__(self, image, x, y, is_floor=False):
-        super().__init__(image, 1)
-        self.center_x = x
-        self.center_y = y
-        self.is_floor = is_floor
-
-
-"""
-Класс, представляющий снаряд.
-Отвечает за создание и движение снарядов, выпущенных игроком.
-"""
-class Projectile(arcade.Sprite):
-    def __init__(self, x, y, direction_x, direction_y=0):
-        super().__init__("images/coin_0.png", 0.5)
-        self.center_x = x
-        self.center_y = y
-        self.change_x = PROJECTILE_SPEED * direction_x
-        self.change_y = PROJECTILE_SPEED * direction_y
+import arcade
 
+import state
+from animation import load_animations
+from hud import Hud
+from levels import LevelFile
+from profiler import FrameProfiler, StartupProfiler
+from textures import registry
+from replay import Recorder
+from world import (
+    ACTION_CHEAT, ACTION_DOWN, ACTION_FIRE, ACTION_JUMP, ACTION_LEFT, ACTION_RIGHT, ACTION_THROTTLE, BACKEND_NUMPY,
+    BACKEND_SPRITES, PRESS, RELEASE, SCREEN_HEIGHT, SCREEN_WIDTH, TICK_DURATION, World,
+)
 
-    """ 
-    Функция обновления состояния снаряда.
-    Обновляет позицию снаряда и удаляет его, если он выходит за пределы экрана.
-    """
-    def update(self):
-        self.center_x += self.change_x
-        self.center_y += self.change_y
-        view_left, view_right, view_bottom, view_top = arcade.get_viewport()
-        if self.right < view_left or self.left > view_right or self.top < view_bottom or self.bottom > view_top:
-            self.remove_from_sprite_lists()
+SCREEN_TITLE = "Simple Platformer"
+# Максимум шагов симуляции за один кадр при обычной скорости, чтобы не догонять бесконечно после долгой паузы.
+# При ускорении (clock.time_scale > 1) предел растёт вместе с ним, иначе ускорение упиралось бы в этот предел
+MAX_STEPS_PER_FRAME = 5
+# Целевое время кадра и пороги перегрузки: выше THROTTLE_ENTER окно просит мир придержать появление врагов,
+# ниже THROTTLE_EXIT - отпускает (разные пороги, чтобы не переключаться на каждом кадре)
+FRAME_BUDGET = 1 / 60
+THROTTLE_ENTER = 1.25
+THROTTLE_EXIT = 1.05
+# Доля нового замера в сглаженном времени кадра
+FRAME_TIME_SMOOTHING = 0.1
+# Файл, в который F4 сохраняет замеры профилировщика, если не указан --profile-out
+DEFAULT_PROFILE_PATH = "profile.json"
+# Файл быстрого сохранения (F5 - сохранить, F9 - загрузить)
+QUICKSAVE_PATH = "quicksave.bin"
+
+# Соответствие клавиш действиям игрока
+KEY_ACTIONS = {
+    arcade.key.LEFT: ACTION_LEFT,
+    arcade.key.RIGHT: ACTION_RIGHT,
+    arcade.key.UP: ACTION_JUMP,
+    arcade.key.DOWN: ACTION_DOWN,
+    arcade.key.SPACE: ACTION_FIRE,
+}
 
 
 """
-Класс, представляющий врага.
-Отвечает за создание врагов, их движение и проверку столкновений с игроком.
-"""
-class Enemy(arcade.Sprite):
-    def __init__(self, x, y, direction):
-        # super().__init__("images/slime_green_10.png", 1)
-        super().__init__(ENEMY_TEXTURES[0], 1)
-        self.center_x = x
-        self.center_y = y
-        self.change_x = ENEMY_SPEED * direction
-        self.textures = [arcade.load_texture(texture) for texture in ENEMY_TEXTURES]
-        self.current_texture = 0
-        self.texture_change_frames = 10
-        self.frame_count = 0
-
-    """ 
-    Функция обновления состояния врага.
-    Обновляет позицию врага и изменяет направление при столкновении с краями платформ.
-    """
-    def update(self):
-        self.center_x += self.change_x
-        view_left, view_right, view_bottom, view_top = arcade.get_viewport()
-        if self.right < view_left or self.left > view_right:
-            self.remove_from_sprite_lists()
-
-        self.frame_count += 1
-        if self.frame_count % self.texture_change_frames == 0:
-            self.current_texture = (self.current_texture + 1) % len(self.textures)
-            self.texture = self.textures[self.current_texture]
-
-
-""" 
 Класс, представляющий игру.
-Отвечает за настройку игры, обработку ввода от пользователя и обновление игрового состояния.
+Отвечает за окно, отрисовку и перевод нажатий клавиш в события ввода для игрового мира.
+Вся симуляция находится в World и продвигается фиксированными шагами.
 """
 class Platformer(arcade.Window):
-    def __init__(self):
+    def __init__(self, seed=None, backend=BACKEND_SPRITES, stepper=None, record_path=None, profiler=None, profile_path=None, startup=None,
+                 level=None):
         super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
-        self.player = None
-        self.platform_list = None
-        self.projectile_list = None
-        self.enemy_list = None
-        self.kills = 0
-        self.game_over = False
-
-        self.view_left = 0
-        self.view_bottom = 0
-        self.end_of_map = 0
-        self.generated_x = 0
-        self.fall_through = False
-        self.cheat_activated = False
+        self.seed = seed
+        self.backend = backend
+        # Уровень из файла (levels.py); без него рельеф генерируется по зерну
+        self.level = level
+        # Профилировщик фаз кадра; F3 показывает оверлей, F4 сохраняет замеры
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.profile_path = profile_path
+        self.show_profile = False
+        # Объект, который шагает мир вместо World.step (запись или воспроизведение)
+        self.stepper = stepper
+        self.record_path = record_path
+        self.world = None
+        # Камера мира следует за видимой областью, камера интерфейса неподвижна
+        self.camera = arcade.Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.hud_camera = arcade.Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.hud = None
+        # Замер фаз запуска; после первого кадра печатается и сбрасывается
+        self.startup = startup
+        # События ввода, накопленные до следующего шага мира
+        self.pending_inputs = []
+        self.time_accumulator = 0
+        # Сглаженное время кадра и то, попросило ли окно мир придержать появление врагов
+        self.frame_time = FRAME_BUDGET
+        self.throttled = False
 
-    """ 
+    """
     Функция настройки игры.
-    Инициализирует игрока, платформы, снаряды, врагов и физический движок.
+    Создаёт игровой мир.
+    Сразу загружаются только текстуры первого экрана, остальные догружаются в фоне.
     """
     def setup(self):
         arcade.set_background_color(arcade.color.SKY_BLUE)
-        self.player = Player()
-        self.platform_list = arcade.SpriteList()
-        self.projectile_list = arcade.SpriteList()
-        self.enemy_list = arcade.SpriteList()
-
-        # Создание начального пола
-        for x in range(0, SCREEN_WIDTH, 64):
-            platform = Platform("images/platform_0.png", x, 32, is_floor=True)
-            self.platform_list.append(platform)
-
-        # Создание случайных воздушных платформ
-        self.create_random_platforms()
-
-        # Добавление врагов и монет
-        self.spawn_entities()
-
-    def create_random_platforms(self):
-        levels = 0  # Количество уровней платформ
-        for level in range(1, levels + 3):
-            num_platforms = random.randint(2, 5)  # Случайное количество платформ на уровне
-            for _ in range(num_platforms):
-                x = random.randint(self.generated_x, self.generated_x + SCREEN_WIDTH)
-                y = random.randint(150, SCREEN_HEIGHT - 64)
-                platform = Platform("images/platform_1.png", x, y)
-                self.platform_list.append(platform)
-        self.generated_x += SCREEN_WIDTH
-
-    def create_floor(self):
-        for x in range(self.generated_x, self.generated_x + SCREEN_WIDTH, 64):
-            platform = Platform("images/platform_0.png", x, 32, is_floor=True)
-            self.platform_list.append(platform)
+        load_animations(lazy=True)
+        self.hud = Hud()
+        if self.startup:
+            self.startup.lap("assets")
+        self.world = World(self.seed, self.backend, profiler=self.profiler, level=self.level)
+        self.world.setup()
+        if self.startup:
+            self.startup.lap("world")
+        print(f"Зерно мира: {self.world.seed}")
+        if self.record_path:
+            self.stepper = Recorder(self.world)
 
-    def spawn_entities(self, num_enemies=4):
-        view_left, view_right, view_bottom, view_top = arcade.get_viewport()
-        for _ in range(num_enemies):  # Генерация num_enemies врагов
-            side = random.choice(["left", "right"])
-            y = random.randint(50, SCREEN_HEIGHT - 50)
-            direction = 1 if side == "left" else -1
-            x = view_left if side == "left" else view_right
-            enemy = Enemy(x, y, direction)
-            self.enemy_list.append(enemy)
-
-    """ 
+    """
     Функция обработки отрисовки.
     Отвечает за отрисовку всех игровых объектов и интерфейса.
     """
     def on_draw(self):
+        profiler = self.profiler
+        start = profiler.begin()
         arcade.start_render()
-        self.platform_list.draw()
-        self.player.draw()
-        self.projectile_list.draw()
-        self.enemy_list.draw()
-        # Отрисовка здоровья
-        self.draw_health()
-        # Отрисовка количества убитых врагов
-        self.draw_kills()
-        # Отрисовка улучшений
-        self.draw_power_ups()
-        if self.game_over:
-            self.draw_game_over_screen()
-
-    def draw_health(self):
-        health_text = f"HP: {self.player.health}"
-        arcade.draw_text(health_text, 10 + self.view_left, SCREEN_HEIGHT - 20 + self.view_bottom, arcade.color.WHITE, 14)
-        for i in range(self.player.health):
-            arcade.draw_text("❤️", 60 + i * 20 + self.view_left, SCREEN_HEIGHT - 20 + self.view_bottom, arcade.color.RED, 14)
-
-    def draw_kills(self):
-        kills_text = f"Kills: {self.kills}"
-        arcade.draw_text(kills_text, SCREEN_WIDTH - 100 + self.view_left, SCREEN_HEIGHT - 20 + self.view_bottom, arcade.color.WHITE, 14)
-
-    def draw_power_ups(self):
-        if self.player.triple_shoot:
-            time_left = int(self.player.triple_shoot_end_time - time.time())
-            if time_left > 0:
-                power_up_text = f"Тройной выстрел: {time_left}"
-                arcade.draw_text(power_up_text, 10 + self.view_left, SCREEN_HEIGHT - 40 + self.view_bottom, arcade.color.WHITE, 14)
+        self.camera.use()
+        # Перенос состояния врагов и снарядов в спрайты (нужно только для массивов NumPy)
+        self.world.entities.sync_sprites()
+        start = profiler.lap("draw_sync", start)
+        for platform_list in self.world.visible_platform_lists():
+            platform_list.draw()
+        start = profiler.lap("draw_platforms", start)
+        self.world.player.draw()
+        start = profiler.lap("draw_player", start)
+        self.world.projectile_list.draw()
+        start = profiler.lap("draw_projectiles", start)
+        self.world.enemy_list.draw()
+        start = profiler.lap("draw_enemies", start)
+        # Интерфейс рисуется в координатах экрана своей камерой
+        self.hud_camera.use()
+        self.hud.update(self.world)
+        start = profiler.lap("hud_update", start)
+        self.hud.draw(self.world.game_over)
+        profiler.lap("draw_hud", start)
+        if self.show_profile:
+            self.draw_profile()
+        if self.startup:
+            self.startup.lap("first_frame")
+            print("Фазы запуска:")
+            print("\n".join(self.startup.lines()))
+            print(f"Текстуры: {registry.stats()}")
+            self.startup = None
+
+    def draw_profile(self):
+        for i, line in enumerate(self.profiler.lines()):
+            arcade.draw_text(line, 10, SCREEN_HEIGHT - 70 - i * 14, arcade.color.BLACK, 10, font_name="Courier New")
 
-    def draw_game_over_screen(self):
-        arcade.draw_rectangle_filled(self.view_left + SCREEN_WIDTH // 2, self.view_bottom + SCREEN_HEIGHT // 2, SCREEN_WIDTH, SCREEN_HEIGHT, arcade.color.BLACK)
-        arcade.draw_text("ТЫ УМЕР", self.view_left + SCREEN_WIDTH // 2, self.view_bottom + SCREEN_HEIGHT // 2 + 20, arcade.color.RED, 50, anchor_x="center")
-        arcade.draw_text(f"Ты убил {self.kills} монстров", self.view_left + SCREEN_WIDTH // 2, self.view_bottom + SCREEN_HEIGHT // 2 - 20, arcade.color.RED, 20, anchor_x="center")
-
-    """ 
+    """
     Функция обновления состояния игры.
-    Отвечает за обновление всех игровых объектов и проверку условий конца игры.
-    
+    Переводит прошедшее время в игровое (пауза, ускорение), продвигает мир
+    фиксированными шагами TICK_DURATION и сдвигает камеру вслед за ним.
+
     Параметры:
     delta_time (float): Время, прошедшее с последнего обновления.
     """
     def update(self, delta_time):
-        if self.game_over:
-            return
-
-        self.player.update()
-        self.projectile_list.update()
-        self.enemy_list.update()
-
-        # Проверка столкновений с платформами
-        if not self.fall_through:
-            platforms_hit = arcade.check_for_collision_with_list(self.player, self.platform_list)
-            if platforms_hit:
-                self.player.jumping = False
-                self.player.change_y = 0
-                self.player.on_platform = True
+        start = self.profiler.begin()
+        world = self.world
+        self.watch_frame_time(delta_time)
+        max_steps = MAX_STEPS_PER_FRAME * max(1.0, world.clock.time_scale)
+        self.time_accumulator = min(self.time_accumulator + world.clock.scaled(delta_time), max_steps * TICK_DURATION)
+        while self.time_accumulator >= TICK_DURATION:
+            if self.stepper is not None:
+                self.stepper.step(world, self.pending_inputs)
             else:
-                self.player.on_platform = False
-
-        # Проверка столкновений снарядов с врагами
-        for projectile in self.projectile_list:
-            hit_list = arcade.check_for_collision_with_list(projectile, self.enemy_list)
-            if hit_list:
-                projectile.remove_from_sprite_lists()
-                for enemy in hit_list:
-                    enemy.remove_from_sprite_lists()
-                    self.kills += 1
-                    # Включение стрельбы в три стороны при убийстве каждого 10-го врага
-                    if self.kills % 10 == 0:
-                        self.player.triple_shoot = True
-                        self.player.triple_shoot_end_time = time.time() + TRIPLE_SHOOT_DURATION
-
-        # Проверка столкновений игрока с врагами
-        for enemy in self.enemy_list:
-            if arcade.check_for_collision(self.player, enemy):
-                enemy.remove_from_sprite_lists()
-                self.player.health -= 1
-                if self.player.health <= 0:
-                    self.game_over = True
-
-        # Спавн врагов через каждые несколько секунд
-        if random.randint(1, 180) == 1:  # Увеличение интервала между спавном врагов
-            self.spawn_entities(num_enemies=1)
-
-        # Прокрутка мира
-        self.scroll_viewport()
-
-    def scroll_viewport(self):
-        changed = False
-
-        left_boundary = self.view_left + VIEWPORT_MARGIN
-        if self.player.left < left_boundary:
-            self.view_left -= left_boundary - self.player.left
-            changed = True
+                world.step(self.pending_inputs)
+            self.pending_inputs = []
+            self.time_accumulator -= TICK_DURATION
 
-        right_boundary = self.view_left + SCREEN_WIDTH - VIEWPORT_MARGIN
-        if self.player.right > right_boundary:
-            self.view_left += self.player.right - right_boundary
-            changed = True
+        self.camera.move_to((world.view_left, world.view_bottom))
+        self.profiler.lap("update_total", start)
 
-        if changed:
-            self.view_left = int(self.view_left)
-            self.view_bottom = int(self.view_bottom)
-            arcade.set_viewport(self.view_left, SCREEN_WIDTH + self.view_left, self.view_bottom, SCREEN_HEIGHT + self.view_bottom)
-            if self.view_left + SCREEN_WIDTH >= self.generated_x:
-                self.create_floor()
-                self.create_random_platforms()
-                self.spawn_entities(num_enemies=2)
+    """
+    Функция слежения за временем кадра.
+    Когда сглаженное время кадра выходит за бюджет, в мир уходит событие ACTION_THROTTLE,
+    и распорядитель появления врагов замедляется; когда кадры снова укладываются - отпускание.
+    Это событие ввода, поэтому оно попадает в запись и повтор идёт так же.
+    """
+    def watch_frame_time(self, delta_time):
+        self.frame_time += (delta_time - self.frame_time) * FRAME_TIME_SMOOTHING
+        if not self.throttled and self.frame_time > FRAME_BUDGET * THROTTLE_ENTER:
+            self.throttled = True
+            self.pending_inputs.append((PRESS, ACTION_THROTTLE))
+        elif self.throttled and self.frame_time < FRAME_BUDGET * THROTTLE_EXIT:
+            self.throttled = False
+            self.pending_inputs.append((RELEASE, ACTION_THROTTLE))
 
-    """ 
+    """
     Функция обработки нажатия клавиш.
-    Отвечает за обработку ввода от пользователя и выполнение соответствующих действий.
-    
+    Переводит нажатую клавишу в событие ввода для следующего шага мира.
+
     Параметры:
     key (int): Код нажатой клавиши.
     modifiers (int): Модификаторы клавиш (например, Shift, Ctrl).
     """
     def on_key_press(self, key, modifiers):
-        if self.game_over:
-            return
-
-        if key == arcade.key.UP:
-            if self.player.on_platform:
-                self.player.change_y = PLAYER_JUMP_SPEED
-                self.player.jumping = True
-                self.player.on_platform = False
-        elif key == arcade.key.LEFT:
-            self.player.change_x = -PLAYER_MOVEMENT_SPEED
-            self.player.facing_right = False
-        elif key == arcade.key.RIGHT:
-            self.player.change_x = PLAYER_MOVEMENT_SPEED
-            self.player.facing_right = True
-        elif key == arcade.key.DOWN:
-            if self.player.on_platform and not self.fall_through:
-                platforms_hit = arcade.check_for_collision_with_list(self.player, self.platform_list)
-                if platforms_hit:
-                    for platform in platforms_hit:
-                        if not platform.is_floor:
-                            self.fall_through = True
-                            self.player.change_y = FALL_THRU_SPEED
-                            break
-        elif key == arcade.key.SPACE:
-            direction = 1 if self.player.facing_right else -1
-            projectile = Projectile(self.player.center_x, self.player.center_y, direction)
-            self.projectile_list.append(projectile)
-            if self.player.triple_shoot:
-                # Стрельба влево, вправо и вверх
-                projectile_left = Projectile(self.player.center_x, self.player.center_y, -1)
-                self.projectile_list.append(projectile_left)
-                projectile_up = Projectile(self.player.center_x, self.player.center_y, 0, 1)
-                self.projectile_list.append(projectile_up)
-                projectile_right = Projectile(self.player.center_x, self.player.center_y, 1)
-                self.projectile_list.append(projectile_right)
+        if key == arcade.key.P:
+            # Пауза останавливает игровые часы, а вместе с ними и мир
+            self.world.clock.paused = not self.world.clock.paused
+        elif key == arcade.key.F3:
+            # Оверлей включает и профилировщик: без него показывать нечего
+            self.show_profile = not self.show_profile
+            if self.show_profile:
+                self.profiler.enabled = True
+        elif key == arcade.key.F4:
+            path = self.profile_path or DEFAULT_PROFILE_PATH
+            self.profiler.dump(path)
+            print(f"Замеры профилировщика сохранены в {path}")
+        elif key == arcade.key.F5:
+            state.save(self.world, QUICKSAVE_PATH)
+            print(f"Игра сохранена в {QUICKSAVE_PATH}")
+        elif key == arcade.key.F9 and os.path.exists(QUICKSAVE_PATH):
+            self.quickload()
         elif key == arcade.key.KEY_1 and modifiers & arcade.key.MOD_CTRL:
-            if self.player.triple_shoot:
-                self.player.triple_shoot_end_time += 15
-            else:
-                self.player.triple_shoot = True
-                self.player.triple_shoot_end_time = time.time() + 15
+            self.pending_inputs.append((PRESS, ACTION_CHEAT))
+        elif key in KEY_ACTIONS:
+            self.pending_inputs.append((PRESS, KEY_ACTIONS[key]))
+
+    """
+    Функция быстрой загрузки (F9).
+    Во время записи загрузка запрещена: запись начата с нового мира и не воспроизведёт подменённый.
+    Сохранение с другим режимом хранения, другим зерном (если зерно задано при запуске),
+    другим уровнем или другими ёмкостями пулов не загружается.
+    """
+    def quickload(self):
+        if self.record_path:
+            print("Во время записи загрузка недоступна")
+            return
+        try:
+            world = state.load(QUICKSAVE_PATH, profiler=self.profiler, level=self.level,
+                               enemy_capacity=self.world.enemy_capacity, projectile_capacity=self.world.projectile_capacity)
+        except ValueError as error:
+            print(f"Сохранение не загружено: {error}")
+            return
+        if world.backend != self.backend or (self.seed is not None and world.seed != self.seed):
+            print(f"Сохранение сделано для другого мира: зерно {world.seed}, режим {world.backend}")
+            return
+        self.world = world
+        self.pending_inputs = []
 
-    """ 
+    """
     Функция обработки отпускания клавиш.
-    Отвечает за остановку движения игрока при отпускании клавиш направления.
-    
+    Переводит отпущенную клавишу в событие ввода для следующего шага мира.
+
     Параметры:
     key (int): Код отпущенной клавиши.
     modifiers (int): Модификаторы клавиш (например, Shift, Ctrl).
     """
     def on_key_release(self, key, modifiers):
-        if self.game_over:
-            return
+        if key in KEY_ACTIONS:
+            self.pending_inputs.append((RELEASE, KEY_ACTIONS[key]))
 
-        if key == arcade.key.LEFT or key == arcade.key.RIGHT:
-            self.player.change_x = 0
-        elif key == arcade.key.DOWN:
-            self.fall_through = False
+    def on_close(self):
+        if self.record_path:
+            self.stepper.save(self.record_path)
+            print(f"Запись сохранена в {self.record_path}")
+        if self.profile_path:
+            self.profiler.dump(self.profile_path)
+        super().on_close()
 
 def main():
-    window = Platformer()
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--seed", type=int, default=None, help="зерно мира; без него выбирается случайно")
+    parser.add_argument("--backend", choices=[BACKEND_SPRITES, BACKEND_NUMPY], default=BACKEND_SPRITES,
+                        help="хранение врагов и снарядов: спрайты или массивы NumPy")
+    parser.add_argument("--record", help="записать ввод в файл для воспроизведения (replay.py)")
+    parser.add_argument("--profile", action="store_true", help="включить профилировщик фаз кадра с самого начала")
+    parser.add_argument("--profile-out", help="сохранить замеры профилировщика при выходе (.csv или .json)")
+    parser.add_argument("--level", help="файл уровня (levels.py) вместо процедурного рельефа")
+    args = parser.parse_args()
+    if args.record and args.level:
+        parser.error("--record нельзя сочетать с --level: запись не хранит уровень")
+    startup = StartupProfiler(STARTUP_BEGIN)
+    startup.lap("imports")
+
+    profiler = FrameProfiler(enabled=args.profile or bool(args.profile_out))
+    window = Platformer(args.seed, args.backend, record_path=args.record, profiler=profiler, profile_path=args.profile_out,
+                        startup=startup, level=LevelFile(args.level) if args.level else None)
+    startup.lap("window")
     window.setup()
     arcade.run()
 
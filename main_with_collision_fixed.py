@@ -2,6 +2,10 @@ import arcade
 import random
 import time
 
+from physics import PlatformPhysics, swept_overlaps
+from spatial_hash import SpatialHash
+from textures import KNIGHT_TEXTURES, PROJECTILE_TEXTURES, load_textures, registry
+
 # Константы
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -20,7 +24,10 @@ TRIPLE_SHOOT_DURATION = 5  # Продолжительность стрельбы
 
 class Player(arcade.Sprite):
     def __init__(self):
-        super().__init__("images/knight_0.png", PLAYER_SCALING)
+        super().__init__(scale=PLAYER_SCALING, texture=registry.get(KNIGHT_TEXTURES[0]))
+        # Ссылки на кадры из реестра: [смотрит вправо, смотрит влево]
+        self.stand_textures = [registry.get(KNIGHT_TEXTURES[0]), registry.get(KNIGHT_TEXTURES[0], mirrored=True)]
+        self.jump_textures = [registry.get(KNIGHT_TEXTURES[1]), registry.get(KNIGHT_TEXTURES[1], mirrored=True)]
         self.center_x = 50
         self.center_y = 100
         self.change_x = 0
@@ -31,48 +38,27 @@ class Player(arcade.Sprite):
         self.on_platform = False
         self.triple_shoot = False
         self.triple_shoot_end_time = 0
-        self.platform_list = None
 
+    # Движение и приземление на платформы считает PlatformPhysics, здесь только текстура и таймер
     def update(self):
-        initial_x = self.center_x
-        initial_y = self.center_y
-        
-        self.center_x += self.change_x
-        self.center_y += self.change_y
-        self.change_y -= GRAVITY
-
-        collisions = arcade.check_for_collision_with_list(self, self.platform_list)
-        for platform in collisions:
-            if self.change_y < 0:  # Только если падаем
-                if self.bottom >= platform.top:
-                    self.bottom = platform.top
-                    self.change_y = 0
-                    self.on_platform = True
-
-        if self.left < 0:
-            self.left = 0
-
-        if self.bottom < 0:
-            self.bottom = 0
-
         if self.change_y != 0:
-            self.texture = arcade.load_texture("images/knight_1.png", mirrored=not self.facing_right)
+            self.texture = self.jump_textures[not self.facing_right]
         else:
-            self.texture = arcade.load_texture("images/knight_0.png", mirrored=not self.facing_right)
+            self.texture = self.stand_textures[not self.facing_right]
 
         if self.triple_shoot and time.time() > self.triple_shoot_end_time:
             self.triple_shoot = False
 
 class Platform(arcade.Sprite):
     def __init__(self, image, x, y, is_floor=False):
-        super().__init__(image, 1)
+        super().__init__(scale=1, texture=registry.get(image))
         self.center_x = x
         self.center_y = y
         self.is_floor = is_floor
 
 class Projectile(arcade.Sprite):
     def __init__(self, x, y, direction_x, direction_y=0):
-        super().__init__("images/coin_0.png", 0.5)
+        super().__init__(scale=0.5, texture=registry.get(PROJECTILE_TEXTURES[0]))
         self.center_x = x
         self.center_y = y
         self.change_x = PROJECTILE_SPEED * direction_x
@@ -86,7 +72,7 @@ class Projectile(arcade.Sprite):
 
 class Enemy(arcade.Sprite):
     def __init__(self, image, x, y):
-        super().__init__(image, 1)
+        super().__init__(scale=1, texture=registry.get(image))
         self.center_x = x
         self.center_y = y
         self.change_x = ENEMY_SPEED
@@ -105,20 +91,21 @@ class Platformer(arcade.Window):
         self.platform_list = None
         self.projectile_list = None
         self.enemy_list = None
-        self.physics_engine = None
+        self.platform_index = None
+        self.physics = None
         self.view_left = 0
         self.view_bottom = 0
         self.game_over = False
         self.fall_through = False
 
     def setup(self):
+        # Все текстуры загружаются один раз, дальше спрайты берут их из реестра
+        load_textures()
         self.player = Player()
         self.platform_list = arcade.SpriteList()
         self.projectile_list = arcade.SpriteList()
         self.enemy_list = arcade.SpriteList()
 
-        self.player.platform_list = self.platform_list
-
         floor = Platform("images/platform_0.png", SCREEN_WIDTH // 2, 32, is_floor=True)
         self.platform_list.append(floor)
         for i in range(5):
@@ -129,7 +116,11 @@ class Platformer(arcade.Window):
             enemy = Enemy("images/platform_1.png", random.randint(50, SCREEN_WIDTH - 50), random.randint(200, 400))
             self.enemy_list.append(enemy)
 
-        self.physics_engine = arcade.PhysicsEnginePlatformer(self.player, self.platform_list, gravity_constant=GRAVITY)
+        # Одна физика на шаг вместо собственной проверки игрока и PhysicsEnginePlatformer поверх неё
+        self.platform_index = SpatialHash()
+        for platform in self.platform_list:
+            self.platform_index.insert(platform)
+        self.physics = PlatformPhysics(self.platform_index, GRAVITY)
 
     def on_draw(self):
         arcade.start_render()
@@ -143,13 +134,13 @@ class Platformer(arcade.Window):
 
     def update(self, delta_time):
         if not self.game_over:
+            self.physics.move(self.player, self.fall_through)
             self.player.update()
             self.projectile_list.update()
             self.enemy_list.update()
-            self.physics_engine.update()
 
             for projectile in self.projectile_list:
-                if arcade.check_for_collision_with_list(projectile, self.enemy_list):
+                if any(swept_overlaps(projectile, enemy) for enemy in self.enemy_list):
                     projectile.kill()
 
             if self.player.health <= 0:
@@ -171,14 +162,11 @@ class Platformer(arcade.Window):
             self.player.change_x = PLAYER_MOVEMENT_SPEED
             self.player.facing_right = True
         elif key == arcade.key.DOWN:
-            if self.player.on_platform and not self.fall_through:
-                platforms_hit = arcade.check_for_collision_with_list(self.player, self.platform_list)
-                if platforms_hit:
-                    for platform in platforms_hit:
-                        if not platform.is_floor:
-                            self.fall_through = True
-                            self.player.change_y = FALL_THRU_SPEED
-                            break
+            if not self.fall_through:
+                ground = self.physics.ground(self.player)
+                if ground is not None and not ground.is_floor:
+                    self.fall_through = True
+                    self.player.change_y = FALL_THRU_SPEED
         elif key == arcade.key.SPACE:
             direction = 1 if self.player.facing_right else -1
             projectile = Projectile(self.player.center_x, self.player.center_y, direction)
@@ -0,0 +1,126 @@
+# Допуск при сравнении нижнего края тела с верхом платформы (погрешность float)
+GROUND_EPSILON = 1e-6
+
+
+"""
+Класс, представляющий неподвижный прямоугольник столкновений (запечённый участок пола или платформы).
+"""
+class SolidRect:
+    __slots__ = ("left", "right", "bottom", "top", "is_floor")
+
+    def __init__(self, left, right, bottom, top, is_floor=False):
+        self.left = left
+        self.right = right
+        self.bottom = bottom
+        self.top = top
+        self.is_floor = is_floor
+
+
+"""
+Функция вычисления прямоугольника, заметённого объектом за последний шаг.
+Объект уже сдвинут на (change_x, change_y); прямоугольник охватывает его положение
+до и после сдвига, поэтому быстрый объект не проскакивает сквозь тонкую цель.
+Возвращает (left, right, bottom, top).
+"""
+def swept_box(mover):
+    change_x = mover.change_x
+    change_y = mover.change_y
+    return (mover.left - max(change_x, 0), mover.right - min(change_x, 0),
+            mover.bottom - max(change_y, 0), mover.top - min(change_y, 0))
+
+
+"""
+Функция проверки столкновения движущегося объекта с неподвижным за последний шаг (swept AABB).
+"""
+def swept_overlaps(mover, other):
+    left, right, bottom, top = swept_box(mover)
+    return left < other.right and other.left < right and bottom < other.top and other.bottom < top
+
+
+"""
+Функция поиска объектов индекса, задетых движущимся объектом за последний шаг.
+
+Параметры:
+mover: Объект со свойствами left, right, bottom, top, change_x, change_y.
+index (SpatialHash): Индекс целей.
+"""
+def swept_collide(mover, index):
+    left, right, bottom, top = swept_box(mover)
+    return [other for other in index.query(left, right, bottom, top)
+            if left < other.right and other.left < right and bottom < other.top and other.bottom < top]
+
+
+"""
+Класс, представляющий физику игрока платформера.
+Тело сдвигается один раз за шаг: по горизонтали свободно, по вертикали - с проверкой,
+не пересёк ли нижний край тела верх какой-нибудь платформы за этот шаг (swept AABB).
+Платформы односторонние: сквозь них можно запрыгнуть снизу, а приземлиться можно только сверху.
+Пока включено спрыгивание (fall_through), платформы пропускаются, кроме пола (is_floor).
+Стоящее на платформе тело не падает сквозь неё на 1 пиксель за шаг, как при простой проверке пересечения.
+
+Параметры:
+platforms (SpatialHash): Индекс статических платформ (свойства left, right, top и is_floor).
+gravity (float): Ускорение свободного падения за шаг.
+"""
+class PlatformPhysics:
+    def __init__(self, platforms, gravity):
+        self.platforms = platforms
+        self.gravity = gravity
+
+    """
+    Функция поиска самой высокой платформы, верх которой лежит между bottom и previous_bottom
+    и которая перекрывается с телом по горизонтали.
+    """
+    def _landing(self, left, right, bottom, previous_bottom, fall_through):
+        landing = None
+        for platform in self.platforms.query(left, right, bottom - GROUND_EPSILON, previous_bottom + GROUND_EPSILON):
+            if fall_through and not platform.is_floor:
+                continue
+            top = platform.top
+            if (platform.left < right and left < platform.right
+                    and bottom - GROUND_EPSILON <= top <= previous_bottom + GROUND_EPSILON
+                    and (landing is None or top > landing.top)):
+                landing = platform
+        return landing
+
+    """
+    Функция шага тела.
+    Сдвигает тело на его скорость, при пересечении верха платформы ставит его на неё,
+    иначе применяет гравитацию. Возвращает платформу, на которой стоит тело, или None.
+
+    Параметры:
+    body: Спрайт с center_x, center_y, change_x, change_y, jumping и on_platform.
+    fall_through (bool): Спрыгивание: не приземляться на платформы, кроме пола.
+    """
+    def move(self, body, fall_through=False):
+        previous_bottom = body.bottom
+        body.center_x += body.change_x
+        body.center_y += body.change_y
+        landing = None
+        if body.change_y <= 0:
+            landing = self._landing(body.left, body.right, body.bottom, previous_bottom, fall_through)
+        if landing is not None:
+            body.bottom = landing.top
+            body.change_y = 0
+            body.jumping = False
+            body.on_platform = True
+        else:
+            body.change_y -= self.gravity
+            body.on_platform = False
+
+        if body.left < 0:
+            body.left = 0
+        if body.bottom < 0:
+            body.bottom = 0
+            body.change_y = 0
+        return landing
+
+    """
+    Функция поиска платформы, на которой стоит тело.
+    Возвращает None, если тело не стоит ни на одной платформе.
+    """
+    def ground(self, body):
+        if not body.on_platform:
+            return None
+        bottom = body.bottom
+        return self._landing(body.left, body.right, bottom, bottom, False)
@@ -0,0 +1,139 @@
+import heapq
+
+import arcade
+
+# Что делать, когда в пуле не осталось свободных спрайтов
+POLICY_DROP = "drop"        # не создавать новый объект
+POLICY_RECYCLE = "recycle"  # забрать самый старый активный объект
+POLICY_GROW = "grow"        # создать объект сверх ёмкости
+
+
+"""
+Класс, представляющий спрайт, который может жить в пуле.
+Когда спрайт убирают из списков (remove_from_sprite_lists или kill),
+он сам возвращается в свой пул вместо того, чтобы стать мусором.
+"""
+class PooledSprite(arcade.Sprite):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        # Постоянный номер спрайта в его пуле
+        self.slot = None
+
+    def remove_from_sprite_lists(self):
+        super().remove_from_sprite_lists()
+        if self.pool is not None:
+            self.pool.reclaim(self)
+
+
+"""
+Класс, представляющий пул спрайтов фиксированной ёмкости.
+Выдаёт спрайты из запаса, переинициализируя их на месте через reset(*args),
+и добавляет в список спрайтов; убранные из списка спрайты возвращаются в запас.
+Из запаса первым выдаётся спрайт с наименьшим номером, как ячейки в soa.EntityArrays,
+поэтому оба способа хранения нумеруют объекты одинаково.
+
+Параметры:
+factory (callable): Создаёт новый спрайт без аргументов.
+sprite_list (arcade.SpriteList): Список, в который попадают активные спрайты.
+capacity (int): Максимальное количество спрайтов пула.
+policy (str): Поведение при исчерпании пула (POLICY_DROP, POLICY_RECYCLE, POLICY_GROW).
+prefill (bool): Создать все спрайты заранее.
+on_reclaim (callable): Вызывается со спрайтом, вернувшимся в запас (например, чтобы остановить его анимацию).
+"""
+class SpritePool:
+    def __init__(self, factory, sprite_list, capacity, policy=POLICY_DROP, prefill=True, on_reclaim=None):
+        self.factory = factory
+        self.sprite_list = sprite_list
+        self.capacity = capacity
+        self.policy = policy
+        self.on_reclaim = on_reclaim
+        # Запас - куча пар (номер, спрайт)
+        self.free = []
+        # Активные спрайты в порядке выдачи, первый - самый старый
+        self.active = {}
+        self.created = 0
+        self.exhausted = 0
+        if prefill:
+            for _ in range(capacity):
+                sprite = self._create()
+                self.free.append((sprite.slot, sprite))
+
+    def _create(self):
+        sprite = self.factory()
+        sprite.pool = self
+        sprite.slot = self.created
+        self.created += 1
+        return sprite
+
+    @property
+    def active_count(self):
+        return len(self.active)
+
+    @property
+    def free_count(self):
+        return len(self.free)
+
+    """
+    Функция получения спрайта из пула.
+    Возвращает переинициализированный спрайт, уже добавленный в список,
+    или None, если пул исчерпан и политика POLICY_DROP.
+    """
+    def acquire(self, *args):
+        if self.free:
+            sprite = heapq.heappop(self.free)[1]
+        elif self.created < self.capacity or self.policy == POLICY_GROW:
+            if self.created >= self.capacity:
+                self.exhausted += 1
+            sprite = self._create()
+        else:
+            self.exhausted += 1
+            if self.policy != POLICY_RECYCLE or not self.active:
+                return None
+            next(iter(self.active)).remove_from_sprite_lists()
+            sprite = heapq.heappop(self.free)[1]
+        sprite.reset(*args)
+        self.active[sprite] = None
+        self.sprite_list.append(sprite)
+        return sprite
+
+    """
+    Функция получения из запаса спрайта с заданным номером (для восстановления снимка состояния).
+    Возвращает переинициализированный спрайт, уже добавленный в список.
+    """
+    def acquire_slot(self, slot, *args):
+        # Без заполнения заранее спрайт с таким номером может быть ещё не создан
+        while self.created <= slot < self.capacity:
+            sprite = self._create()
+            heapq.heappush(self.free, (sprite.slot, sprite))
+        for i, (free_slot, sprite) in enumerate(self.free):
+            if free_slot == slot:
+                break
+        else:
+            raise ValueError(f"Спрайт {slot} не свободен в пуле")
+        self.free[i] = self.free[-1]
+        self.free.pop()
+        heapq.heapify(self.free)
+        sprite.reset(*args)
+        self.active[sprite] = None
+        self.sprite_list.append(sprite)
+        return sprite
+
+    """
+    Функция возврата спрайта в запас.
+    Вызывается самим спрайтом после удаления из списков.
+    """
+    def reclaim(self, sprite):
+        if sprite in self.active:
+            del self.active[sprite]
+            heapq.heappush(self.free, (sprite.slot, sprite))
+            if self.on_reclaim is not None:
+                self.on_reclaim(sprite)
+
+    def stats(self):
+        return {
+            "active": self.active_count,
+            "free": self.free_count,
+            "capacity": self.capacity,
+            "exhausted": self.exhausted,
+        }
@@ -0,0 +1,148 @@
+import csv
+import json
+import time
+
+# Сколько последних замеров хранится для каждой фазы (10 секунд при 60 FPS)
+PROFILE_WINDOW = 600
+PERCENTILES = (50, 95, 99)
+
+
+"""
+Класс, представляющий кольцевой буфер замеров одной фазы кадра.
+"""
+class RingBuffer:
+    __slots__ = ("values", "index", "count")
+
+    def __init__(self, size):
+        self.values = [0.0] * size
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % len(self.values)
+        if self.count < len(self.values):
+            self.count += 1
+
+    def samples(self):
+        return self.values[:self.count]
+
+
+"""
+Функция вычисления перцентиля по отсортированному списку (метод ближайшего ранга).
+"""
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+"""
+Класс, представляющий профилировщик фаз кадра.
+Замеры делаются цепочкой: start = begin(), затем start = lap("фаза", start) после каждой фазы,
+так что на фазу приходится один вызов perf_counter.
+Выключенный профилировщик возвращает 0 и ничего не записывает, поэтому его можно оставлять в коде всегда.
+"""
+class FrameProfiler:
+    def __init__(self, enabled=False, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.phases = {}
+
+    def begin(self):
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    """
+    Функция записи времени фазы.
+    Записывает время с момента start под именем name и возвращает начало следующей фазы.
+    """
+    def lap(self, name, start):
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        buffer = self.phases.get(name)
+        if buffer is None:
+            buffer = self.phases[name] = RingBuffer(self.window)
+        buffer.add(now - start)
+        return now
+
+    def reset(self):
+        self.phases.clear()
+
+    """
+    Функция сводки по фазам.
+    Возвращает для каждой фазы перцентили и среднее в миллисекундах.
+    """
+    def summary(self):
+        result = {}
+        for name, buffer in self.phases.items():
+            samples = sorted(buffer.samples())
+            stats = {f"p{percent}": percentile(samples, percent) * 1000 for percent in PERCENTILES}
+            stats["mean"] = sum(samples) / len(samples) * 1000 if samples else 0.0
+            stats["samples"] = len(samples)
+            result[name] = stats
+        return result
+
+    """
+    Функция сохранения сводки в файл.
+    Формат выбирается по расширению: .csv или .json.
+    """
+    def dump(self, path):
+        summary = self.summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(["phase"] + [f"p{percent}_ms" for percent in PERCENTILES] + ["mean_ms", "samples"])
+                for name, stats in summary.items():
+                    writer.writerow([name] + [f"{stats[f'p{percent}']:.4f}" for percent in PERCENTILES]
+                                    + [f"{stats['mean']:.4f}", stats["samples"]])
+        else:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(summary, file, ensure_ascii=False, indent=2)
+
+    """
+    Функция текстового представления сводки для оверлея и консоли.
+    """
+    def lines(self):
+        lines = [f"{'фаза':<22}{'p50':>8}{'p95':>8}{'p99':>8}  мс"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<22}{stats['p50']:>8.3f}{stats['p95']:>8.3f}{stats['p99']:>8.3f}")
+        return lines
+
+
+"""
+Класс, представляющий замер фаз запуска игры.
+Каждая фаза длится от предыдущего вызова lap (или от start) до текущего.
+
+Параметры:
+start (float): Момент начала отсчёта по time.perf_counter; по умолчанию - момент создания.
+"""
+class StartupProfiler:
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+        return now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+    """
+    Функция сводки по фазам запуска в миллисекундах, вместе с общим временем.
+    """
+    def summary(self):
+        result = {name: elapsed * 1000 for name, elapsed in self.phases}
+        result["total"] = self.total * 1000
+        return result
+
+    def lines(self):
+        return [f"{name:<14}{elapsed:>9.1f} мс" for name, elapsed in self.summary().items()]
@@ -0,0 +1,215 @@
+import argparse
+import struct
+import time
+
+from world import BACKEND_NUMPY, BACKEND_SPRITES, TICK_RATE, World
+
+# Формат файла записи:
+#   заголовок REPLAY_HEADER
+#   события: для каждого - разница тиков с предыдущим событием (varint) и байт (вид << 4 | действие)
+#   хеши состояния: uint32 после каждого hash_interval-го шага
+REPLAY_MAGIC = b"PLRP"
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct("<4sBBHQIIH")
+BACKEND_CODES = {BACKEND_SPRITES: 0, BACKEND_NUMPY: 1}
+BACKEND_NAMES = {code: name for name, code in BACKEND_CODES.items()}
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+"""
+Класс, представляющий запись сессии.
+Хранит зерно и режим мира, события ввода с номерами тиков и хеши состояния.
+"""
+class Replay:
+    def __init__(self, seed, backend=BACKEND_SPRITES, tick_rate=TICK_RATE, hash_interval=1):
+        self.seed = seed
+        self.backend = backend
+        self.tick_rate = tick_rate
+        self.hash_interval = hash_interval
+        self.ticks = 0
+        # События (тик, вид, действие) в порядке записи
+        self.events = []
+        self.hashes = []
+
+    def events_by_tick(self):
+        events = {}
+        for tick, kind, action in self.events:
+            events.setdefault(tick, []).append((kind, action))
+        return events
+
+    def to_bytes(self):
+        out = bytearray(REPLAY_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, BACKEND_CODES[self.backend], self.tick_rate,
+            self.seed, self.ticks, len(self.events), self.hash_interval,
+        ))
+        previous_tick = 0
+        for tick, kind, action in self.events:
+            write_varint(out, tick - previous_tick)
+            out.append(kind << 4 | action)
+            previous_tick = tick
+        out += struct.pack(f"<{len(self.hashes)}I", *self.hashes)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, backend, tick_rate, seed, ticks, event_count, hash_interval = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Файл не является записью игры")
+        if version != REPLAY_VERSION:
+            raise ValueError(f"Неподдерживаемая версия записи: {version}")
+        replay = cls(seed, BACKEND_NAMES[backend], tick_rate, hash_interval)
+        replay.ticks = ticks
+        offset = REPLAY_HEADER.size
+        tick = 0
+        for _ in range(event_count):
+            delta, offset = read_varint(data, offset)
+            tick += delta
+            code = data[offset]
+            offset += 1
+            replay.events.append((tick, code >> 4, code & 0x0F))
+        hash_count = ticks // hash_interval
+        replay.hashes = list(struct.unpack_from(f"<{hash_count}I", data, offset))
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+# Параметры конструктора World, которых нет в заголовке записи: при воспроизведении они берутся по умолчанию
+WORLD_OPTIONS = ("enemy_capacity", "projectile_capacity", "chunk_budget", "spawn_max_live", "spawn_rate")
+
+
+"""
+Функция проверки, можно ли записать мир.
+Запись хранит только зерно и режим хранения, поэтому ReplayPlayer воссоздаёт лишь новый мир
+с процедурным рельефом и параметрами по умолчанию. Возвращает причину, по которой мир
+не воспроизведётся, или None.
+"""
+def unreplayable_reason(world):
+    if world.tick != 0:
+        return "мир продолжен со снимка состояния"
+    if world.level is not None:
+        return "мир построен по файлу уровня"
+    default = World(world.seed, world.backend)
+    for name in WORLD_OPTIONS:
+        if getattr(world, name) != getattr(default, name):
+            return f"параметр мира {name} отличается от значения по умолчанию"
+    return None
+
+
+"""
+Класс, представляющий запись сессии во время игры.
+Шагает мир вместо прямого вызова World.step и сохраняет ввод и хеши состояния.
+Мир, который не воспроизведётся по записи (unreplayable_reason), записывать нельзя.
+"""
+class Recorder:
+    def __init__(self, world, hash_interval=1):
+        reason = unreplayable_reason(world)
+        if reason is not None:
+            raise ValueError(f"Запись не воспроизведётся: {reason}")
+        self.replay = Replay(world.seed, world.backend, TICK_RATE, hash_interval)
+
+    def step(self, world, inputs=()):
+        for kind, action in inputs:
+            self.replay.events.append((world.tick, kind, action))
+        world.step(inputs)
+        self.replay.ticks = world.tick
+        if world.tick % self.replay.hash_interval == 0:
+            self.replay.hashes.append(world.state_hash())
+
+    def save(self, path):
+        self.replay.save(path)
+
+
+"""
+Класс, представляющий воспроизведение записи.
+Подаёт в мир записанный ввод (живой ввод игнорируется) и сверяет хеши состояния.
+Первое расхождение запоминается в mismatch_tick.
+"""
+class ReplayPlayer:
+    def __init__(self, replay, verify=True):
+        self.replay = replay
+        self.events = replay.events_by_tick()
+        self.verify = verify
+        self.mismatch_tick = None
+
+    def create_world(self):
+        world = World(self.replay.seed, self.replay.backend)
+        world.setup()
+        return world
+
+    def step(self, world, inputs=()):
+        world.step(self.events.get(world.tick, ()))
+        interval = self.replay.hash_interval
+        if self.verify and self.mismatch_tick is None and world.tick % interval == 0:
+            index = world.tick // interval - 1
+            if index < len(self.replay.hashes) and world.state_hash() != self.replay.hashes[index]:
+                self.mismatch_tick = world.tick
+
+    """
+    Функция воспроизведения без окна с максимальной скоростью.
+    Возвращает мир после последнего записанного шага.
+    """
+    def run(self):
+        world = self.create_world()
+        for _ in range(self.replay.ticks):
+            self.step(world)
+        return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записи игры")
+    parser.add_argument("path", help="файл записи")
+    parser.add_argument("--render", action="store_true", help="воспроизвести в окне, а не без окна")
+    parser.add_argument("--no-verify", action="store_true", help="не сверять хеши состояния")
+    args = parser.parse_args()
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay, verify=not args.no_verify)
+    if args.render:
+        import arcade
+        from main import Platformer
+
+        window = Platformer(replay.seed, replay.backend, stepper=player)
+        window.setup()
+        arcade.run()
+    else:
+        start = time.perf_counter()
+        world = player.run()
+        elapsed = time.perf_counter() - start
+        print(f"{replay.ticks} тиков за {elapsed:.3f} с: {replay.ticks / elapsed if elapsed else float('inf'):.0f} тиков/с")
+        print(f"убито врагов: {world.kills}, здоровье: {world.player.health}")
+
+    if player.mismatch_tick is not None:
+        print(f"Состояние разошлось с записью на тике {player.mismatch_tick}")
+        raise SystemExit(1)
+    if player.verify:
+        print("Состояние совпадает с записью")
+
+
+if __name__ == "__main__":
+    main()
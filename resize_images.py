@@ -1,27 +1,69 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from PIL import Image
 
+# Манифест: хеши исходных листов, параметров нарезки и результатов последней сборки
+MANIFEST_PATH = 'images/manifest.json'
+# Атлас: все кадры в одном файле и индекс с областью каждого кадра
+ATLAS_IMAGE = 'images/atlas.png'
+ATLAS_INDEX = 'images/atlas.json'
+ATLAS_WIDTH = 1024
+# Отступ между кадрами, чтобы при масштабировании не подмешивались пиксели соседей
+ATLAS_PADDING = 1
+
 # Функция для вырезания и изменения размера спрайтов
+# Возвращает список (имя кадра, изображение) для сборки атласа
 def crop_and_resize_sprites(image_path, coordinates, output_prefix, new_size):
     img = Image.open(image_path)
+    frames = []
     for idx, (x, y, w, h) in enumerate(coordinates):
         cropped_img = img.crop((x, y, x + w, y + h))
         resized_img = cropped_img.resize(new_size, Image.NEAREST)
-        resized_img.save(f'images/{output_prefix}_{idx}.png')
+        name = f'{output_prefix}_{idx}'
+        resized_img.save(f'images/{name}.png')
+        frames.append((name, resized_img))
+    return frames
+
+# Функция упаковки кадров в атлас полками: кадры идут по убыванию высоты слева направо,
+# когда ряд заполнен, начинается новая полка
+def pack_atlas(frames, width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+    regions = {}
+    x = y = shelf_height = 0
+    for name, img in sorted(frames, key=lambda frame: (-frame[1].height, frame[0])):
+        w, h = img.size
+        if x + w > width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        regions[name] = (x, y, w, h)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    atlas = Image.new('RGBA', (width, y + shelf_height), (0, 0, 0, 0))
+    for name, img in frames:
+        atlas.paste(img.convert('RGBA'), regions[name][:2])
+    return atlas, regions
+
+# Функция сохранения атласа и его индекса (имя кадра -> [x, y, ширина, высота])
+def save_atlas(frames, image_path=ATLAS_IMAGE, index_path=ATLAS_INDEX):
+    atlas, regions = pack_atlas(frames)
+    atlas.save(image_path)
+    with open(index_path, 'w', encoding='utf-8') as file:
+        json.dump({'image': os.path.basename(image_path), 'frames': regions}, file, separators=(',', ':'), sort_keys=True)
 
 # Координаты для вырезания спрайтов
-knight_coords = [
-    (0, 0, 32, 32),  # IDLE
-    (32, 0, 32, 32), # RUN 1
-    (64, 0, 32, 32), # RUN 2
-    (96, 0, 32, 32), # RUN 3
-    (128, 0, 32, 32), # RUN 4
-    (160, 0, 32, 32), # ROLL 1
-    (192, 0, 32, 32), # ROLL 2
-    (224, 0, 32, 32), # HIT 1
-    (256, 0, 32, 32), # HIT 2
-    (288, 0, 32, 32), # DEATH 1
-    (320, 0, 32, 32), # DEATH 2
-]
+# Лист рыцаря - сетка 8x8 клеток по 32 пикселя; строки 1 и 4 - подписи
+knight_coords = (
+    [(x * 32, 0, 32, 32) for x in range(4)]             # IDLE 1-4 (кадры 0-3)
+    + [(x * 32, 64, 32, 32) for x in range(8)]          # RUN 1-8 (кадры 4-11)
+    + [(x * 32, 96, 32, 32) for x in range(8)]          # RUN 9-16 (кадры 12-19)
+    + [(x * 32, 160, 32, 32) for x in range(8)]         # ROLL 1-8 (кадры 20-27)
+    + [(x * 32, 192, 32, 32) for x in range(4)]         # HIT 1-4 (кадры 28-31)
+    + [(x * 32, 224, 32, 32) for x in range(4)]         # DEATH 1-4 (кадры 32-35)
+)
 
 platform_coords = [
     (0, 0, 64, 16),  # Деревянная платформа
@@ -55,12 +97,112 @@ slime_green_coords = [
     (48, 32, 16, 16), # Slime Green 12
 ]
 
-# Вырезание спрайтов и изменение их размера
-crop_and_resize_sprites('images/knight.png', knight_coords, 'knight', (64, 64))
-crop_and_resize_sprites('images/platforms.png', platform_coords, 'platform', (128, 32))
-crop_and_resize_sprites('images/coin.png', coin_coords, 'coin', (32, 32))
-crop_and_resize_sprites('images/slime_green.png', slime_green_coords, 'slime_green', (64, 64))
-crop_and_resize_sprites('images/s1.png', [(0,0,14,15)], 's1', (64, 64))
-crop_and_resize_sprites('images/s2.png', [(0,0,14,15)], 's2', (64, 64))
-crop_and_resize_sprites('images/s3.png', [(0,0,14,15)], 's3', (64, 64))
-crop_and_resize_sprites('images/s4.png', [(0,0,14,15)], 's4', (64, 64))
+# Листы спрайтов: исходный файл, координаты кадров, префикс имён кадров и размер после масштабирования
+SHEETS = [
+    ('images/knight.png', knight_coords, 'knight', (64, 64)),
+    ('images/platforms.png', platform_coords, 'platform', (128, 32)),
+    ('images/coin.png', coin_coords, 'coin', (32, 32)),
+    ('images/slime_green.png', slime_green_coords, 'slime_green', (64, 64)),
+    ('images/s1.png', [(0,0,14,15)], 's1', (64, 64)),
+    ('images/s2.png', [(0,0,14,15)], 's2', (64, 64)),
+    ('images/s3.png', [(0,0,14,15)], 's3', (64, 64)),
+    ('images/s4.png', [(0,0,14,15)], 's4', (64, 64)),
+]
+
+# Функция хеширования содержимого файла; для отсутствующего файла возвращает None
+def file_hash(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def output_paths(sheet):
+    _, coordinates, output_prefix, _ = sheet
+    return [f'images/{output_prefix}_{idx}.png' for idx in range(len(coordinates))]
+
+# Функция вычисления ключа листа: хеш исходного файла вместе с параметрами нарезки,
+# чтобы изменение координат или размера тоже приводило к пересборке
+def sheet_key(sheet):
+    image_path, coordinates, output_prefix, new_size = sheet
+    params = json.dumps([coordinates, output_prefix, new_size])
+    return hashlib.sha256(f'{file_hash(image_path)}:{params}'.encode()).hexdigest()
+
+# Функция проверки листа по манифесту: лист устарел, если изменился исходник или параметры,
+# либо какой-то из результатов пропал или был изменён вручную
+def sheet_is_stale(sheet, manifest):
+    entry = manifest.get('sheets', {}).get(sheet[0])
+    if entry is None or entry['key'] != sheet_key(sheet):
+        return True
+    return [file_hash(path) for path in output_paths(sheet)] != entry['outputs']
+
+def atlas_is_stale(manifest):
+    atlas = manifest.get('atlas')
+    return atlas is None or atlas != [file_hash(ATLAS_IMAGE), file_hash(ATLAS_INDEX)]
+
+# Функция обработки одного листа в отдельном процессе
+# Возвращает путь листа и запись для манифеста
+def process_sheet(sheet):
+    crop_and_resize_sprites(*sheet)
+    return sheet[0], {'key': sheet_key(sheet), 'outputs': [file_hash(path) for path in output_paths(sheet)]}
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+
+# Функция сборки: обрабатывает параллельно только устаревшие листы, затем при необходимости
+# пересобирает атлас из готовых кадров. Возвращает список пересобранных листов.
+def build(sheets=SHEETS, force=False, jobs=None):
+    manifest = load_manifest()
+    stale = [sheet for sheet in sheets if force or sheet_is_stale(sheet, manifest)]
+    entries = manifest.setdefault('sheets', {})
+    if stale:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for image_path, entry in pool.map(process_sheet, stale):
+                entries[image_path] = entry
+                print(f'обработан {image_path}')
+    if stale or force or atlas_is_stale(manifest):
+        frames = []
+        for sheet in sheets:
+            for path in output_paths(sheet):
+                frames.append((os.path.splitext(os.path.basename(path))[0], Image.open(path)))
+        save_atlas(frames)
+        manifest['atlas'] = [file_hash(ATLAS_IMAGE), file_hash(ATLAS_INDEX)]
+        print(f'собран атлас {ATLAS_IMAGE}')
+    save_manifest(manifest)
+    return stale
+
+# Функция проверки без записи: печатает устаревшие листы и возвращает True, если всё актуально
+def verify(sheets=SHEETS):
+    manifest = load_manifest()
+    stale = [sheet[0] for sheet in sheets if sheet_is_stale(sheet, manifest)]
+    for image_path in stale:
+        print(f'устарел {image_path}')
+    if atlas_is_stale(manifest):
+        stale.append(ATLAS_IMAGE)
+        print(f'устарел {ATLAS_IMAGE}')
+    return not stale
+
+def main():
+    parser = argparse.ArgumentParser(description='Нарезка листов спрайтов и сборка атласа')
+    parser.add_argument('--force', action='store_true', help='пересобрать всё, не глядя в манифест')
+    parser.add_argument('--jobs', type=int, default=None, help='количество процессов (по умолчанию по числу ядер)')
+    parser.add_argument('--dry-run', '--verify', dest='dry_run', action='store_true',
+                        help='только проверить, что результаты актуальны; код возврата 1, если нет')
+    args = parser.parse_args()
+
+    if args.dry_run:
+        if not verify():
+            raise SystemExit(1)
+        print('все ресурсы актуальны')
+        return
+    if not build(force=args.force, jobs=args.jobs):
+        print('листы не изменились')
+
+if __name__ == '__main__':
+    main()
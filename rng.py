@@ -0,0 +1,32 @@
+import random
+
+# Названия независимых потоков случайных чисел
+STREAM_TERRAIN = "terrain"
+STREAM_SPAWN = "spawn"
+
+
+"""
+Функция выбора случайного зерна, когда оно не задано явно.
+"""
+def random_seed():
+    return random.SystemRandom().getrandbits(32)
+
+
+"""
+Класс, представляющий генератор случайных чисел игрового мира.
+Из одного зерна получаются независимые потоки: рельеф (зерно для чанков) и появление врагов.
+Потоки не влияют друг на друга, поэтому, например, лишний выстрел или другой порядок
+подгрузки чанков не меняет раскладку платформ.
+При одинаковых зерне и записи ввода сессия повторяется полностью.
+
+Параметры:
+seed (int): Зерно мира; если не задано, выбирается случайно.
+"""
+class GameRandom:
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random_seed()
+        self.seed = seed
+        # Строковое зерно хешируется random одинаково во всех запусках
+        self.terrain_seed = random.Random(f"{seed}:{STREAM_TERRAIN}").getrandbits(64)
+        self.spawn = random.Random(f"{seed}:{STREAM_SPAWN}")
@@ -0,0 +1,558 @@
+import argparse
+import asyncio
+import json
+import struct
+import time
+
+from replay import read_varint, write_varint
+from world import (
+    ACTION_CHEAT, ACTION_DOWN, ACTION_FIRE, ACTION_JUMP, ACTION_LEFT, ACTION_RIGHT, ACTION_THROTTLE, BACKEND_NUMPY,
+    BACKEND_SPRITES, PLAYER_STATES, PRESS, RELEASE, TICK_DURATION, TICK_RATE, World,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Снимок рассылается раз в столько шагов мира (20 раз в секунду)
+SNAPSHOT_INTERVAL = 3
+# Через сколько шагов после смерти игрока сессия начинается заново (со следующим зерном, как в headless.py)
+RESTART_DELAY_TICKS = 2 * TICK_RATE
+# Максимум шагов, которые сервер догоняет за одно пробуждение; остальное отставание отбрасывается
+MAX_CATCH_UP_TICKS = 5
+# Доля времени шага, занятая симуляцией, выше которой сессиям уходит ACTION_THROTTLE, и ниже которой - отпускание
+THROTTLE_ENTER = 0.9
+THROTTLE_EXIT = 0.7
+# Доля нового замера в сглаженной загрузке
+LOAD_SMOOTHING = 0.05
+# Если клиент не успевает читать и в буфере отправки больше стольких байт, снимки ему пропускаются
+SEND_BUFFER_LIMIT = 256 * 1024
+# Максимальный размер сообщения от клиента
+MAX_CLIENT_MESSAGE = 4096
+
+# Формат сообщений (все числа little-endian):
+#   заголовок MESSAGE_HEADER (длина тела, вид сообщения), затем тело
+# Клиент -> сервер:
+#   MSG_JOIN    JOIN_STRUCT (зерно или -1 для случайного, номер сессии или 0 для новой)
+#   MSG_INPUT   события ввода, по байту на событие: вид << 4 | действие (как в replay.py)
+#   MSG_STATS   запрос статистики сервера (можно и до MSG_JOIN, не занимая сессию)
+#   MSG_LEAVE   отключение
+# Сервер -> клиент:
+#   MSG_WELCOME WELCOME_STRUCT (номер сессии, зерно, шагов в секунду, шагов между снимками);
+#               повторно - когда сессия начинается заново с новым миром, после него идёт полный снимок
+#   MSG_SNAPSHOT снимок (encode_snapshot)
+#   MSG_STATS   статистика сервера в JSON
+#   MSG_ERROR   текст ошибки, после него сервер закрывает соединение
+MESSAGE_HEADER = struct.Struct("<IB")
+JOIN_STRUCT = struct.Struct("<qI")
+WELCOME_STRUCT = struct.Struct("<IQHH")
+MSG_JOIN = 1
+MSG_WELCOME = 2
+MSG_INPUT = 3
+MSG_SNAPSHOT = 4
+MSG_STATS = 5
+MSG_ERROR = 6
+MSG_LEAVE = 7
+# Действия, которые может присылать клиент; ACTION_THROTTLE присылает только сам сервер
+CLIENT_ACTIONS = (ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_DOWN, ACTION_FIRE, ACTION_CHEAT)
+
+# Формат снимка:
+#   SNAPSHOT_HEADER (шаг мира, полный ли снимок)
+#   поля мира и игрока WORLD_FIELDS: маска изменившихся полей (varint), затем их разницы (zigzag varint)
+#   враги, затем снаряды: количество исчезнувших и их номера, количество новых и сдвинувшихся
+#   и для каждого номер, маска (бит 0 - x, бит 1 - y) и разницы координат
+# Полный снимок - разница с пустым состоянием; остальные - разница с предыдущим разосланным снимком.
+# Координаты округляются до пикселя, поэтому клиент восстанавливает их без накопления ошибки.
+SNAPSHOT_HEADER = struct.Struct("<I?")
+WORLD_FIELDS = ("kills", "health", "game_over", "view_left", "x", "y", "change_x", "change_y",
+                "state", "facing_right", "triple_shoot")
+# Сколько байт занял бы снимок без сжатия: все поля мира и по три int32 на объект
+RAW_FIELD_SIZE = 4
+RAW_ENTITY_SIZE = 12
+
+
+def encode_message(kind, payload=b""):
+    return MESSAGE_HEADER.pack(len(payload), kind) + payload
+
+
+"""
+Функция чтения одного сообщения из потока.
+Возвращает (вид, тело).
+
+Параметры:
+reader (asyncio.StreamReader): Поток.
+max_size (int): Максимальная длина тела; длиннее - ValueError.
+"""
+async def read_message(reader, max_size=None):
+    size, kind = MESSAGE_HEADER.unpack(await reader.readexactly(MESSAGE_HEADER.size))
+    if max_size is not None and size > max_size:
+        raise ValueError(f"Слишком длинное сообщение: {size} байт")
+    return kind, await reader.readexactly(size)
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+"""
+Класс, представляющий состояние мира в том виде, в каком оно уходит клиентам:
+поля мира и игрока и координаты врагов и снарядов по их постоянным номерам, округлённые до пикселя.
+"""
+class NetState:
+    __slots__ = ("tick", "fields", "enemies", "projectiles")
+
+    def __init__(self, tick=0, fields=None, enemies=None, projectiles=None):
+        self.tick = tick
+        self.fields = fields if fields is not None else (0,) * len(WORLD_FIELDS)
+        self.enemies = enemies if enemies is not None else {}
+        self.projectiles = projectiles if projectiles is not None else {}
+
+    @property
+    def raw_size(self):
+        return (SNAPSHOT_HEADER.size + len(self.fields) * RAW_FIELD_SIZE
+                + (len(self.enemies) + len(self.projectiles)) * RAW_ENTITY_SIZE)
+
+
+EMPTY_STATE = NetState()
+
+
+"""
+Функция снятия сетевого состояния мира.
+"""
+def capture(world):
+    player = world.player
+    fields = (
+        world.kills, player.health, world.game_over, world.view_left, round(player.center_x), round(player.center_y),
+        round(player.change_x), round(player.change_y), PLAYER_STATES.index(player.state), player.facing_right,
+        player.triple_shoot,
+    )
+    enemies, projectiles = world.entities.slot_positions()
+    return NetState(
+        world.tick, tuple(map(int, fields)),
+        {slot: (round(x), round(y)) for slot, x, y in zip(*enemies)},
+        {slot: (round(x), round(y)) for slot, x, y in zip(*projectiles)},
+    )
+
+
+def encode_entities(out, previous, current):
+    removed = [slot for slot in previous if slot not in current]
+    write_varint(out, len(removed))
+    for slot in removed:
+        write_varint(out, slot)
+    changed = []
+    for slot, (x, y) in current.items():
+        before = previous.get(slot)
+        if before is None:
+            changed.append((slot, x, y))
+        elif before != (x, y):
+            changed.append((slot, x - before[0], y - before[1]))
+    write_varint(out, len(changed))
+    for slot, dx, dy in changed:
+        write_varint(out, slot)
+        out.append(bool(dx) | bool(dy) << 1)
+        if dx:
+            write_varint(out, zigzag(dx))
+        if dy:
+            write_varint(out, zigzag(dy))
+
+
+"""
+Функция кодирования снимка как разницы состояния current с previous.
+Для полного снимка previous - EMPTY_STATE.
+"""
+def encode_snapshot(previous, current):
+    out = bytearray(SNAPSHOT_HEADER.pack(current.tick, previous is EMPTY_STATE))
+    mask = 0
+    deltas = []
+    for i, (before, value) in enumerate(zip(previous.fields, current.fields)):
+        if value != before:
+            mask |= 1 << i
+            deltas.append(value - before)
+    write_varint(out, mask)
+    for delta in deltas:
+        write_varint(out, zigzag(delta))
+    encode_entities(out, previous.enemies, current.enemies)
+    encode_entities(out, previous.projectiles, current.projectiles)
+    return bytes(out)
+
+
+def decode_entities(data, offset, entities):
+    count, offset = read_varint(data, offset)
+    for _ in range(count):
+        slot, offset = read_varint(data, offset)
+        del entities[slot]
+    count, offset = read_varint(data, offset)
+    for _ in range(count):
+        slot, offset = read_varint(data, offset)
+        mask = data[offset]
+        offset += 1
+        dx = dy = 0
+        if mask & 1:
+            dx, offset = read_varint(data, offset)
+            dx = unzigzag(dx)
+        if mask & 2:
+            dy, offset = read_varint(data, offset)
+            dy = unzigzag(dy)
+        x, y = entities.get(slot, (0, 0))
+        entities[slot] = (x + dx, y + dy)
+    return offset
+
+
+"""
+Класс, представляющий приёмник снимков на стороне клиента.
+Применяет разницы к последнему полученному состоянию; состояние - NetState.
+"""
+class SnapshotDecoder:
+    def __init__(self):
+        self.state = NetState()
+        self.received = 0
+
+    def apply(self, payload):
+        tick, full = SNAPSHOT_HEADER.unpack_from(payload)
+        offset = SNAPSHOT_HEADER.size
+        if full:
+            self.state = NetState()
+        elif not self.received:
+            raise ValueError("Разница со снимком, который не был получен")
+        state = self.state
+        mask, offset = read_varint(payload, offset)
+        fields = list(state.fields)
+        for i in range(len(fields)):
+            if mask & 1 << i:
+                delta, offset = read_varint(payload, offset)
+                fields[i] += unzigzag(delta)
+        state.tick = tick
+        state.fields = tuple(fields)
+        offset = decode_entities(payload, offset, state.enemies)
+        decode_entities(payload, offset, state.projectiles)
+        self.received += 1
+        return state
+
+    def field(self, name):
+        return self.state.fields[WORLD_FIELDS.index(name)]
+
+
+"""
+Класс, представляющий подключение клиента.
+"""
+class Connection:
+    __slots__ = ("writer", "session", "needs_full")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.session = None
+        # Следующим клиенту уходит полный снимок: он только подключился или пропустил снимки
+        self.needs_full = True
+
+    def send(self, data):
+        self.writer.write(data)
+
+
+"""
+Класс, представляющий игровую сессию на сервере: мир, ввод, накопленный к следующему шагу, и подключённых клиентов.
+Все клиенты сессии получают одни и те же снимки; полный снимок кодируется только для тех, кому он нужен.
+
+Параметры:
+session_id (int): Номер сессии.
+seed (int): Зерно мира; None - случайное.
+snapshot_interval (int): Шагов мира между снимками.
+world_options (dict): Остальные параметры конструктора World.
+"""
+class Session:
+    def __init__(self, session_id, seed, snapshot_interval=SNAPSHOT_INTERVAL, **world_options):
+        self.id = session_id
+        self.snapshot_interval = snapshot_interval
+        self.world_options = world_options
+        self.world = self.create_world(seed)
+        self.inputs = []
+        self.connections = []
+        self.previous = EMPTY_STATE
+        self.restarts = 0
+        # Шаг, на котором закончилась игра (None - игра идёт)
+        self.game_over_tick = None
+
+    def welcome(self):
+        return encode_message(MSG_WELCOME, WELCOME_STRUCT.pack(
+            self.id, self.world.seed, TICK_RATE, self.snapshot_interval))
+
+    def create_world(self, seed):
+        world = World(seed, **self.world_options)
+        world.setup()
+        return world
+
+    """
+    Функция приёма события ввода от клиента.
+    Принимается только то, что окно игры отправляет по on_key_press/on_key_release.
+    """
+    def push_inputs(self, payload):
+        for byte in payload:
+            kind, action = byte >> 4, byte & 0x0F
+            if kind not in (PRESS, RELEASE) or action not in CLIENT_ACTIONS:
+                raise ValueError(f"Недопустимое событие ввода: {byte}")
+            self.inputs.append((kind, action))
+
+    """
+    Функция шага сессии. После смерти игрока мир через RESTART_DELAY_TICKS шагов начинается заново.
+    """
+    def step(self):
+        inputs = self.inputs
+        self.inputs = []
+        world = self.world
+        world.step(inputs)
+        if world.game_over:
+            if self.game_over_tick is None:
+                self.game_over_tick = world.tick
+            elif world.tick - self.game_over_tick >= RESTART_DELAY_TICKS:
+                self.restarts += 1
+                self.game_over_tick = None
+                throttled = world.spawner.throttled
+                self.world = self.create_world(world.seed + 1)
+                self.world.spawner.throttled = throttled
+                # Клиенты узнают новое зерно, а шаг мира снова начинается с нуля: разница со старым миром не нужна
+                self.previous = EMPTY_STATE
+                welcome = self.welcome()
+                for connection in self.connections:
+                    connection.send(welcome)
+                    connection.needs_full = True
+
+    """
+    Функция рассылки снимка клиентам сессии.
+    Возвращает (количество снимков, байт отправлено, байт без сжатия, полных снимков).
+    """
+    def broadcast(self):
+        current = capture(self.world)
+        delta = None
+        full = None
+        sent = snapshots = raw = fulls = 0
+        for connection in self.connections:
+            transport = connection.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > SEND_BUFFER_LIMIT:
+                # Клиент не успевает: цепочка разниц прервана, после разгрузки он получит полный снимок
+                connection.needs_full = True
+                continue
+            if connection.needs_full:
+                if full is None:
+                    full = encode_message(MSG_SNAPSHOT, encode_snapshot(EMPTY_STATE, current))
+                message = full
+                connection.needs_full = False
+                fulls += 1
+            else:
+                if delta is None:
+                    delta = encode_message(MSG_SNAPSHOT, encode_snapshot(self.previous, current))
+                message = delta
+            connection.send(message)
+            sent += len(message)
+            snapshots += 1
+            raw += current.raw_size + MESSAGE_HEADER.size
+        self.previous = current
+        return snapshots, sent, raw, fulls
+
+
+"""
+Класс, представляющий игровой сервер.
+Все сессии живут в одном цикле событий asyncio: одна задача шагает все миры с фиксированным шагом,
+а задачи соединений только принимают ввод. Мир шагает так же, как в headless.py, без окна.
+Если шаги не укладываются во время, сессиям уходит ACTION_THROTTLE, как из окна игры при перегрузке.
+
+Параметры:
+host (str): Адрес; по умолчанию только локальный.
+port (int): Порт.
+snapshot_interval (int): Шагов мира между снимками.
+max_sessions (int): Максимум сессий; 0 - без ограничения.
+world_options (dict): Параметры конструктора World для всех сессий.
+"""
+class GameServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, snapshot_interval=SNAPSHOT_INTERVAL, max_sessions=0,
+                 **world_options):
+        self.host = host
+        self.port = port
+        self.snapshot_interval = snapshot_interval
+        self.max_sessions = max_sessions
+        self.world_options = world_options
+        self.sessions = {}
+        self.next_session_id = 1
+        self.server = None
+        self.ticker = None
+        # Сглаженная доля времени шага, занятая симуляцией и рассылкой
+        self.load = 0.0
+        self.throttled = False
+        self.counters = {
+            "ticks": 0, "late_ticks": 0, "session_ticks": 0, "step_seconds": 0.0, "broadcast_seconds": 0.0,
+            "snapshots": 0, "full_snapshots": 0, "snapshot_bytes": 0, "raw_bytes": 0,
+            "sessions_created": 0, "restarts": 0,
+        }
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ticker = asyncio.create_task(self.run_ticks())
+
+    async def stop(self):
+        self.ticker.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    """
+    Функция подключения клиента к сессии: новой (session_id == 0) или существующей.
+    Возвращает сессию или None, если такой сессии нет или достигнут предел.
+    """
+    def join(self, connection, seed, session_id):
+        if session_id:
+            session = self.sessions.get(session_id)
+        elif self.max_sessions and len(self.sessions) >= self.max_sessions:
+            session = None
+        else:
+            session = Session(self.next_session_id, seed, self.snapshot_interval, **self.world_options)
+            session.world.spawner.throttled = self.throttled
+            self.sessions[session.id] = session
+            self.next_session_id += 1
+            self.counters["sessions_created"] += 1
+        if session is not None:
+            session.connections.append(connection)
+            connection.session = session
+        return session
+
+    # Сессия без клиентов закрывается
+    def leave(self, connection):
+        session = connection.session
+        if session is None:
+            return
+        session.connections.remove(connection)
+        connection.session = None
+        if not session.connections:
+            self.counters["restarts"] += session.restarts
+            del self.sessions[session.id]
+
+    async def handle_client(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            # До подключения к сессии можно только запрашивать статистику (наблюдение за сервером)
+            kind, payload = await read_message(reader, MAX_CLIENT_MESSAGE)
+            while kind == MSG_STATS:
+                connection.send(encode_message(MSG_STATS, json.dumps(self.stats()).encode("utf-8")))
+                kind, payload = await read_message(reader, MAX_CLIENT_MESSAGE)
+            if kind != MSG_JOIN or len(payload) != JOIN_STRUCT.size:
+                raise ValueError("Первым сообщением ожидается MSG_JOIN")
+            seed, session_id = JOIN_STRUCT.unpack(payload)
+            session = self.join(connection, None if seed < 0 else seed, session_id)
+            if session is None:
+                raise ValueError(f"Сессия {session_id} не найдена" if session_id else "Достигнут предел сессий")
+            connection.send(session.welcome())
+            while True:
+                kind, payload = await read_message(reader, MAX_CLIENT_MESSAGE)
+                if kind == MSG_INPUT:
+                    session.push_inputs(payload)
+                elif kind == MSG_STATS:
+                    connection.send(encode_message(MSG_STATS, json.dumps(self.stats()).encode("utf-8")))
+                elif kind == MSG_LEAVE:
+                    break
+                else:
+                    raise ValueError(f"Неизвестный вид сообщения: {kind}")
+        except ValueError as error:
+            writer.write(encode_message(MSG_ERROR, str(error).encode("utf-8")))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.leave(connection)
+            writer.close()
+
+    """
+    Функция фиксированного шага сервера.
+    Шаги отсчитываются от часов цикла событий: проспав дольше шага, сервер догоняет
+    не больше MAX_CATCH_UP_TICKS шагов, остальные считаются опоздавшими и пропускаются.
+    """
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            steps = 0
+            while next_tick <= loop.time() and steps < MAX_CATCH_UP_TICKS:
+                self.tick()
+                next_tick += TICK_DURATION
+                steps += 1
+            now = loop.time()
+            if next_tick <= now:
+                late = int((now - next_tick) / TICK_DURATION) + 1
+                self.counters["late_ticks"] += late
+                next_tick += late * TICK_DURATION
+            await asyncio.sleep(next_tick - now)
+
+    """
+    Функция одного шага всех сессий с рассылкой снимков.
+    """
+    def tick(self):
+        counters = self.counters
+        start = time.perf_counter()
+        sessions = list(self.sessions.values())
+        for session in sessions:
+            session.step()
+        middle = time.perf_counter()
+        for session in sessions:
+            if session.world.tick % self.snapshot_interval == 0:
+                snapshots, sent, raw, fulls = session.broadcast()
+                counters["snapshots"] += snapshots
+                counters["snapshot_bytes"] += sent
+                counters["raw_bytes"] += raw
+                counters["full_snapshots"] += fulls
+        end = time.perf_counter()
+        counters["ticks"] += 1
+        counters["session_ticks"] += len(sessions)
+        counters["step_seconds"] += middle - start
+        counters["broadcast_seconds"] += end - middle
+        self.update_throttle((end - start) / TICK_DURATION, sessions)
+
+    """
+    Функция переключения придерживания появления врагов по загрузке сервера.
+    Разные пороги входа и выхода, чтобы не переключаться на каждом шаге.
+    """
+    def update_throttle(self, load, sessions):
+        self.load += (load - self.load) * LOAD_SMOOTHING
+        if not self.throttled and self.load > THROTTLE_ENTER:
+            self.throttled = True
+            kind = PRESS
+        elif self.throttled and self.load < THROTTLE_EXIT:
+            self.throttled = False
+            kind = RELEASE
+        else:
+            return
+        for session in sessions:
+            session.inputs.append((kind, ACTION_THROTTLE))
+
+    def stats(self):
+        return dict(
+            self.counters, sessions=len(self.sessions),
+            clients=sum(len(session.connections) for session in self.sessions.values()),
+            cpu_seconds=time.process_time(), load=self.load, throttled=self.throttled,
+        )
+
+
+async def serve(host, port, **options):
+    server = GameServer(host, port, **options)
+    await server.start()
+    print(f"Сервер слушает {host}:{server.port}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Игровой сервер: сессии без окна с рассылкой снимков состояния")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--snapshot-interval", type=int, default=SNAPSHOT_INTERVAL, help="шагов мира между снимками")
+    parser.add_argument("--max-sessions", type=int, default=0, help="максимум сессий; 0 - без ограничения")
+    parser.add_argument("--backend", choices=[BACKEND_SPRITES, BACKEND_NUMPY], default=BACKEND_SPRITES,
+                        help="хранение врагов и снарядов: спрайты или массивы NumPy")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, snapshot_interval=args.snapshot_interval,
+                          max_sessions=args.max_sessions, backend=args.backend))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import heapq
+import struct
+
+import arcade
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from animation import load_animations
+from textures import PROJECTILE_TEXTURES, hit_box_bounds, registry
+from world import (
+    DORMANT_MARGIN, DORMANT_UPDATE_TICKS, ENEMY_CLIP, ENEMY_SCALING, ENEMY_SPEED, PROJECTILE_SCALING, PROJECTILE_SPEED, Enemy,
+    Projectile,
+)
+
+# Массивы EntityArrays, которые входят в снимок состояния
+ARRAY_FIELDS = ("x", "y", "change_x", "change_y", "animation_start", "dormant", "born", "alive")
+
+
+"""
+Класс, представляющий набор однотипных объектов в виде структуры массивов.
+Позиции, скорости, шаги начала анимации и флаги жизни хранятся в массивах NumPy фиксированной ёмкости,
+свободные ячейки переиспользуются.
+
+Параметры:
+capacity (int): Количество ячеек.
+bounds (tuple): Границы хитбокса относительно центра (min_x, max_x, min_y, max_y).
+recycle (bool): При заполнении занимать ячейку самого старого объекта вместо отказа.
+"""
+class EntityArrays:
+    def __init__(self, capacity, bounds, recycle):
+        self.capacity = capacity
+        self.min_x, self.max_x, self.min_y, self.max_y = bounds
+        self.recycle = recycle
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.change_x = np.zeros(capacity)
+        self.change_y = np.zeros(capacity)
+        # Шаг мира, с которого идёт клип анимации объекта; кадр считается из него при отрисовке
+        self.animation_start = np.zeros(capacity, dtype=np.int64)
+        # Сколько шагов объект спит за экраном (0 - на экране)
+        self.dormant = np.zeros(capacity, dtype=np.int64)
+        # Порядковый номер появления, чтобы находить самый старый объект
+        self.born = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Куча свободных ячеек: занимается наименьшая, как спрайт в SpritePool
+        self.free = list(range(capacity))
+        self.spawned = 0
+        self.exhausted = 0
+
+    @property
+    def count(self):
+        return self.capacity - len(self.free)
+
+    """
+    Функция занятия ячейки под новый объект.
+    Возвращает номер ячейки или None, если места нет.
+    """
+    def spawn(self, x, y, change_x, change_y, tick=0):
+        if self.free:
+            slot = heapq.heappop(self.free)
+        else:
+            self.exhausted += 1
+            if not self.recycle or self.capacity == 0:
+                return None
+            slot = int(np.argmin(self.born))
+        self.x[slot] = x
+        self.y[slot] = y
+        self.change_x[slot] = change_x
+        self.change_y[slot] = change_y
+        self.animation_start[slot] = tick
+        self.dormant[slot] = 0
+        self.born[slot] = self.spawned
+        self.alive[slot] = True
+        self.spawned += 1
+        return slot
+
+    """
+    Функция освобождения ячеек.
+
+    Параметры:
+    slots (numpy.ndarray): Номера ячеек живых объектов.
+    """
+    def kill(self, slots):
+        if len(slots):
+            self.alive[slots] = False
+            for slot in slots.tolist():
+                heapq.heappush(self.free, slot)
+
+    """
+    Функция получения границ хитбоксов живых объектов.
+    Возвращает номера ячеек и массивы left, right, bottom, top.
+
+    Параметры:
+    mask (numpy.ndarray): Какие ячейки брать; по умолчанию все живые.
+    """
+    def boxes(self, mask=None):
+        slots = np.flatnonzero(self.alive if mask is None else mask)
+        x = self.x[slots]
+        y = self.y[slots]
+        return slots, x + self.min_x, x + self.max_x, y + self.min_y, y + self.max_y
+
+    """
+    Функция снимка состояния: копии массивов, порядок свободных ячеек и счётчики.
+    """
+    def snapshot(self):
+        return tuple(getattr(self, name).copy() for name in ARRAY_FIELDS), list(self.free), self.spawned, self.exhausted
+
+    def restore(self, snapshot):
+        arrays, free, self.spawned, self.exhausted = snapshot
+        for name, values in zip(ARRAY_FIELDS, arrays):
+            np.copyto(getattr(self, name), values)
+        self.free = list(free)
+
+    def pack_snapshot(self, snapshot):
+        arrays, free, spawned, exhausted = snapshot
+        header = struct.pack("<IQQ", len(free), spawned, exhausted)
+        return header + b"".join(values.tobytes() for values in arrays) + np.asarray(free, dtype=np.int32).tobytes()
+
+    def unpack_snapshot(self, data, offset):
+        free_count, spawned, exhausted = struct.unpack_from("<IQQ", data, offset)
+        offset += struct.calcsize("<IQQ")
+        arrays = []
+        for name in ARRAY_FIELDS:
+            dtype = getattr(self, name).dtype
+            arrays.append(np.frombuffer(data, dtype, self.capacity, offset).copy())
+            offset += self.capacity * dtype.itemsize
+        free = np.frombuffer(data, np.int32, free_count, offset).tolist()
+        offset += free_count * 4
+        return (tuple(arrays), free, spawned, exhausted), offset
+
+    def stats(self):
+        return {"active": self.count, "free": len(self.free), "capacity": self.capacity, "exhausted": self.exhausted}
+
+
+"""
+Класс, представляющий врагов и снаряды в виде массивов NumPy.
+Реализует тот же набор методов, что и SpriteEntities: все объекты сдвигаются одним пакетным шагом,
+выход за пределы экрана отсекается векторной маской, столкновения считаются по хитбоксам сразу для всех.
+Спрайты нужны только для отрисовки: sync_sprites переносит в них результат перед отрисовкой,
+а кадры анимации врагов считает сразу для всех по шагу часов анимации.
+"""
+class ArrayEntities:
+    def __init__(self, animations, enemy_capacity, projectile_capacity):
+        if np is None:
+            raise RuntimeError("Для хранения врагов и снарядов в массивах нужен пакет numpy")
+        self.animations = animations
+        self.enemy_clip = load_animations().get(ENEMY_CLIP)
+        projectile_texture = registry.get(PROJECTILE_TEXTURES[0])
+        self.enemies = EntityArrays(enemy_capacity, hit_box_bounds(self.enemy_clip.textures[0], ENEMY_SCALING), recycle=False)
+        self.projectiles = EntityArrays(projectile_capacity, hit_box_bounds(projectile_texture, PROJECTILE_SCALING), recycle=True)
+
+        self.enemy_list = arcade.SpriteList()
+        self.projectile_list = arcade.SpriteList()
+        # Спрайты создаются только при первой отрисовке ячейки
+        self._enemy_sprites = [None] * enemy_capacity
+        self._projectile_sprites = [None] * projectile_capacity
+        self._enemy_shown = np.zeros(enemy_capacity, dtype=bool)
+        self._projectile_shown = np.zeros(projectile_capacity, dtype=bool)
+
+    def spawn_enemy(self, x, y, direction):
+        return self.enemies.spawn(x, y, ENEMY_SPEED * direction, 0, self.animations.tick) is not None
+
+    def spawn_projectile(self, x, y, direction_x, direction_y=0):
+        return self.projectiles.spawn(x, y, PROJECTILE_SPEED * direction_x, PROJECTILE_SPEED * direction_y) is not None
+
+    def update(self, viewport):
+        self.update_projectiles(viewport)
+        self.update_enemies(viewport)
+
+    def update_projectiles(self, viewport):
+        view_left, view_right, view_bottom, view_top = viewport
+        projectiles = self.projectiles
+        alive = projectiles.alive
+        np.add(projectiles.x, projectiles.change_x, out=projectiles.x, where=alive)
+        np.add(projectiles.y, projectiles.change_y, out=projectiles.y, where=alive)
+        outside = ((projectiles.x + projectiles.max_x < view_left) | (projectiles.x + projectiles.min_x > view_right)
+                   | (projectiles.y + projectiles.max_y < view_bottom) | (projectiles.y + projectiles.min_y > view_top))
+        projectiles.kill(np.flatnonzero(alive & outside))
+
+    """
+    Функция обновления врагов.
+    Как и Enemy.update: враги на экране двигаются каждый шаг, враги за экраном спят
+    и сдвигаются раз в DORMANT_UPDATE_TICKS шагов, а дальше DORMANT_MARGIN от экрана исчезают.
+    """
+    def update_enemies(self, viewport):
+        view_left, view_right, view_bottom, view_top = viewport
+        enemies = self.enemies
+        alive = enemies.alive
+        outside = (enemies.x + enemies.max_x < view_left) | (enemies.x + enemies.min_x > view_right)
+        dormant = alive & outside
+        awake = alive & ~outside
+        # Проснувшиеся враги начинают клип заново, как в SpriteEntities; спящие не анимируются (sync_sprites их пропускает)
+        enemies.animation_start[awake & (enemies.dormant > 0)] = self.animations.tick
+        enemies.dormant[awake] = 0
+        enemies.dormant[dormant] += 1
+        wake_up = dormant & (enemies.dormant % DORMANT_UPDATE_TICKS == 0)
+        enemies.x[wake_up] += enemies.change_x[wake_up] * DORMANT_UPDATE_TICKS
+        gone = wake_up & ((enemies.x + enemies.max_x < view_left - DORMANT_MARGIN)
+                          | (enemies.x + enemies.min_x > view_right + DORMANT_MARGIN))
+        enemies.kill(np.flatnonzero(gone))
+        enemies.x[awake] += enemies.change_x[awake]
+
+    """
+    Функция проверки столкновений снарядов с врагами.
+    Как и в SpriteEntities, враг достаётся первому снаряду, который его задел,
+    а снаряд исчезает, если сбил хотя бы одного врага. Возвращает количество сбитых врагов.
+    Хитбоксы снарядов растянуты на путь за шаг, как в physics.swept_box.
+    """
+    def hit_enemies(self):
+        projectile_slots, p_left, p_right, p_bottom, p_top = self.projectiles.boxes()
+        change_x = self.projectiles.change_x[projectile_slots]
+        change_y = self.projectiles.change_y[projectile_slots]
+        p_left = p_left - np.maximum(change_x, 0)
+        p_right = p_right - np.minimum(change_x, 0)
+        p_bottom = p_bottom - np.maximum(change_y, 0)
+        p_top = p_top - np.minimum(change_y, 0)
+        enemy_slots, e_left, e_right, e_bottom, e_top = self.enemies.boxes(self.awake_enemies())
+        if not len(projectile_slots) or not len(enemy_slots):
+            return 0
+        hits = ((p_left[:, None] < e_right) & (e_left < p_right[:, None])
+                & (p_bottom[:, None] < e_top) & (e_bottom < p_top[:, None]))
+        enemy_hit = hits.any(axis=0)
+        if not enemy_hit.any():
+            return 0
+        first_projectile = hits.argmax(axis=0)[enemy_hit]
+        self.projectiles.kill(projectile_slots[np.unique(first_projectile)])
+        self.enemies.kill(enemy_slots[enemy_hit])
+        return int(enemy_hit.sum())
+
+    """
+    Функция проверки столкновений игрока с врагами.
+    Убирает врагов, задевших игрока, и возвращает их количество.
+    """
+    def hit_player(self, player):
+        enemy_slots, e_left, e_right, e_bottom, e_top = self.enemies.boxes(self.awake_enemies())
+        hit = (player.left < e_right) & (e_left < player.right) & (player.bottom < e_top) & (e_bottom < player.top)
+        hit_slots = enemy_slots[hit]
+        self.enemies.kill(hit_slots)
+        return len(hit_slots)
+
+    # Спящие враги, как и в SpriteEntities, не сталкиваются и не рисуются
+    def awake_enemies(self):
+        return self.enemies.alive & (self.enemies.dormant == 0)
+
+    def _sync(self, arrays, alive, sprites, shown, sprite_list, factory):
+        for slot in np.flatnonzero(alive != shown).tolist():
+            sprite = sprites[slot]
+            if sprite is None:
+                sprite = sprites[slot] = factory()
+            if alive[slot]:
+                sprite_list.append(sprite)
+            else:
+                sprite_list.remove(sprite)
+        shown[:] = alive
+        slots = np.flatnonzero(alive)
+        return slots, [sprites[slot] for slot in slots.tolist()]
+
+    """
+    Функция переноса состояния из массивов в спрайты.
+    Вызывается только перед отрисовкой; без окна спрайты не создаются вовсе.
+    """
+    def sync_sprites(self):
+        enemies = self.enemies
+        slots, sprites = self._sync(enemies, self.awake_enemies(), self._enemy_sprites, self._enemy_shown, self.enemy_list, Enemy)
+        clip = self.enemy_clip
+        frames = ((self.animations.tick - enemies.animation_start[slots]) // clip.frame_ticks % len(clip.textures)).tolist()
+        textures = clip.textures
+        for sprite, x, y, frame in zip(sprites, enemies.x[slots].tolist(), enemies.y[slots].tolist(), frames):
+            sprite.center_x = x
+            sprite.center_y = y
+            sprite.texture = textures[frame]
+
+        projectiles = self.projectiles
+        slots, sprites = self._sync(projectiles, projectiles.alive, self._projectile_sprites, self._projectile_shown, self.projectile_list, Projectile)
+        for sprite, x, y in zip(sprites, projectiles.x[slots].tolist(), projectiles.y[slots].tolist()):
+            sprite.center_x = x
+            sprite.center_y = y
+
+    def enemy_positions(self):
+        alive = self.enemies.alive
+        return list(zip(self.enemies.x[alive].tolist(), self.enemies.y[alive].tolist()))
+
+    # Номера ячеек служат постоянными номерами объектов, как номера спрайтов в пулах у SpriteEntities
+    def slot_positions(self):
+        result = []
+        for arrays, mask in ((self.enemies, self.awake_enemies()), (self.projectiles, self.projectiles.alive)):
+            slots = np.flatnonzero(mask)
+            result.append((slots.tolist(), arrays.x[slots].tolist(), arrays.y[slots].tolist()))
+        return tuple(result)
+
+    def snapshot(self):
+        return self.enemies.snapshot(), self.projectiles.snapshot()
+
+    def restore(self, snapshot):
+        self.enemies.restore(snapshot[0])
+        self.projectiles.restore(snapshot[1])
+
+    def pack_snapshot(self, snapshot):
+        return self.enemies.pack_snapshot(snapshot[0]) + self.projectiles.pack_snapshot(snapshot[1])
+
+    def unpack_snapshot(self, data, offset):
+        enemies, offset = self.enemies.unpack_snapshot(data, offset)
+        projectiles, offset = self.projectiles.unpack_snapshot(data, offset)
+        return (enemies, projectiles), offset
+
+    def state_bytes(self):
+        enemies = self.enemies.alive
+        projectiles = self.projectiles.alive
+        return b"".join((
+            self.enemies.x[enemies].tobytes(), self.enemies.y[enemies].tobytes(),
+            self.projectiles.x[projectiles].tobytes(), self.projectiles.y[projectiles].tobytes(),
+        ))
+
+    @property
+    def enemy_count(self):
+        return self.enemies.count
+
+    @property
+    def projectile_count(self):
+        return self.projectiles.count
+
+    def stats(self):
+        enemies = dict(self.enemies.stats(), dormant=int(np.count_nonzero(self.enemies.alive & (self.enemies.dormant > 0))))
+        return {"projectiles": self.projectiles.stats(), "enemies": enemies}
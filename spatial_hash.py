@@ -0,0 +1,136 @@
+# Размер ячейки сетки в пикселях (ширина платформы)
+CELL_SIZE = 128
+
+
+"""
+Функция проверки пересечения прямоугольников (AABB).
+Используется как грубая проверка столкновения по умолчанию.
+"""
+def overlaps(a, b):
+    return a.left < b.right and b.left < a.right and a.bottom < b.top and b.bottom < a.top
+
+
+"""
+Класс, представляющий пространственный хеш.
+Делит мир на квадратные ячейки и хранит для каждой ячейки объекты, которые её задевают.
+Запрос возвращает только объекты из ячеек рядом с заданным прямоугольником,
+поэтому стоимость проверки не зависит от размера мира.
+Объекты должны иметь свойства left, right, bottom и top.
+"""
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells = {}
+        # Для каждого объекта - диапазон ячеек, в которые он записан
+        self._spans = {}
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __contains__(self, obj):
+        return obj in self._spans
+
+    def _span(self, left, right, bottom, top):
+        size = self.cell_size
+        return int(left // size), int(right // size), int(bottom // size), int(top // size)
+
+    def _add(self, obj, span):
+        x0, x1, y0, y1 = span
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [obj]
+                else:
+                    bucket.append(obj)
+        self._spans[obj] = span
+
+    def _discard(self, obj, span):
+        x0, x1, y0, y1 = span
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells[(cx, cy)]
+                bucket.remove(obj)
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    """
+    Функция добавления объекта в хеш.
+    """
+    def insert(self, obj):
+        if obj in self._spans:
+            self.move(obj)
+            return
+        self._add(obj, self._span(obj.left, obj.right, obj.bottom, obj.top))
+
+    """
+    Функция удаления объекта из хеша.
+    Если объекта в хеше нет, ничего не происходит.
+    """
+    def remove(self, obj):
+        span = self._spans.pop(obj, None)
+        if span is not None:
+            self._discard(obj, span)
+
+    """
+    Функция обновления положения объекта.
+    Переписывает объект в другие ячейки только если он пересёк границу ячейки.
+    """
+    def move(self, obj):
+        span = self._span(obj.left, obj.right, obj.bottom, obj.top)
+        old_span = self._spans.get(obj)
+        if old_span == span:
+            return
+        if old_span is not None:
+            self._discard(obj, old_span)
+        self._add(obj, span)
+
+    """
+    Функция синхронизации хеша со списком подвижных объектов.
+    Обновляет положение всех объектов из списка и удаляет из хеша те, которых в списке больше нет.
+    Вызывается один раз за тик для врагов и снарядов.
+    """
+    def sync(self, objects):
+        alive = set()
+        for obj in objects:
+            alive.add(obj)
+            self.move(obj)
+        if len(alive) != len(self._spans):
+            for obj in [obj for obj in self._spans if obj not in alive]:
+                self.remove(obj)
+
+    def clear(self):
+        self._cells.clear()
+        self._spans.clear()
+
+    """
+    Функция запроса объектов в прямоугольнике.
+    Возвращает кандидатов из ячеек, которые задевает прямоугольник, без точной проверки пересечения.
+    """
+    def query(self, left, right, bottom, top):
+        x0, x1, y0, y1 = self._span(left, right, bottom, top)
+        cells = self._cells
+        found = []
+        seen = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for obj in bucket:
+                        if obj not in seen:
+                            seen.add(obj)
+                            found.append(obj)
+        return found
+
+    """
+    Функция поиска столкновений объекта с содержимым хеша.
+
+    Параметры:
+    obj: Объект, для которого ищутся столкновения.
+    check (callable): Точная проверка столкновения двух объектов, по умолчанию AABB.
+    """
+    def collide(self, obj, check=overlaps):
+        candidates = self.query(obj.left, obj.right, obj.bottom, obj.top)
+        return [other for other in candidates if other is not obj and check(obj, other)]
@@ -0,0 +1,97 @@
+from collections import deque
+
+# Сколько врагов может быть в мире одновременно
+SPAWN_MAX_LIVE = 32
+# Сколько появлений в секунду разрешено в среднем и сколько можно накопить на всплеск
+SPAWN_RATE = 2.0
+SPAWN_BURST = 8
+# Во сколько раз медленнее копится бюджет, пока кадры не укладываются во время
+THROTTLED_RATE_FACTOR = 0.25
+# Сколько отложенных появлений ждать; самые старые сверх этого отбрасываются
+SPAWN_QUEUE_SIZE = 16
+
+
+"""
+Класс, представляющий распорядителя появления врагов.
+Все источники врагов (начальные, на новой территории, по таймеру) подают заявки сюда.
+Заявка выполняется сразу, если есть бюджет и врагов меньше max_live, иначе откладывается
+до тех пор, пока бюджет не накопится; переполненная очередь теряет самые старые заявки.
+Бюджет копится по игровому времени (корзина маркеров), поэтому решения воспроизводимы.
+Пока кадры не укладываются во время (throttled), бюджет копится в THROTTLED_RATE_FACTOR раз медленнее.
+
+Параметры:
+spawn (callable): spawn(request) выполняет заявку и возвращает True, если враг появился.
+live (callable): live() возвращает, сколько врагов в мире сейчас.
+max_live (int): Максимум врагов одновременно.
+rate (float): Средний бюджет появлений в секунду.
+burst (int): Наибольший накопленный бюджет.
+queue_size (int): Наибольшее количество отложенных заявок.
+"""
+class SpawnDirector:
+    def __init__(self, spawn, live, max_live=SPAWN_MAX_LIVE, rate=SPAWN_RATE, burst=SPAWN_BURST, queue_size=SPAWN_QUEUE_SIZE):
+        self.spawn = spawn
+        self.live = live
+        self.max_live = max_live
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.queue = deque()
+        self.queue_size = queue_size
+        self.throttled = False
+        self.requested = 0
+        self.granted = 0
+        self.deferred = 0
+        self.dropped = 0
+
+    def _can_spawn(self):
+        return self.tokens >= 1 and self.live() < self.max_live
+
+    def _grant(self, request):
+        self.tokens -= 1
+        if self.spawn(request):
+            self.granted += 1
+        else:
+            self.dropped += 1
+
+    """
+    Функция подачи заявки на появление врага.
+
+    Параметры:
+    request: Описание появления, которое получит spawn.
+    """
+    def request(self, request):
+        self.requested += 1
+        if not self.queue and self._can_spawn():
+            self._grant(request)
+            return
+        self.deferred += 1
+        self.queue.append(request)
+        if len(self.queue) > self.queue_size:
+            self.queue.popleft()
+            self.dropped += 1
+
+    """
+    Функция продвижения распорядителя на шаг.
+    Пополняет бюджет и выполняет отложенные заявки, пока он есть.
+
+    Параметры:
+    delta_time (float): Шаг игрового времени.
+    """
+    def update(self, delta_time):
+        rate = self.rate * THROTTLED_RATE_FACTOR if self.throttled else self.rate
+        self.tokens = min(self.burst, self.tokens + rate * delta_time)
+        while self.queue and self._can_spawn():
+            self._grant(self.queue.popleft())
+
+    def stats(self):
+        return {
+            "requested": self.requested, "granted": self.granted, "deferred": self.deferred, "dropped": self.dropped,
+            "queued": len(self.queue), "throttled": self.throttled,
+        }
+
+    def snapshot(self):
+        return (self.tokens, self.throttled, tuple(self.queue), self.requested, self.granted, self.deferred, self.dropped)
+
+    def restore(self, snapshot):
+        self.tokens, self.throttled, queue, self.requested, self.granted, self.deferred, self.dropped = snapshot
+        self.queue = deque(queue)
@@ -0,0 +1,243 @@
+import struct
+
+from world import BACKEND_NUMPY, BACKEND_SPRITES, PLAYER_STATES, SCREEN_WIDTH, World
+
+# Формат файла снимка:
+#   заголовок STATE_HEADER (метка, версия, режим хранения врагов, зерно мира,
+#   уровень из файла: есть ли он, его зерно и длина, ёмкости пулов врагов и снарядов)
+#   WORLD_STRUCT и PLAYER_STRUCT
+#   события игровых часов: количество, затем (время, номер имени в TIMER_CALLBACKS)
+#   распорядитель появления врагов: SPAWNER_STRUCT и очередь заявок
+#   состояние генератора появления врагов
+#   враги и снаряды в формате своего хранилища (pack_snapshot)
+STATE_MAGIC = b"PLSS"
+STATE_VERSION = 3
+STATE_HEADER = struct.Struct("<4sBBQ?QQII")
+WORLD_STRUCT = struct.Struct("<QQ???qqqdd?")
+PLAYER_STRUCT = struct.Struct("<dddd??q??dBqq")
+TIMER_STRUCT = struct.Struct("<dB")
+SPAWNER_STRUCT = struct.Struct("<d?QQQQH")
+REQUEST_STRUCT = struct.Struct("<?q")
+RANDOM_STRUCT = struct.Struct("<B625I?d")
+BACKEND_CODES = {BACKEND_SPRITES: 0, BACKEND_NUMPY: 1}
+BACKEND_NAMES = {code: name for name, code in BACKEND_CODES.items()}
+# Методы World, которые планируются на игровых часах
+TIMER_CALLBACKS = ("spawn_scheduled_enemy", "end_triple_shoot")
+
+
+"""
+Функция описания уровня для снимка: зерно и длина трассы уровня из файла, None для процедурного мира.
+"""
+def level_identity(level):
+    return None if level is None else (level.seed, level.length)
+
+
+"""
+Функция чтения заголовка снимка.
+Возвращает зерно, режим хранения врагов, описание уровня (level_identity) и ёмкости пулов врагов и снарядов.
+"""
+def read_header(data):
+    (magic, version, backend, seed, has_level, level_seed, level_length,
+     enemy_capacity, projectile_capacity) = STATE_HEADER.unpack_from(data)
+    if magic != STATE_MAGIC:
+        raise ValueError("Файл не является снимком состояния игры")
+    if version != STATE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка: {version}")
+    level = (level_seed, level_length) if has_level else None
+    return seed, BACKEND_NAMES[backend], level, enemy_capacity, projectile_capacity
+
+
+"""
+Класс, представляющий снимок состояния игрока.
+"""
+class PlayerState:
+    __slots__ = ("x", "y", "change_x", "change_y", "jumping", "facing_right", "health", "on_platform",
+                 "triple_shoot", "triple_shoot_end_time", "state", "animation_start", "hit_until")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+"""
+Класс, представляющий снимок состояния мира.
+Хранит всё, от чего зависит дальнейший ход игры: счётчики мира, игрока, ожидающие события часов,
+распорядителя появления врагов, генератор появления врагов и самих врагов со снарядами.
+Платформы в снимок не входят: они заново строятся по зерну чанков.
+
+Параметры:
+values: Значения полей в порядке __slots__.
+"""
+class WorldState:
+    __slots__ = ("seed", "backend", "level", "enemy_capacity", "projectile_capacity",
+                 "tick", "kills", "game_over", "fall_through", "cheat_activated",
+                 "view_left", "view_bottom", "generated_x", "clock_time", "time_scale", "paused",
+                 "player", "timers", "spawner", "spawn_random", "entities")
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    """
+    Функция перевода снимка в компактный двоичный вид.
+    """
+    def to_bytes(self, entities):
+        level_seed, level_length = self.level or (0, 0)
+        out = bytearray(STATE_HEADER.pack(STATE_MAGIC, STATE_VERSION, BACKEND_CODES[self.backend], self.seed,
+                                          self.level is not None, level_seed, level_length,
+                                          self.enemy_capacity, self.projectile_capacity))
+        out += WORLD_STRUCT.pack(self.tick, self.kills, self.game_over, self.fall_through, self.cheat_activated,
+                                 self.view_left, self.view_bottom, self.generated_x, self.clock_time, self.time_scale, self.paused)
+        out += PLAYER_STRUCT.pack(*self.player.values())
+        out += struct.pack("<H", len(self.timers))
+        for time, name in self.timers:
+            out += TIMER_STRUCT.pack(time, TIMER_CALLBACKS.index(name))
+        tokens, throttled, queue, requested, granted, deferred, dropped = self.spawner
+        out += SPAWNER_STRUCT.pack(tokens, throttled, requested, granted, deferred, dropped, len(queue))
+        for side, y in queue:
+            out += REQUEST_STRUCT.pack(side == "left", y)
+        version, internal, gauss_next = self.spawn_random
+        out += RANDOM_STRUCT.pack(version, *internal, gauss_next is not None, gauss_next or 0.0)
+        out += entities.pack_snapshot(self.entities)
+        return bytes(out)
+
+    """
+    Функция чтения снимка из двоичного вида.
+    Враги и снаряды читаются хранилищем мира world, поэтому мир должен быть создан
+    с тем же режимом хранения и теми же ёмкостями, что и при записи.
+    """
+    @classmethod
+    def from_bytes(cls, data, entities):
+        header = read_header(data)
+        offset = STATE_HEADER.size
+        world_values = WORLD_STRUCT.unpack_from(data, offset)
+        offset += WORLD_STRUCT.size
+        player = PlayerState(*PLAYER_STRUCT.unpack_from(data, offset))
+        offset += PLAYER_STRUCT.size
+        timer_count, = struct.unpack_from("<H", data, offset)
+        offset += 2
+        timers = []
+        for _ in range(timer_count):
+            time, name = TIMER_STRUCT.unpack_from(data, offset)
+            timers.append((time, TIMER_CALLBACKS[name]))
+            offset += TIMER_STRUCT.size
+        tokens, throttled, requested, granted, deferred, dropped, queue_length = SPAWNER_STRUCT.unpack_from(data, offset)
+        offset += SPAWNER_STRUCT.size
+        queue = []
+        for _ in range(queue_length):
+            left, y = REQUEST_STRUCT.unpack_from(data, offset)
+            queue.append(("left" if left else "right", y))
+            offset += REQUEST_STRUCT.size
+        spawner = (tokens, throttled, tuple(queue), requested, granted, deferred, dropped)
+        random_values = RANDOM_STRUCT.unpack_from(data, offset)
+        offset += RANDOM_STRUCT.size
+        spawn_random = (random_values[0], random_values[1:626], random_values[627] if random_values[626] else None)
+        entity_snapshot, offset = entities.unpack_snapshot(data, offset)
+        return cls(*header, *world_values, player, timers, spawner, spawn_random, entity_snapshot)
+
+
+"""
+Функция снимка состояния мира.
+Копирует только значения, без ссылок на объекты мира, поэтому мир можно продолжать
+и потом вернуть к снимку сколько угодно раз.
+"""
+def snapshot(world):
+    player = world.player
+    return WorldState(
+        world.seed, world.backend, level_identity(world.level), world.enemy_capacity, world.projectile_capacity,
+        world.tick, world.kills, world.game_over, world.fall_through, world.cheat_activated,
+        world.view_left, world.view_bottom, world.chunks.generated_x,
+        world.clock.time, world.clock.time_scale, world.clock.paused,
+        PlayerState(player.center_x, player.center_y, player.change_x, player.change_y, player.jumping,
+                    player.facing_right, player.health, player.on_platform, player.triple_shoot,
+                    player.triple_shoot_end_time, PLAYER_STATES.index(player.state),
+                    world.animations.start_of(player), player.hit_until),
+        [(timer.time, timer.callback.__name__) for timer in world.clock.timers()],
+        world.spawner.snapshot(),
+        world.random.spawn.getstate(),
+        world.entities.snapshot(),
+    )
+
+
+"""
+Функция возврата мира к снимку.
+Мир должен иметь то же зерно, режим хранения врагов, уровень и ёмкости пулов, что и мир, с которого снят снимок.
+Уже загруженные чанки не перестраиваются, поэтому откат того же мира на несколько шагов назад дешёвый;
+при загрузке из файла (load) чанки вокруг экрана строятся заново.
+"""
+def restore(world, state):
+    if ((state.seed, state.backend, state.level, state.enemy_capacity, state.projectile_capacity)
+            != (world.seed, world.backend, level_identity(world.level), world.enemy_capacity, world.projectile_capacity)):
+        raise ValueError("Снимок сделан с другого мира")
+    world.tick = state.tick
+    world.kills = state.kills
+    world.game_over = state.game_over
+    world.fall_through = state.fall_through
+    world.cheat_activated = state.cheat_activated
+    world.view_left = state.view_left
+    world.view_bottom = state.view_bottom
+    # Клипы запускаются заново с записанных шагов начала, поэтому кадры совпадают с кадрами снимка
+    world.animations.reset(state.tick)
+
+    player = world.player
+    (player.center_x, player.center_y, player.change_x, player.change_y, player.jumping, player.facing_right,
+     player.health, player.on_platform, player.triple_shoot, player.triple_shoot_end_time, player_state,
+     animation_start, player.hit_until) = state.player.values()
+    player.state = PLAYER_STATES[player_state]
+    world.animations.play(player, world.player_clips[player.state], not player.facing_right, animation_start)
+
+    clock = world.clock
+    clock.time = state.clock_time
+    clock.time_scale = state.time_scale
+    clock.paused = state.paused
+    clock.clear()
+    player.triple_shoot_timer = None
+    for time, name in state.timers:
+        timer = clock.schedule_at(time, getattr(world, name))
+        if name == "end_triple_shoot":
+            player.triple_shoot_timer = timer
+
+    world.spawner.restore(state.spawner)
+    world.random.spawn.setstate(state.spawn_random)
+    world.entities.restore(state.entities)
+
+    # Чанки вокруг экрана; новых врагов при этом не появляется, граница созданного мира берётся из снимка
+    chunks = world.chunks
+    chunks.generated_x = state.generated_x
+    chunks.stream(world.view_left, world.view_left + SCREEN_WIDTH)
+    chunks.build()
+    chunks.generated_x = state.generated_x
+
+
+def save(world, path):
+    with open(path, "wb") as file:
+        file.write(snapshot(world).to_bytes(world.entities))
+
+
+"""
+Функция загрузки мира из файла снимка.
+Создаёт мир с зерном, режимом и ёмкостями пулов из снимка и возвращает его к состоянию снимка.
+Если снимок сделан на другом уровне или с другими ёмкостями, чем заданы в world_options, выдаёт ValueError.
+
+Параметры:
+world_options (dict): Остальные параметры конструктора World. Режим хранения врагов всегда берётся из снимка,
+    ёмкости пулов - если не заданы.
+"""
+def load(path, **world_options):
+    with open(path, "rb") as file:
+        data = file.read()
+    seed, backend, level, enemy_capacity, projectile_capacity = read_header(data)
+    if level != level_identity(world_options.get("level")):
+        raise ValueError("Снимок сделан на другом уровне")
+    world_options["backend"] = backend
+    world_options.setdefault("enemy_capacity", enemy_capacity)
+    world_options.setdefault("projectile_capacity", projectile_capacity)
+    if (world_options["enemy_capacity"], world_options["projectile_capacity"]) != (enemy_capacity, projectile_capacity):
+        raise ValueError(f"Снимок сделан с другими ёмкостями пулов: врагов {enemy_capacity}, снарядов {projectile_capacity}")
+    world = World(seed, **world_options)
+    world.setup()
+    restore(world, WorldState.from_bytes(data, world.entities))
+    return world
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+from textures import hit_box_bounds, registry
+
+# Описание платформы чанка: картинка, центр и является ли платформа полом
+Tile = namedtuple("Tile", "image x y is_floor")
+# Запечённый участок: картинка, центр спрайта, сдвиги копий кадра в текстуре (TextureRegistry.get_baked),
+# прямоугольник столкновений и является ли участок полом
+Slab = namedtuple("Slab", "image x y offsets left right bottom top is_floor")
+
+
+"""
+Функция запекания статической геометрии чанка.
+Плитки одной картинки на одной высоте, хитбоксы которых перекрываются или касаются,
+сливаются в один участок: один спрайт с общей текстурой и один прямоугольник столкновений.
+Пол чанка (плитка через каждые 64 пикселя) превращается в один участок.
+Выполняется вместе с генерацией чанка, в том числе в фоновом потоке.
+
+Параметры:
+tiles (list): Описания плиток (Tile).
+"""
+def bake_tiles(tiles):
+    bounds = {}
+    runs = {}
+    for tile in sorted(tiles, key=lambda tile: (tile.image, tile.y, tile.is_floor, tile.x)):
+        if tile.image not in bounds:
+            bounds[tile.image] = hit_box_bounds(registry.get(tile.image), 1)
+        min_x, max_x, min_y, max_y = bounds[tile.image]
+        # Участки одной картинки на одной высоте: [левый край, центры плиток, правый край]
+        line = runs.setdefault((tile.image, tile.y, tile.is_floor), [])
+        if line and tile.x + min_x <= line[-1][2]:
+            line[-1][1].append(tile.x)
+            line[-1][2] = max(line[-1][2], tile.x + max_x)
+        else:
+            line.append([tile.x + min_x, [tile.x], tile.x + max_x])
+
+    slabs = []
+    for (image, y, is_floor), line in runs.items():
+        min_x, max_x, min_y, max_y = bounds[image]
+        for left, xs, right in line:
+            offsets = tuple(int(x - xs[0]) for x in xs)
+            slabs.append(Slab(image, xs[0] + offsets[-1] / 2, y, offsets, left, right, y + min_y, y + max_y, is_floor))
+    return slabs
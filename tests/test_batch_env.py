@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from batch_env import BUTTON_DOWN, BUTTON_LEFT, BUTTON_RIGHT, HELD_BUTTONS, HELD_MASK, NUM_ACTIONS, PULSE_BUTTONS, WorldArrays
+from chunks import CHUNK_WIDTH
+from world import BACKEND_NUMPY, PLAYER_MAX_HEALTH, PRESS, RELEASE, World
+
+NUM_WORLDS = 4
+TICKS = 2000
+
+
+"""
+Функция случайных действий агента.
+Чётные миры почти всегда идут вправо, чтобы подгружались новые чанки и появлялись враги на новой территории,
+нечётные жмут что попало, включая спрыгивание с платформ.
+"""
+def random_actions(rng, actions):
+    change = rng.random(len(actions)) < 0.1
+    chosen = rng.integers(0, NUM_ACTIONS, len(actions))
+    runner = np.arange(len(actions)) % 2 == 0
+    chosen = np.where(runner, (chosen & ~(BUTTON_LEFT | BUTTON_DOWN)) | BUTTON_RIGHT, chosen)
+    return np.where(change, chosen, actions)
+
+
+"""
+Функция событий ввода за шаг в том же порядке, что и BatchEnv.step:
+отпускания и нажатия удерживаемых клавиш, затем прыжок и выстрел.
+Возвращает список (вид, действие, маска миров).
+"""
+def input_events(actions, held):
+    events = []
+    for button, action in HELD_BUTTONS:
+        events.append((RELEASE, action, (held & button != 0) & (actions & button == 0)))
+    for button, action in HELD_BUTTONS:
+        events.append((PRESS, action, (actions & button != 0) & (held & button == 0)))
+    for button, action in PULSE_BUTTONS:
+        events.append((PRESS, action, actions & button != 0))
+    return events
+
+
+def world_state(world):
+    player = world.player
+    enemies = world.entities.enemies
+    projectiles = world.entities.projectiles
+    return (
+        player.center_x, player.center_y, player.change_x, player.change_y, player.health, world.kills, world.game_over,
+        world.view_left, player.triple_shoot,
+        np.flatnonzero(enemies.alive).tolist(), enemies.x[enemies.alive].tolist(), enemies.y[enemies.alive].tolist(),
+        np.flatnonzero(projectiles.alive).tolist(), projectiles.x[projectiles.alive].tolist(),
+        projectiles.y[projectiles.alive].tolist(),
+    )
+
+
+def array_state(worlds, env):
+    enemies = worlds.enemies.alive[env]
+    projectiles = worlds.projectiles.alive[env]
+    return (
+        worlds.x[env], worlds.y[env], worlds.change_x[env], worlds.change_y[env], worlds.health[env], worlds.kills[env],
+        worlds.game_over[env], worlds.view_left[env], worlds.triple_shoot[env],
+        np.flatnonzero(enemies).tolist(), worlds.enemies.x[env][enemies].tolist(), worlds.enemies.y[env][enemies].tolist(),
+        np.flatnonzero(projectiles).tolist(), worlds.projectiles.x[env][projectiles].tolist(),
+        worlds.projectiles.y[env][projectiles].tolist(),
+    )
+
+
+"""
+Миры в общих массивах повторяют правила World: при тех же зерне и вводе игрок, счёт, здоровье,
+враги и снаряды совпадают на каждом шаге.
+"""
+@pytest.mark.parametrize("first_seed", [1, 100])
+def test_world_arrays_match_world(first_seed):
+    worlds = WorldArrays(NUM_WORLDS)
+    reference = []
+    for env in range(NUM_WORLDS):
+        worlds.reset(env, first_seed + env)
+        world = World(first_seed + env, BACKEND_NUMPY)
+        world.setup()
+        reference.append(world)
+    rng = np.random.default_rng(first_seed)
+    actions = np.zeros(NUM_WORLDS, dtype=np.int64)
+    held = np.zeros(NUM_WORLDS, dtype=np.int64)
+    for tick in range(TICKS):
+        actions = random_actions(rng, actions)
+        world_inputs = [[] for _ in range(NUM_WORLDS)]
+        for kind, action, mask in input_events(actions, held):
+            if kind == PRESS:
+                worlds.press(action, mask)
+            else:
+                worlds.release(action, mask)
+            for env in np.flatnonzero(mask).tolist():
+                world_inputs[env].append((kind, action))
+        held = actions & HELD_MASK
+        worlds.step()
+        for env, world in enumerate(reference):
+            world.step(world_inputs[env])
+            assert array_state(worlds, env) == world_state(world), f"мир {env} разошёлся на шаге {tick}"
+
+    # Прогон должен задеть подгрузку новых чанков, убийства и потерю здоровья, иначе сравнение мало что проверяет
+    assert max(world.view_left for world in reference) > 3 * CHUNK_WIDTH
+    assert sum(world.kills for world in reference) > 0
+    assert any(world.player.health < PLAYER_MAX_HEALTH for world in reference)
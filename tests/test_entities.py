@@ -0,0 +1,38 @@
+from headless import RandomInput
+from world import BACKEND_NUMPY, BACKEND_SPRITES, World
+
+TICKS = 2000
+
+
+"""
+Спящие враги сняты с часов анимации, а у врагов на экране оба способа хранения
+показывают один и тот же кадр клипа, в том числе после пробуждения.
+"""
+def test_dormant_enemies_are_not_animated_and_frames_match_backends():
+    worlds = []
+    for backend in (BACKEND_SPRITES, BACKEND_NUMPY):
+        world = World(5, backend)
+        world.setup()
+        worlds.append(world)
+    sprites, arrays = worlds
+    input_source = RandomInput(2)
+    sleeping = set()
+    woken = 0
+    for tick in range(TICKS):
+        inputs = input_source(tick)
+        for world in worlds:
+            world.step(inputs)
+        arrays.entities.sync_sprites()
+        for enemy in sprites.enemy_list:
+            if enemy.visible:
+                if enemy in sleeping:
+                    # Проснувшийся враг начинает клип на шаге пробуждения
+                    assert sprites.animations.start_of(enemy) == tick
+                    sleeping.discard(enemy)
+                    woken += 1
+                assert enemy.texture is arrays.entities._enemy_sprites[enemy.slot].texture, f"кадр врага {enemy.slot} на шаге {tick}"
+            else:
+                sleeping.add(enemy)
+                assert sprites.animations.clip_of(enemy) is None
+    # Сравнение должно задеть врагов, которые уснули и проснулись
+    assert woken > 0
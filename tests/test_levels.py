@@ -0,0 +1,22 @@
+import pytest
+
+from chunks import CHUNK_WIDTH
+from levels import LEVEL_HEADER, LevelFile, generate_level
+
+
+"""
+Уровень, нарезанный на чанки другой ширины, не открывается: иначе он отдавал бы миру не те чанки.
+"""
+def test_level_with_other_chunk_width_is_refused(tmp_path):
+    path = tmp_path / "level.lvl"
+    generate_level(path, 4, 1)
+    level = LevelFile(path)
+    assert (level.chunk_width, level.length) == (CHUNK_WIDTH, 4 * CHUNK_WIDTH)
+    level.close()
+
+    data = bytearray(path.read_bytes())
+    magic, version, chunk_width, chunk_count, seed = LEVEL_HEADER.unpack_from(data)
+    LEVEL_HEADER.pack_into(data, 0, magic, version, chunk_width // 2, chunk_count, seed)
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        LevelFile(path)
@@ -0,0 +1,62 @@
+import pytest
+
+import state
+from headless import RandomInput
+from levels import LevelFile, generate_level
+from world import BACKEND_NUMPY, BACKEND_SPRITES, World
+
+SAVE_TICK = 700
+TICKS = 1500
+
+
+def run_world(world, inputs, start, stop):
+    hashes = []
+    for tick in range(start, stop):
+        world.step(inputs[tick])
+        hashes.append((world.state_hash(), world.entities.slot_positions()))
+    return hashes
+
+
+"""
+Мир, загруженный из сохранения, идёт дальше точно так же, как мир, который не прерывали:
+совпадают хеш состояния и номера ячеек врагов и снарядов на каждом шаге.
+"""
+@pytest.mark.parametrize("backend", [BACKEND_SPRITES, BACKEND_NUMPY])
+def test_save_load_continues_like_uninterrupted_run(backend, tmp_path):
+    path = tmp_path / "state.bin"
+    world = World(5, backend)
+    world.setup()
+    # RandomInput помнит своё состояние, поэтому ввод для обоих прогонов выбирается заранее
+    input_source = RandomInput(2)
+    inputs = [input_source(tick) for tick in range(TICKS)]
+    run_world(world, inputs, 0, SAVE_TICK)
+    state.save(world, path)
+    expected = run_world(world, inputs, SAVE_TICK, TICKS)
+
+    loaded = state.load(path)
+    assert loaded.backend == backend and loaded.tick == SAVE_TICK
+    assert run_world(loaded, inputs, SAVE_TICK, TICKS) == expected
+
+
+def test_load_refuses_other_capacities(tmp_path):
+    path = tmp_path / "state.bin"
+    world = World(5, BACKEND_NUMPY, enemy_capacity=32)
+    world.setup()
+    state.save(world, path)
+    assert state.load(path).enemy_capacity == 32
+    with pytest.raises(ValueError):
+        state.load(path, enemy_capacity=64)
+
+
+def test_load_refuses_other_level(tmp_path):
+    generate_level(tmp_path / "a.lvl", 4, 1)
+    generate_level(tmp_path / "b.lvl", 4, 2)
+    path = tmp_path / "state.bin"
+    world = World(5, BACKEND_NUMPY, level=LevelFile(tmp_path / "a.lvl"))
+    world.setup()
+    state.save(world, path)
+    assert state.load(path, level=LevelFile(tmp_path / "a.lvl")).tick == 0
+    with pytest.raises(ValueError):
+        state.load(path, level=LevelFile(tmp_path / "b.lvl"))
+    with pytest.raises(ValueError):
+        state.load(path)
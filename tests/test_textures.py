@@ -0,0 +1,16 @@
+from textures import PLATFORM_TEXTURES, TextureRegistry
+
+
+"""
+Запечённые текстуры учитываются в статистике реестра: первая сборка - промах, повторная - попадание.
+"""
+def test_baked_lookups_are_counted():
+    registry = TextureRegistry()
+    offsets = (0, 64, 128)
+    first = registry.get_baked(PLATFORM_TEXTURES[0], offsets)
+    assert registry.get_baked(PLATFORM_TEXTURES[0], offsets) is first
+    registry.get_baked(PLATFORM_TEXTURES[0], (0,))
+    stats = registry.stats()
+    assert (stats["baked_hits"], stats["baked_misses"]) == (1, 1)
+    # Одиночная плитка - обычная текстура, она идёт через get; сама плитка уже загружена сборкой выше
+    assert (stats["hits"], stats["misses"]) == (1, 0)
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+
+import arcade
+import PIL.Image
+import PIL.ImageOps
+
+# Кадры рыцаря: 0 - стоит на месте, 1 - в прыжке или падении
+KNIGHT_TEXTURES = ["images/knight_0.png", "images/knight_1.png"]
+# Кадры анимации монстров
+ENEMY_TEXTURES = ["images/s1_0.png", "images/s2_0.png", "images/s3_0.png", "images/s4_0.png"]
+# Кадры снаряда
+PROJECTILE_TEXTURES = ["images/coin_0.png"]
+# Пол и воздушные платформы
+PLATFORM_TEXTURES = ["images/platform_0.png", "images/platform_1.png"]
+# Что нужно для первого экрана: игрок, пол, платформы и первые враги.
+# Остальное (снаряды и кадры клипов кроме animation.STARTUP_CLIPS) догружается в фоне, пока игра уже идёт.
+STARTUP_TEXTURES = KNIGHT_TEXTURES + PLATFORM_TEXTURES + ENEMY_TEXTURES
+DEFERRED_TEXTURES = PROJECTILE_TEXTURES
+# Индекс атласа, который собирает resize_images.py
+ATLAS_INDEX = "images/atlas.json"
+
+
+"""
+Класс, представляющий реестр текстур.
+Загружает каждую текстуру (и при необходимости её зеркальный вариант) один раз
+и затем раздаёт ссылки на неё всем спрайтам.
+Если загружен атлас, кадры вырезаются из него, а не читаются каждый из своего файла;
+файлы, которых нет в атласе, по-прежнему загружаются с диска.
+Счётчики hits/misses показывают, сколько раз текстура была найдена в реестре
+и сколько раз её пришлось загружать с диска уже после старта; baked_hits/baked_misses -
+то же для запечённых текстур (get_baked), которые собираются при генерации чанков.
+Реестром пользуется и поток генерации чанков, поэтому счётчики меняются под замком.
+"""
+class TextureRegistry:
+    def __init__(self):
+        self._textures = {}
+        self.hits = 0
+        self.misses = 0
+        self.baked_hits = 0
+        self.baked_misses = 0
+        self._atlas_image = None
+        # Имя кадра (имя файла без расширения) -> [x, y, ширина, высота] в атласе
+        self._atlas_regions = {}
+        # Загрузка идёт и из фонового потока, поэтому создание текстур под замком
+        self._lock = threading.Lock()
+        # Потоки фоновой загрузки, которые ещё не дождались (wait)
+        self._background = []
+        # Выполнена ли уже загрузка текстур игры (load_textures)
+        self.loaded = False
+
+    """
+    Функция загрузки атласа.
+    Читает изображение атласа и индекс кадров; сами текстуры создаются при предзагрузке.
+
+    Параметры:
+    index_path (str): Путь к индексу атласа.
+    """
+    def load_atlas(self, index_path=ATLAS_INDEX):
+        with open(index_path, encoding="utf-8") as file:
+            index = json.load(file)
+        image_path = os.path.join(os.path.dirname(index_path), index["image"])
+        self._atlas_image = PIL.Image.open(image_path).convert("RGBA")
+        self._atlas_regions = index["frames"]
+
+    """
+    Функция предварительной загрузки.
+    Загружает перечисленные файлы с диска, не изменяя счётчики попаданий и промахов.
+
+    Параметры:
+    file_names (list): Пути к файлам текстур.
+    mirrored (bool): Загрузить также зеркальный вариант каждой текстуры.
+    """
+    def preload(self, file_names, mirrored=False):
+        for file_name in file_names:
+            self._load(file_name, False)
+            if mirrored:
+                self._load(file_name, True)
+
+    """
+    Функция фоновой загрузки.
+    Загружает текстуры в отдельном потоке и по умолчанию заранее считает их хитбоксы,
+    чтобы первое появление спрайта не тормозило кадр.
+    Если текстура понадобится раньше, get() загрузит её сам, дождавшись замка.
+
+    Параметры:
+    file_names (list): Пути к файлам текстур.
+    mirrored (bool): Загрузить также зеркальный вариант каждой текстуры.
+    hit_boxes (bool): Считать хитбоксы. Кадрам клипов анимации они не нужны (хитбокс спрайта
+        берётся с его первой текстуры), а подсчёт в сотни раз дороже самой загрузки из атласа.
+    """
+    def preload_background(self, file_names, mirrored=False, hit_boxes=True):
+        def worker():
+            for file_name in file_names:
+                for texture_mirrored in (False, True) if mirrored else (False,):
+                    texture = self._load(file_name, texture_mirrored)
+                    if hit_boxes:
+                        texture.hit_box_points
+
+        thread = threading.Thread(target=worker, name="texture-preload", daemon=True)
+        thread.start()
+        self._background.append(thread)
+        return thread
+
+    def wait(self):
+        while self._background:
+            self._background.pop().join()
+
+    def _load(self, file_name, mirrored):
+        key = (file_name, mirrored)
+        texture = self._textures.get(key)
+        if texture is None:
+            with self._lock:
+                texture = self._textures.get(key)
+                if texture is None:
+                    texture = self._load_from_atlas(file_name, mirrored)
+                    if texture is None:
+                        texture = arcade.load_texture(file_name, flipped_horizontally=mirrored)
+                    self._textures[key] = texture
+        return texture
+
+    def _load_from_atlas(self, file_name, mirrored):
+        region = self._atlas_regions.get(os.path.splitext(os.path.basename(file_name))[0])
+        if region is None:
+            return None
+        x, y, width, height = region
+        image = self._atlas_image.crop((x, y, x + width, y + height))
+        if mirrored:
+            image = PIL.ImageOps.mirror(image)
+        return arcade.Texture(f"{file_name}:mirrored" if mirrored else file_name, image)
+
+    """
+    Функция получения текстуры.
+    Возвращает текстуру из реестра; если её там нет, загружает с диска и считает промах.
+    """
+    def get(self, file_name, mirrored=False):
+        texture = self._textures.get((file_name, mirrored))
+        with self._lock:
+            if texture is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if texture is None:
+            return self._load(file_name, mirrored)
+        return texture
+
+    """
+    Функция получения запечённой текстуры: копии одного кадра, нарисованные со сдвигами в одну картинку.
+    Одинаковые наборы сдвигов (например, пол каждого чанка) получают одну общую текстуру.
+
+    Параметры:
+    file_name (str): Путь к файлу кадра.
+    offsets (tuple): Сдвиги копий от левого края картинки по возрастанию; первый - 0.
+    """
+    def get_baked(self, file_name, offsets):
+        if len(offsets) == 1:
+            return self.get(file_name)
+        key = (file_name, offsets)
+        texture = self._textures.get(key)
+        if texture is not None:
+            with self._lock:
+                self.baked_hits += 1
+            return texture
+        tile = self._load(file_name, False)
+        with self._lock:
+            texture = self._textures.get(key)
+            # Текстуру мог уже собрать другой поток, пока этот ждал замка
+            if texture is not None:
+                self.baked_hits += 1
+                return texture
+            self.baked_misses += 1
+            image = PIL.Image.new("RGBA", (offsets[-1] + tile.width, tile.height), (0, 0, 0, 0))
+            for offset in offsets:
+                image.alpha_composite(tile.image, (offset, 0))
+            name = f"{file_name}:baked:{','.join(map(str, offsets))}"
+            # Хитбокс - прямоугольник картинки: столкновения с участками считает физика по SolidRect,
+            # а подсчёт контура по пикселям широкой картинки был самой долгой частью создания чанка
+            texture = self._textures[key] = arcade.Texture(name, image, hit_box_algorithm=None)
+        return texture
+
+    def get_list(self, file_names, mirrored=False):
+        return [self.get(file_name, mirrored) for file_name in file_names]
+
+    def stats(self):
+        return {"loaded": len(self._textures), "hits": self.hits, "misses": self.misses,
+                "baked_hits": self.baked_hits, "baked_misses": self.baked_misses, "atlas_frames": len(self._atlas_regions)}
+
+
+"""
+Функция вычисления границ хитбокса текстуры относительно её центра.
+Возвращает (min_x, max_x, min_y, max_y) с учётом масштаба спрайта.
+"""
+def hit_box_bounds(texture, scale):
+    xs = [x for x, _ in texture.hit_box_points]
+    ys = [y for _, y in texture.hit_box_points]
+    return min(xs) * scale, max(xs) * scale, min(ys) * scale, max(ys) * scale
+
+
+# Общий реестр текстур игры
+registry = TextureRegistry()
+
+
+"""
+Функция загрузки текстур игры; кадры клипов анимации догружает animation.load_animations.
+Вызывается один раз при старте, после этого спрайты только получают ссылки из реестра.
+Если атлас собран, все кадры берутся из одного файла.
+Повторный вызов ничего не делает.
+
+Параметры:
+lazy (bool): Загрузить сразу только текстуры первого экрана, остальные - в фоновом потоке.
+"""
+def load_textures(lazy=False):
+    if registry.loaded:
+        return registry
+    if os.path.exists(ATLAS_INDEX) and not registry._atlas_regions:
+        registry.load_atlas()
+    registry.preload(STARTUP_TEXTURES)
+    if lazy:
+        registry.preload_background(DEFERRED_TEXTURES)
+    else:
+        registry.preload(DEFERRED_TEXTURES)
+    registry.loaded = True
+    return registry
@@ -0,0 +1,853 @@
+import arcade
+import struct
+import zlib
+
+from animation import Animator, load_animations
+from chunks import CHUNK_BUILD_BUDGET, CHUNK_WIDTH, ChunkManager
+from clock import GameClock
+from physics import PlatformPhysics, SolidRect, swept_collide
+from profiler import FrameProfiler
+from pools import POLICY_DROP, POLICY_RECYCLE, PooledSprite, SpritePool
+from rng import GameRandom
+from spatial_hash import SpatialHash
+from spawner import SPAWN_MAX_LIVE, SPAWN_RATE, SpawnDirector
+from terrain import Tile, bake_tiles
+from textures import ENEMY_TEXTURES, KNIGHT_TEXTURES, PROJECTILE_TEXTURES, registry
+
+# Константы
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+PLAYER_MOVEMENT_SPEED = 5
+GRAVITY = 1
+PLAYER_JUMP_SPEED = 20
+PLAYER_SCALING = 1
+PROJECTILE_SPEED = 10
+ENEMY_SPEED = 2
+PLAYER_MAX_HEALTH = 5
+VIEWPORT_MARGIN = 200
+RIGHT_MARGIN = 400
+FALL_THRU_SPEED = -5
+TRIPLE_SHOOT_DURATION = 5  # Продолжительность стрельбы в три стороны (секунды)
+CHEAT_TRIPLE_SHOOT_DURATION = 15  # Сколько секунд тройного выстрела даёт Ctrl+1
+ENEMY_SPAWN_INTERVAL = 3  # Среднее время между появлениями одиночных врагов (секунды)
+PROJECTILE_POOL_SIZE = 256  # Максимум снарядов одновременно; старые снаряды уступают место новым
+ENEMY_POOL_SIZE = 128  # Максимум врагов одновременно; сверх него враги не появляются
+ENEMY_FIELDS = 6  # Значений на врага в снимке состояния (SpriteEntities.snapshot)
+PROJECTILE_FIELDS = 5  # Значений на снаряд в снимке состояния
+DORMANT_MARGIN = 400  # Враги за экраном дальше этого расстояния исчезают, ближе - спят
+DORMANT_UPDATE_TICKS = 8  # Спящий враг сдвигается раз в столько шагов сразу на весь путь
+CHUNK_OVERHANG = 64  # Насколько платформы чанка могут выступать за его границы (половина ширины платформы)
+PLAYER_START_X = 50  # Где игрок появляется в начале игры
+PLAYER_START_Y = 100
+PROJECTILE_SCALING = 0.5
+ENEMY_SCALING = 1
+TRIPLE_SHOOT_KILLS = 10  # Стрельбу в три стороны включает каждый такой по счёту убитый враг
+START_ENEMIES = 4  # Врагов в начале игры
+CHUNK_ENEMIES = 2  # Врагов на каждом впервые созданном чанке
+ENEMY_SPAWN_MARGIN = 50  # Отступ высоты появления врага от низа и верха экрана
+PLATFORM_LEVELS = 2  # Уровней случайных платформ в чанке
+PLATFORMS_PER_LEVEL = (2, 5)  # Наименьшее и наибольшее количество платформ на уровне
+# Наибольшее количество запечённых участков в процедурном чанке: пол и по участку на каждую платформу
+MAX_CHUNK_SLABS = 1 + PLATFORM_LEVELS * PLATFORMS_PER_LEVEL[1]
+
+# Фиксированный шаг симуляции
+TICK_RATE = 60
+TICK_DURATION = 1 / TICK_RATE
+
+# Действия игрока, на которые отображаются клавиши
+ACTION_LEFT = 0
+ACTION_RIGHT = 1
+ACTION_JUMP = 2
+ACTION_DOWN = 3
+ACTION_FIRE = 4
+ACTION_CHEAT = 5
+# Не действие игрока: окно сообщает, что кадры не укладываются во время (нажатие) или снова укладываются (отпускание).
+# Передаётся событием ввода, чтобы попадать в запись и воспроизводиться одинаково.
+ACTION_THROTTLE = 6
+ACTIONS = (ACTION_LEFT, ACTION_RIGHT, ACTION_JUMP, ACTION_DOWN, ACTION_FIRE, ACTION_CHEAT, ACTION_THROTTLE)
+
+# Вид события ввода: нажатие или отпускание
+PRESS = 0
+RELEASE = 1
+
+# Способ хранения врагов и снарядов: спрайты в пулах или массивы NumPy (soa.py)
+BACKEND_SPRITES = "sprites"
+BACKEND_NUMPY = "numpy"
+
+# Состояния игрока и клипы анимации (images/animations.json), которые в них играют.
+# В листе рыцаря нет кадров прыжка, поэтому в прыжке и падении играет кувырок.
+PLAYER_STATES = ("idle", "run", "jump", "hit", "death")
+PLAYER_CLIPS = {"idle": "knight/idle", "run": "knight/run", "jump": "knight/roll", "hit": "knight/hit", "death": "knight/death"}
+ENEMY_CLIP = "slime/walk"
+
+"""
+Функция заявок на появление врагов: для каждого врага сторона экрана ("left" или "right") и высота.
+Случайные числа берутся из потока появления мира, поэтому порядок вызовов входит в правила игры.
+
+Параметры:
+rng (random.Random): Поток появления врагов (GameRandom.spawn).
+num_enemies (int): Количество врагов.
+"""
+def spawn_requests(rng, num_enemies):
+    requests = []
+    for _ in range(num_enemies):
+        side = rng.choice(["left", "right"])
+        y = rng.randint(ENEMY_SPAWN_MARGIN, SCREEN_HEIGHT - ENEMY_SPAWN_MARGIN)
+        requests.append((side, y))
+    return requests
+
+
+"""
+Класс, представляющий игрока.
+Отвечает за управление и обновление состояния игрока, включая передвижение, прыжки, стрельбу и здоровье.
+"""
+class Player(arcade.Sprite):
+    def __init__(self):
+        super().__init__(scale=PLAYER_SCALING, texture=registry.get(KNIGHT_TEXTURES[0]))
+        # Хитбокс задаётся один раз по первому кадру, чтобы кадры анимации не меняли столкновения
+        self.hit_box = self.texture.hit_box_points
+        self.state = "idle"
+        # До какого шага мира играет анимация удара
+        self.hit_until = 0
+        self.center_x = PLAYER_START_X
+        self.center_y = PLAYER_START_Y
+        self.change_x = 0
+        self.change_y = 0
+        self.jumping = False
+        self.facing_right = True
+        self.health = PLAYER_MAX_HEALTH
+        self.on_platform = False
+        self.triple_shoot = False
+        self.triple_shoot_end_time = 0
+        # Событие игровых часов, которое отключит стрельбу в три стороны
+        self.triple_shoot_timer = None
+
+    """
+    Функция выбора состояния игрока для анимации.
+    Движение и столкновения с платформами считает PlatformPhysics, кадры меняет Animator;
+    здесь только решается, какой клип должен играть.
+
+    Параметры:
+    tick (int): Текущий шаг мира.
+    game_over (bool): Игра окончена.
+    """
+    def update_state(self, tick, game_over):
+        if game_over:
+            self.state = "death"
+        elif tick < self.hit_until:
+            self.state = "hit"
+        elif not self.on_platform:
+            self.state = "jump"
+        elif self.change_x:
+            self.state = "run"
+        else:
+            self.state = "idle"
+        return self.state
+
+
+"""
+Класс, представляющий платформу.
+Отвечает за создание платформ и их свойства, такие как позиция и является ли платформа полом.
+"""
+class Platform(arcade.Sprite):
+    def __init__(self, image, x, y, is_floor=False, texture=None):
+        super().__init__(scale=1, texture=texture or registry.get(image))
+        self.center_x = x
+        self.center_y = y
+        self.is_floor = is_floor
+
+
+"""
+Класс, представляющий снаряд.
+Отвечает за создание и движение снарядов, выпущенных игроком.
+"""
+class Projectile(PooledSprite):
+    def __init__(self, x=0, y=0, direction_x=0, direction_y=0):
+        super().__init__(scale=PROJECTILE_SCALING, texture=registry.get(PROJECTILE_TEXTURES[0]))
+        self.reset(x, y, direction_x, direction_y)
+
+    """
+    Функция переинициализации снаряда на месте при выдаче из пула.
+    """
+    def reset(self, x, y, direction_x, direction_y=0):
+        self.center_x = x
+        self.center_y = y
+        self.change_x = PROJECTILE_SPEED * direction_x
+        self.change_y = PROJECTILE_SPEED * direction_y
+
+    """
+    Функция обновления состояния снаряда.
+    Обновляет позицию снаряда и удаляет его, если он выходит за пределы экрана.
+
+    Параметры:
+    viewport (tuple): Видимая область мира (left, right, bottom, top).
+    """
+    def update(self, viewport):
+        self.center_x += self.change_x
+        self.center_y += self.change_y
+        view_left, view_right, view_bottom, view_top = viewport
+        if self.right < view_left or self.left > view_right or self.top < view_bottom or self.bottom > view_top:
+            self.remove_from_sprite_lists()
+
+
+"""
+Класс, представляющий врага.
+Отвечает за создание врагов, их движение и проверку столкновений с игроком.
+"""
+class Enemy(PooledSprite):
+    def __init__(self, x=0, y=0, direction=1):
+        # super().__init__("images/slime_green_10.png", 1)
+        super().__init__(scale=ENEMY_SCALING, texture=registry.get(ENEMY_TEXTURES[0]))
+        # Хитбокс по первому кадру, как у ArrayEntities; кадры анимации его не меняют
+        self.hit_box = self.texture.hit_box_points
+        self.reset(x, y, direction)
+
+    """
+    Функция переинициализации врага на месте при выдаче из пула.
+    """
+    def reset(self, x, y, direction):
+        self.center_x = x
+        self.center_y = y
+        self.change_x = ENEMY_SPEED * direction
+        self.dormant_ticks = 0
+        self.visible = True
+
+    """
+    Функция обновления состояния врага.
+    Враг на экране двигается каждый шаг; кадры анимации меняет Animator. Враг за экраном спит:
+    не анимируется (SpriteEntities.update_enemies снимает его с часов анимации),
+    не рисуется и сдвигается раз в DORMANT_UPDATE_TICKS шагов сразу на весь путь;
+    отойдя от экрана дальше DORMANT_MARGIN, он исчезает.
+    Возвращает True, если враг спит.
+
+    Параметры:
+    viewport (tuple): Видимая область мира (left, right, bottom, top).
+    """
+    def update(self, viewport):
+        view_left, view_right, view_bottom, view_top = viewport
+        if self.right < view_left or self.left > view_right:
+            self.dormant_ticks += 1
+            if self.dormant_ticks % DORMANT_UPDATE_TICKS == 0:
+                self.center_x += self.change_x * DORMANT_UPDATE_TICKS
+                if self.right < view_left - DORMANT_MARGIN or self.left > view_right + DORMANT_MARGIN:
+                    self.remove_from_sprite_lists()
+            if self.visible:
+                self.visible = False
+            return True
+        if not self.visible:
+            self.visible = True
+            self.dormant_ticks = 0
+
+        self.center_x += self.change_x
+        return False
+
+
+"""
+Класс, представляющий врагов и снарядов в виде спрайтов.
+Каждый спрайт обновляется своим методом update, столкновения ищутся через пространственный хеш.
+Тот же набор методов реализует ArrayEntities из soa.py.
+
+Параметры:
+animations (Animator): Часы анимации мира; враги играют на них клип ENEMY_CLIP.
+enemy_capacity (int): Максимум врагов одновременно.
+projectile_capacity (int): Максимум снарядов одновременно.
+"""
+class SpriteEntities:
+    def __init__(self, animations, enemy_capacity=ENEMY_POOL_SIZE, projectile_capacity=PROJECTILE_POOL_SIZE):
+        self.animations = animations
+        self.enemy_clip = load_animations().get(ENEMY_CLIP)
+        self.projectile_list = arcade.SpriteList()
+        self.enemy_list = arcade.SpriteList()
+        # Пулы переиспользуемых снарядов и врагов; анимация врага останавливается, когда он возвращается в пул.
+        # Снаряды создаются при первых выстрелах, а не при старте: на первом экране их ещё нет
+        self.projectile_pool = SpritePool(Projectile, self.projectile_list, projectile_capacity, POLICY_RECYCLE, prefill=False)
+        self.enemy_pool = SpritePool(Enemy, self.enemy_list, enemy_capacity, POLICY_DROP, on_reclaim=animations.stop)
+        # Пространственный индекс врагов на экране; спящие в него не попадают
+        self.enemy_index = SpatialHash()
+        self.dormant = 0
+
+    def spawn_enemy(self, x, y, direction):
+        enemy = self.enemy_pool.acquire(x, y, direction)
+        if enemy is None:
+            return False
+        self.animations.play(enemy, self.enemy_clip)
+        return True
+
+    def spawn_projectile(self, x, y, direction_x, direction_y=0):
+        return self.projectile_pool.acquire(x, y, direction_x, direction_y) is not None
+
+    def update(self, viewport):
+        self.update_projectiles(viewport)
+        self.update_enemies(viewport)
+
+    def update_projectiles(self, viewport):
+        for projectile in list(self.projectile_list):
+            projectile.update(viewport)
+
+    """
+    Функция обновления врагов.
+    Уснувший враг снимается с часов анимации, проснувшийся начинает клип заново.
+    """
+    def update_enemies(self, viewport):
+        awake = []
+        for enemy in list(self.enemy_list):
+            was_visible = enemy.visible
+            if enemy.update(viewport):
+                if was_visible:
+                    self.animations.stop(enemy)
+            else:
+                if not was_visible:
+                    self.animations.play(enemy, self.enemy_clip)
+                awake.append(enemy)
+        self.dormant = len(self.enemy_list) - len(awake)
+        self.enemy_index.sync(awake)
+
+    """
+    Функция проверки столкновений снарядов с врагами.
+    Снаряд проверяется по всему пути за шаг (swept AABB), поэтому не пролетает сквозь врага.
+    Убирает попавшие снаряды и сбитых врагов, возвращает количество сбитых врагов.
+    """
+    def hit_enemies(self):
+        kills = 0
+        # Копия списка: попавшие снаряды убираются из него по ходу обхода
+        for projectile in list(self.projectile_list):
+            hit_list = swept_collide(projectile, self.enemy_index)
+            if hit_list:
+                projectile.remove_from_sprite_lists()
+                for enemy in hit_list:
+                    enemy.remove_from_sprite_lists()
+                    self.enemy_index.remove(enemy)
+                    kills += 1
+        return kills
+
+    """
+    Функция проверки столкновений игрока с врагами.
+    Убирает врагов, задевших игрока, и возвращает их количество.
+    """
+    def hit_player(self, player):
+        hits = 0
+        for enemy in self.enemy_index.collide(player, arcade.check_for_collision):
+            enemy.remove_from_sprite_lists()
+            self.enemy_index.remove(enemy)
+            hits += 1
+        return hits
+
+    def sync_sprites(self):
+        # Спрайты и есть состояние, переносить нечего
+        pass
+
+    def enemy_positions(self):
+        return [(enemy.center_x, enemy.center_y) for enemy in self.enemy_list]
+
+    """
+    Функция позиций видимых врагов и всех снарядов по постоянным номерам спрайтов в пулах.
+    Возвращает для врагов и для снарядов списки (номера, x, y); номер не меняется, пока объект жив,
+    поэтому по нему можно сравнивать соседние снимки (server.py).
+    """
+    def slot_positions(self):
+        enemies = [enemy for enemy in self.enemy_list if enemy.visible]
+        return (
+            ([enemy.slot for enemy in enemies], [enemy.center_x for enemy in enemies], [enemy.center_y for enemy in enemies]),
+            ([projectile.slot for projectile in self.projectile_list], [projectile.center_x for projectile in self.projectile_list],
+             [projectile.center_y for projectile in self.projectile_list]),
+        )
+
+    """
+    Функция снимка состояния врагов и снарядов.
+    Возвращает два плоских кортежа значений (по ENEMY_FIELDS и PROJECTILE_FIELDS на объект)
+    в порядке списков спрайтов: от порядка зависят столкновения. Первое значение объекта - номер
+    его спрайта в пуле, чтобы после восстановления номера (и следующие занятые ячейки) не сдвинулись.
+    """
+    def snapshot(self):
+        enemies = []
+        for enemy in self.enemy_list:
+            # У спящего врага клипа нет
+            animation_start = self.animations.start_of(enemy)
+            enemies += (enemy.slot, enemy.center_x, enemy.center_y, enemy.change_x,
+                        0 if animation_start is None else animation_start, enemy.dormant_ticks)
+        projectiles = []
+        for projectile in self.projectile_list:
+            projectiles += (projectile.slot, projectile.center_x, projectile.center_y, projectile.change_x, projectile.change_y)
+        return tuple(enemies), tuple(projectiles)
+
+    def restore(self, snapshot):
+        enemies, projectiles = snapshot
+        for sprite in list(self.enemy_list) + list(self.projectile_list):
+            sprite.remove_from_sprite_lists()
+        awake = []
+        for i in range(0, len(enemies), ENEMY_FIELDS):
+            slot, x, y, change_x, animation_start, dormant_ticks = enemies[i:i + ENEMY_FIELDS]
+            enemy = self.enemy_pool.acquire_slot(int(slot), x, y, 1)
+            enemy.change_x = change_x
+            enemy.dormant_ticks = int(dormant_ticks)
+            enemy.visible = not dormant_ticks
+            if not dormant_ticks:
+                self.animations.play(enemy, self.enemy_clip, start=int(animation_start))
+                awake.append(enemy)
+        self.dormant = len(self.enemy_list) - len(awake)
+        self.enemy_index.sync(awake)
+        for i in range(0, len(projectiles), PROJECTILE_FIELDS):
+            slot, x, y, change_x, change_y = projectiles[i:i + PROJECTILE_FIELDS]
+            projectile = self.projectile_pool.acquire_slot(int(slot), x, y, 0, 0)
+            projectile.change_x = change_x
+            projectile.change_y = change_y
+
+    def pack_snapshot(self, snapshot):
+        return b"".join(struct.pack(f"<I{len(values)}d", len(values), *values) for values in snapshot)
+
+    """
+    Функция чтения снимка из байтов.
+    Возвращает снимок и смещение сразу после него.
+    """
+    def unpack_snapshot(self, data, offset):
+        snapshot = []
+        for _ in range(2):
+            count, = struct.unpack_from("<I", data, offset)
+            snapshot.append(struct.unpack_from(f"<{count}d", data, offset + 4))
+            offset += 4 + count * 8
+        return tuple(snapshot), offset
+
+    def state_bytes(self):
+        values = []
+        for sprite in self.enemy_list:
+            values += (sprite.center_x, sprite.center_y)
+        for sprite in self.projectile_list:
+            values += (sprite.center_x, sprite.center_y)
+        return struct.pack(f"<{len(values)}d", *values)
+
+    @property
+    def enemy_count(self):
+        return len(self.enemy_list)
+
+    @property
+    def projectile_count(self):
+        return len(self.projectile_list)
+
+    def stats(self):
+        return {"projectiles": self.projectile_pool.stats(), "enemies": dict(self.enemy_pool.stats(), dormant=self.dormant)}
+
+
+"""
+Класс, представляющий игровой мир.
+Содержит всю симуляцию: игрока, платформы, снаряды, врагов, столкновения, спавн,
+прокрутку и счёт. Не зависит от окна, поэтому может работать без дисплея.
+Мир продвигается фиксированными шагами через step(inputs).
+
+Параметры:
+seed (int): Зерно мира; при одинаковых зерне и вводе сессия повторяется полностью.
+backend (str): Хранение врагов и снарядов, BACKEND_SPRITES или BACKEND_NUMPY.
+enemy_capacity (int): Максимум врагов одновременно.
+projectile_capacity (int): Максимум снарядов одновременно.
+profiler (FrameProfiler): Профилировщик фаз шага; по умолчанию выключенный.
+chunk_budget (float): Время на создание объектов невидимых чанков за шаг (секунды).
+spawn_max_live (int): Максимум врагов одновременно (см. SpawnDirector).
+spawn_rate (float): Средний бюджет появлений врагов в секунду.
+level (LevelFile): Готовый уровень из файла (levels.py); без него рельеф генерируется по зерну.
+"""
+class World:
+    def __init__(self, seed=None, backend=BACKEND_SPRITES, enemy_capacity=ENEMY_POOL_SIZE,
+                 projectile_capacity=PROJECTILE_POOL_SIZE, profiler=None, chunk_budget=CHUNK_BUILD_BUDGET,
+                 spawn_max_live=SPAWN_MAX_LIVE, spawn_rate=SPAWN_RATE, level=None):
+        # Потоки случайных чисел для рельефа и появления врагов
+        self.random = GameRandom(seed)
+        self.seed = self.random.seed
+        self.backend = backend
+        self.profiler = profiler if profiler is not None else FrameProfiler()
+        self.enemy_capacity = enemy_capacity
+        self.projectile_capacity = projectile_capacity
+        self.player = None
+        # Платформы загруженных чанков: отдельный список спрайтов на чанк, чтобы рисовать только видимые
+        self.platform_lists = {}
+        # Враги и снаряды; списки спрайтов для отрисовки берутся из них
+        self.entities = None
+        self.projectile_list = None
+        self.enemy_list = None
+        # Пространственный индекс статических платформ и физика игрока поверх него
+        self.platform_index = None
+        self.physics = None
+        self.chunks = None
+        self.chunk_budget = chunk_budget
+        self.spawn_max_live = spawn_max_live
+        self.spawn_rate = spawn_rate
+        self.spawner = None
+        self.level = level
+        self.clock = None
+        # Общие часы анимации: кадры игрока и врагов меняются одним пакетом за шаг
+        self.animations = None
+        # Клипы игрока по состояниям (PLAYER_CLIPS)
+        self.player_clips = {}
+        self.kills = 0
+        self.game_over = False
+        self.tick = 0
+
+        self.view_left = 0
+        self.view_bottom = 0
+        # Конец трассы уровня: дальше игрок не проходит, а экран не прокручивается; у процедурного мира конца нет
+        self.end_of_map = level.length if level is not None else 0
+        self.fall_through = False
+        self.cheat_activated = False
+
+    """
+    Функция настройки мира.
+    Инициализирует игрока, платформы, снаряды и врагов.
+    """
+    def setup(self):
+        # Все текстуры загружаются один раз, дальше спрайты берут их из реестра
+        animations = load_animations()
+        self.player_clips = {state: animations.get(clip) for state, clip in PLAYER_CLIPS.items()}
+        self.clock = GameClock()
+        self.animations = Animator(self.tick)
+        self.player = Player()
+        self.animate_player()
+        self.platform_lists = {}
+        if self.backend == BACKEND_NUMPY:
+            # NumPy нужен только для этого режима
+            from soa import ArrayEntities
+            self.entities = ArrayEntities(self.animations, self.enemy_capacity, self.projectile_capacity)
+        else:
+            self.entities = SpriteEntities(self.animations, self.enemy_capacity, self.projectile_capacity)
+        self.projectile_list = self.entities.projectile_list
+        self.enemy_list = self.entities.enemy_list
+        self.spawner = SpawnDirector(self.spawn_enemy, lambda: self.entities.enemy_count, self.spawn_max_live, self.spawn_rate)
+        self.platform_index = SpatialHash()
+        self.physics = PlatformPhysics(self.platform_index, GRAVITY)
+        generate_chunk = self.generate_chunk if self.level is None else self.read_level_chunk
+        self.chunks = ChunkManager(generate_chunk, self.build_platform, self.unload_chunk, self.random.terrain_seed)
+
+        # Создание пола и воздушных платформ для первых чанков
+        self.chunks.stream(self.view_left, self.view_left + SCREEN_WIDTH)
+        self.chunks.build()
+
+        # Добавление врагов и монет
+        if self.level is None:
+            self.spawn_entities()
+        else:
+            self.spawn_level_entities(0)
+        self.schedule_enemy_spawn()
+
+    @property
+    def viewport(self):
+        return self.view_left, self.view_left + SCREEN_WIDTH, self.view_bottom, self.view_bottom + SCREEN_HEIGHT
+
+    """
+    Функция вычисления хеша состояния мира.
+    Используется при записи и воспроизведении, чтобы найти первый тик, на котором сессии разошлись.
+    """
+    def state_hash(self):
+        player = self.player
+        values = (
+            self.tick, self.kills, player.health, self.game_over, self.fall_through, self.view_left, self.view_bottom,
+            player.center_x, player.center_y, player.change_x, player.change_y, player.triple_shoot,
+        )
+        state = struct.pack(f"<{len(values)}d", *values)
+        return zlib.crc32(self.entities.state_bytes(), zlib.crc32(state))
+
+    """
+    Функция генерации чанка мира.
+    Возвращает запечённые участки пола и случайных платформ чанка (terrain.bake_tiles), не создавая спрайтов,
+    поэтому может выполняться в фоновом потоке.
+
+    Параметры:
+    chunk_x (int): Левая граница чанка.
+    rng (random.Random): Генератор случайных чисел с зерном этого чанка.
+    """
+    def generate_chunk(self, chunk_x, rng):
+        return bake_tiles(self.floor_tiles(chunk_x) + self.random_platform_tiles(chunk_x, rng))
+
+    """
+    Функция чтения чанка из файла уровня; как и generate_chunk, возвращает запечённые участки.
+    Генератор случайных чисел чанка не используется: раскладка уже в файле.
+    """
+    def read_level_chunk(self, chunk_x, rng):
+        return bake_tiles(self.level.chunk_tiles(chunk_x))
+
+    """
+    Функция создания запечённого участка: спрайт для отрисовки и прямоугольник для столкновений.
+    Список спрайтов чанка после создания больше не меняется.
+    """
+    def build_platform(self, chunk_x, slab):
+        platform = Platform(slab.image, slab.x, slab.y, slab.is_floor, registry.get_baked(slab.image, slab.offsets))
+        solid = SolidRect(slab.left, slab.right, slab.bottom, slab.top, slab.is_floor)
+        platform_list = self.platform_lists.get(chunk_x)
+        if platform_list is None:
+            platform_list = self.platform_lists[chunk_x] = arcade.SpriteList(use_spatial_hash=False)
+        platform_list.append(platform)
+        self.platform_index.insert(solid)
+        return platform, solid
+
+    def unload_chunk(self, chunk_x, platforms):
+        platform_list = self.platform_lists[chunk_x]
+        for platform, solid in platforms:
+            platform_list.remove(platform)
+            self.platform_index.remove(solid)
+        if not platform_list:
+            del self.platform_lists[chunk_x]
+
+    """
+    Функция выбора списков платформ, которые видны на экране.
+    Чанки целиком за экраном не отправляются на отрисовку.
+    """
+    def visible_platform_lists(self):
+        view_left, view_right, view_bottom, view_top = self.viewport
+        return [platform_list for chunk_x, platform_list in self.platform_lists.items()
+                if chunk_x - CHUNK_OVERHANG < view_right and chunk_x + CHUNK_WIDTH + CHUNK_OVERHANG > view_left]
+
+    def random_platform_tiles(self, chunk_x, rng):
+        tiles = []
+        for _ in range(PLATFORM_LEVELS):
+            num_platforms = rng.randint(*PLATFORMS_PER_LEVEL)  # Случайное количество платформ на уровне
+            for _ in range(num_platforms):
+                x = rng.randint(chunk_x, chunk_x + CHUNK_WIDTH)
+                y = rng.randint(150, SCREEN_HEIGHT - 64)
+                tiles.append(Tile("images/platform_1.png", x, y, False))
+        return tiles
+
+    def floor_tiles(self, chunk_x):
+        return [Tile("images/platform_0.png", x, 32, True) for x in range(chunk_x, chunk_x + CHUNK_WIDTH, 64)]
+
+    """
+    Функция появления врагов.
+    Сторона и высота выбираются сразу, а заявка уходит распорядителю, который может её отложить.
+    """
+    def spawn_entities(self, num_enemies=START_ENEMIES):
+        for request in spawn_requests(self.random.spawn, num_enemies):
+            self.spawner.request(request)
+
+    """
+    Функция появления врагов по точкам уровня на чанках, созданных впервые.
+
+    Параметры:
+    generated_x (int): Граница созданного мира до подгрузки новых чанков.
+    """
+    def spawn_level_entities(self, generated_x):
+        for chunk_x in range(generated_x, self.chunks.generated_x, CHUNK_WIDTH):
+            for request in self.level.chunk_spawns(chunk_x):
+                self.spawner.request(request)
+
+    """
+    Функция выполнения заявки на появление врага.
+    Враг появляется у края экрана на момент выполнения, а не подачи заявки.
+    """
+    def spawn_enemy(self, request):
+        side, y = request
+        view_left, view_right, view_bottom, view_top = self.viewport
+        if side == "left":
+            return self.entities.spawn_enemy(view_left, y, 1)
+        return self.entities.spawn_enemy(view_right, y, -1)
+
+    """
+    Функция планирования следующего появления одиночного врага.
+    Интервалы случайные со средним ENEMY_SPAWN_INTERVAL, как у прежней проверки 1 из 180 на каждом кадре.
+    """
+    def schedule_enemy_spawn(self):
+        self.clock.schedule(self.random.spawn.expovariate(1 / ENEMY_SPAWN_INTERVAL), self.spawn_scheduled_enemy)
+
+    def spawn_scheduled_enemy(self):
+        self.spawn_entities(num_enemies=1)
+        self.schedule_enemy_spawn()
+
+    """
+    Функция включения стрельбы в три стороны.
+    Отключение планируется на игровых часах; предыдущее отключение отменяется.
+
+    Параметры:
+    duration (float): Продолжительность в секундах игрового времени.
+    """
+    def activate_triple_shoot(self, duration):
+        self.set_triple_shoot_end(self.clock.time + duration)
+
+    def extend_triple_shoot(self, duration):
+        self.set_triple_shoot_end(self.player.triple_shoot_end_time + duration)
+
+    def set_triple_shoot_end(self, end_time):
+        player = self.player
+        if player.triple_shoot_timer is not None:
+            player.triple_shoot_timer.cancel()
+        player.triple_shoot = True
+        player.triple_shoot_end_time = end_time
+        player.triple_shoot_timer = self.clock.schedule_at(end_time, self.end_triple_shoot)
+
+    def end_triple_shoot(self):
+        self.player.triple_shoot = False
+        self.player.triple_shoot_timer = None
+
+    """
+    Функция одного шага симуляции.
+    Применяет события ввода, накопленные за шаг, и продвигает мир и игровые часы на TICK_DURATION.
+    На паузе мир не меняется.
+
+    Параметры:
+    inputs (iterable): События ввода (PRESS или RELEASE, действие).
+    """
+    def step(self, inputs=()):
+        if self.clock.paused:
+            return
+        profiler = self.profiler
+        start = profiler.begin()
+        for kind, action in inputs:
+            if kind == PRESS:
+                self.press(action)
+            else:
+                self.release(action)
+        start = profiler.lap("input", start)
+        if not self.game_over:
+            # Срабатывание отложенных событий: конец тройного выстрела, появление врагов
+            self.clock.advance(TICK_DURATION)
+            start = profiler.lap("timers_spawn", start)
+            self.update()
+            start = profiler.begin()
+        self.tick += 1
+        # Анимация идёт и после конца игры, чтобы доиграл клип смерти
+        self.animations.update(self.tick)
+        self.animate_player()
+        profiler.lap("animation", start)
+
+    """
+    Функция запуска клипа, соответствующего состоянию игрока.
+    Клип, который уже играет, не начинается заново.
+    """
+    def animate_player(self):
+        player = self.player
+        state = player.update_state(self.tick, self.game_over)
+        self.animations.play(player, self.player_clips[state], not player.facing_right)
+
+    """
+    Функция обновления состояния мира.
+    Отвечает за обновление всех игровых объектов и проверку условий конца игры.
+    """
+    def update(self):
+        if self.game_over:
+            return
+
+        profiler = self.profiler
+        start = profiler.begin()
+        viewport = self.viewport
+        # Движение игрока вместе с приземлением на платформы
+        self.physics.move(self.player, self.fall_through)
+        if self.end_of_map and self.player.right > self.end_of_map:
+            self.player.right = self.end_of_map
+        start = profiler.lap("player", start)
+        self.entities.update_projectiles(viewport)
+        start = profiler.lap("projectiles", start)
+        self.entities.update_enemies(viewport)
+        start = profiler.lap("enemies", start)
+
+        # Проверка столкновений снарядов с врагами
+        kills = self.entities.hit_enemies()
+        if kills:
+            previous_kills = self.kills
+            self.kills += kills
+            # Включение стрельбы в три стороны при убийстве каждого TRIPLE_SHOOT_KILLS-го врага
+            if self.kills // TRIPLE_SHOOT_KILLS != previous_kills // TRIPLE_SHOOT_KILLS:
+                self.activate_triple_shoot(TRIPLE_SHOOT_DURATION)
+        start = profiler.lap("collide_projectiles", start)
+
+        # Проверка столкновений игрока с врагами
+        hits = self.entities.hit_player(self.player)
+        if hits:
+            self.player.health -= hits
+            self.player.hit_until = self.tick + self.player_clips["hit"].duration
+            if self.player.health <= 0:
+                self.game_over = True
+        start = profiler.lap("collide_player", start)
+
+        # Прокрутка мира и создание объектов чанков, подготовленных в фоне
+        self.scroll_viewport()
+        self.chunks.build(self.chunk_budget)
+        start = profiler.lap("scroll", start)
+
+        # Отложенные появления врагов
+        self.spawner.update(TICK_DURATION)
+        profiler.lap("spawn", start)
+
+    def scroll_viewport(self):
+        changed = False
+
+        left_boundary = self.view_left + VIEWPORT_MARGIN
+        if self.player.left < left_boundary:
+            self.view_left -= left_boundary - self.player.left
+            changed = True
+
+        right_boundary = self.view_left + SCREEN_WIDTH - VIEWPORT_MARGIN
+        if self.player.right > right_boundary:
+            self.view_left += self.player.right - right_boundary
+            changed = True
+
+        if changed:
+            if self.end_of_map:
+                self.view_left = min(self.view_left, max(0, self.end_of_map - SCREEN_WIDTH))
+            self.view_left = int(self.view_left)
+            self.view_bottom = int(self.view_bottom)
+            # Подгрузка чанков рядом с экраном и выгрузка дальних; на новой территории появляются враги
+            generated_x = self.chunks.generated_x
+            new_chunks = self.chunks.stream(self.view_left, self.view_left + SCREEN_WIDTH)
+            if self.level is not None:
+                self.spawn_level_entities(generated_x)
+            else:
+                for _ in range(new_chunks):
+                    self.spawn_entities(num_enemies=CHUNK_ENEMIES)
+
+    """
+    Функция обработки нажатия.
+    Выполняет действие игрока, соответствующее нажатой клавише.
+
+    Параметры:
+    action (int): Действие игрока (ACTION_*).
+    """
+    def press(self, action):
+        if action == ACTION_THROTTLE:
+            self.spawner.throttled = True
+            return
+        if self.game_over:
+            return
+
+        if action == ACTION_JUMP:
+            if self.player.on_platform:
+                self.player.change_y = PLAYER_JUMP_SPEED
+                self.player.jumping = True
+                self.player.on_platform = False
+        elif action == ACTION_LEFT:
+            self.player.change_x = -PLAYER_MOVEMENT_SPEED
+            self.player.facing_right = False
+        elif action == ACTION_RIGHT:
+            self.player.change_x = PLAYER_MOVEMENT_SPEED
+            self.player.facing_right = True
+        elif action == ACTION_DOWN:
+            if not self.fall_through:
+                # С пола спрыгнуть нельзя, только с платформы
+                ground = self.physics.ground(self.player)
+                if ground is not None and not ground.is_floor:
+                    self.fall_through = True
+                    self.player.change_y = FALL_THRU_SPEED
+        elif action == ACTION_FIRE:
+            direction = 1 if self.player.facing_right else -1
+            self.entities.spawn_projectile(self.player.center_x, self.player.center_y, direction)
+            if self.player.triple_shoot:
+                # Стрельба влево, вправо и вверх
+                self.entities.spawn_projectile(self.player.center_x, self.player.center_y, -1)
+                self.entities.spawn_projectile(self.player.center_x, self.player.center_y, 0, 1)
+                self.entities.spawn_projectile(self.player.center_x, self.player.center_y, 1)
+        elif action == ACTION_CHEAT:
+            if self.player.triple_shoot:
+                self.extend_triple_shoot(CHEAT_TRIPLE_SHOOT_DURATION)
+            else:
+                self.activate_triple_shoot(CHEAT_TRIPLE_SHOOT_DURATION)
+
+    """
+    Функция обработки отпускания.
+    Отвечает за остановку движения игрока при отпускании клавиш направления.
+
+    Параметры:
+    action (int): Действие игрока (ACTION_*).
+    """
+    def release(self, action):
+        if action == ACTION_THROTTLE:
+            self.spawner.throttled = False
+            return
+        if self.game_over:
+            return
+
+        if action == ACTION_LEFT or action == ACTION_RIGHT:
+            self.player.change_x = 0
+        elif action == ACTION_DOWN:
+            self.fall_through = False